@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# Benchmarks for the diameter, maxdist and minimum area rectangle algorithms
+# across hull sizes and point distributions, next to O(n^2) brute force
+# baselines. Results are written as JSON so runs can be compared:
+#
+#   python3 benchmarks/benchmark.py --out before.json
+#   python3 benchmarks/benchmark.py --out after.json --compare before.json
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+# The shared rotating_calipers package lives in the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from diameter.diameter import antipodal_pairs
+from diameter.diameter import new_record as new_diameter_record
+from diameter.diameter import record_bounding_rectangle as record_diameter
+from maxdist.maxdist import compute_max_distances
+from maxdist.maxdist import new_record as new_maxdist_record
+from maxdist.maxdist import record_bounding_rectangle as record_maxdist
+from minimum_area_rectangle.minimum_area_rectangle import min_area_rectangle
+from minimum_area_rectangle.minimum_area_rectangle import new_record as new_rectangle_record
+from minimum_area_rectangle.minimum_area_rectangle import record_bounding_rectangles
+from rotating_calipers.hull import convex_hull
+
+SIZES = (3, 10, 100, 1000, 10000, 100000)
+DISTRIBUTIONS = ('disk', 'circle', 'skinny', 'clustered', 'lattice')
+ALGORITHMS = ('diameter', 'maxdist', 'min_area_rectangle')
+
+# Rows of the pairwise brute force matrices handled at once
+BRUTE_CHUNK = 1024
+
+
+def sample(distribution, n, rng):
+    # n points of the named distribution. Points inside a disk give a hull of
+    # only a few dozen vertices, all the other distributions put (nearly) every
+    # point on the hull so the hull size follows n.
+    if distribution == 'disk':
+        r = np.sqrt(rng.random(n))
+        t = rng.random(n) * 2 * math.pi
+        return np.stack([r * np.cos(t), r * np.sin(t)], axis=1)
+    if distribution == 'circle':
+        return on_circle(rng.random(n) * 2 * math.pi)
+    if distribution == 'skinny':
+        # An ellipse squashed 1000:1 and turned by 30 degrees
+        points = on_circle(rng.random(n) * 2 * math.pi) * [1, 1e-3]
+        c, s = math.cos(math.pi / 6), math.sin(math.pi / 6)
+        return points @ np.array([[c, s], [-s, c]])
+    if distribution == 'clustered':
+        # Vertices bunched around 8 directions with long edges between the bunches
+        centers = rng.random(8) * 2 * math.pi
+        return on_circle(centers[rng.integers(0, 8, n)] + rng.normal(scale=0.05, size=n))
+    if distribution == 'lattice':
+        # Integer points near a circle large enough to keep most of them on the
+        # hull, with many parallel edges and exact ties
+        radius = max(2.0, n ** 1.5)
+        return np.round(on_circle(rng.random(n) * 2 * math.pi) * radius)
+    raise ValueError('Unknown distribution: ' + str(distribution))
+
+
+def on_circle(angles):
+    return np.stack([np.cos(angles), np.sin(angles)], axis=1)
+
+
+def make_hull(distribution, n, rng):
+    points = sample(distribution, n, rng)
+    return np.ascontiguousarray(points[convex_hull(points)])
+
+
+# Each runner takes the hull(s) and returns the value the algorithm finds, so
+# the fast paths can be checked against the brute force baselines.
+
+def diameter_sweep(hull, other):
+    record = record_diameter(hull, new_diameter_record(len(hull)))
+    _, calipers, _, edge_pairs = record.result()
+    pairs = np.concatenate([calipers[:, [1, 3]], edge_pairs[edge_pairs[:, 0] >= 0]])
+    d = hull[pairs[:, 0]] - hull[pairs[:, 1]]
+    return math.sqrt(np.einsum('ij,ij->i', d, d).max())
+
+
+def diameter_pairs(hull, other):
+    _, _, dist_sq = antipodal_pairs(hull)
+    return math.sqrt(dist_sq.max())
+
+
+def diameter_brute(hull, other):
+    return brute_max_distance(hull, hull)
+
+
+def maxdist_sweep(hull, other):
+    record = record_maxdist(hull, other, new_maxdist_record(len(hull), len(other)))
+    _, calipers, _, _ = record.result()
+    d = hull[calipers[:, 1]] - other[calipers[:, 7]]
+    return math.sqrt(np.einsum('ij,ij->i', d, d).max())
+
+
+def maxdist_vectorized(hull, other):
+    _, lengths = compute_max_distances(hull, [0, len(hull)], other, [0, len(other)])
+    return float(lengths[0])
+
+
+def maxdist_brute(hull, other):
+    return brute_max_distance(hull, other)
+
+
+def rectangle_sweep(hull, other):
+    rects, _, _, _ = record_bounding_rectangles(hull, new_rectangle_record(len(hull))).result()
+    sides_a = np.linalg.norm(rects[:, 0, 1] - rects[:, 0, 0], axis=1)
+    sides_b = np.linalg.norm(rects[:, 0, 2] - rects[:, 0, 1], axis=1)
+    return float((sides_a * sides_b).min())
+
+
+def rectangle_optimum(hull, other):
+    return float(min_area_rectangle(hull)[1])
+
+
+def rectangle_brute(hull, other):
+    # Project every vertex on every edge and its normal
+    edges = np.roll(hull, -1, axis=0) - hull
+    length_sq = np.einsum('ij,ij->i', edges, edges)
+    edges, length_sq = edges[length_sq > 0], length_sq[length_sq > 0]
+    best = math.inf
+    for start in range(0, len(edges), BRUTE_CHUNK):
+        e = edges[start:start + BRUTE_CHUNK]
+        along = e @ hull.T
+        across = (e @ [[0, 1], [-1, 0]]) @ hull.T
+        areas = np.ptp(along, axis=1) * np.ptp(across, axis=1) / length_sq[start:start + BRUTE_CHUNK]
+        best = min(best, float(areas.min()))
+    return best
+
+
+def brute_max_distance(points1, points2):
+    best = 0.0
+    for start in range(0, len(points1), BRUTE_CHUNK):
+        d = points1[start:start + BRUTE_CHUNK, None, :] - points2[None, :, :]
+        best = max(best, float(np.einsum('ijk,ijk->ij', d, d).max()))
+    return math.sqrt(best)
+
+
+RUNNERS = {
+    'diameter': (('sweep', diameter_sweep), ('antipodal_pairs', diameter_pairs), ('brute', diameter_brute)),
+    'maxdist': (('sweep', maxdist_sweep), ('vectorized', maxdist_vectorized), ('brute', maxdist_brute)),
+    'min_area_rectangle': (('sweep', rectangle_sweep), ('min_area_rectangle', rectangle_optimum),
+                           ('brute', rectangle_brute)),
+}
+
+
+def time_call(run, hull, other, min_time, max_repeats):
+    # Best and median of repeated calls, repeating until min_time has passed
+    times = []
+    value = None
+    total = 0.0
+    while len(times) < max_repeats and (total < min_time or len(times) < 3):
+        start = time.perf_counter()
+        value = run(hull, other)
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        total += elapsed
+    return value, min(times), float(np.median(times)), len(times)
+
+
+def peak_memory(run, hull, other):
+    # Peak bytes allocated during one call, numpy buffers included
+    tracemalloc.start()
+    try:
+        run(hull, other)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(algorithms, distributions, sizes, seed, min_time, max_repeats, brute_max):
+    results = []
+    for distribution in distributions:
+        for n in sizes:
+            rng = np.random.default_rng(seed)
+            hull = make_hull(distribution, n, rng)
+            # maxdist measures against a second hull from the same distribution
+            other = make_hull(distribution, n, rng) + 3
+            for algorithm in algorithms:
+                vertices = len(hull) + len(other) if algorithm == 'maxdist' else len(hull)
+                reference = None
+                for name, run in RUNNERS[algorithm]:
+                    row = {'algorithm': algorithm, 'implementation': name, 'distribution': distribution,
+                           'points': n, 'hull_vertices': vertices}
+                    if name == 'brute' and vertices > brute_max:
+                        continue
+                    try:
+                        value, best, median, repeats = time_call(run, hull, other, min_time, max_repeats)
+                    except ValueError as error:
+                        # A sweep that walks past its record did not terminate
+                        row['error'] = str(error)
+                        results.append(row)
+                        print_row(row)
+                        continue
+                    row.update({'value': value, 'time_per_call': best, 'median_time_per_call': median,
+                                'time_per_vertex': best / vertices, 'repeats': repeats,
+                                'peak_memory': peak_memory(run, hull, other)})
+                    if name == 'brute':
+                        reference = value
+                    results.append(row)
+                    print_row(row)
+                if reference is not None:
+                    # Flag fast paths that disagree with the brute force
+                    for row in results:
+                        if (row['algorithm'], row['distribution'], row['points']) == (algorithm, distribution, n) \
+                                and 'value' in row:
+                            row['matches_brute'] = bool(math.isclose(row['value'], reference, rel_tol=1e-9,
+                                                                     abs_tol=1e-12))
+    return results
+
+
+def print_row(row):
+    label = '%-18s %-18s %-9s %7d pts %7d hull' % (row['algorithm'], row['implementation'], row['distribution'],
+                                                  row['points'], row['hull_vertices'])
+    if 'error' in row:
+        print(label, ' error:', row['error'])
+    else:
+        print(label, ' %10.3f us/call %8.3f us/vertex %10d B peak' %
+              (row['time_per_call'] * 1e6, row['time_per_vertex'] * 1e6, row['peak_memory']))
+
+
+def compare(results, baseline):
+    # Ratio of the new best time per call to the baseline's, > 1 is slower
+    key = lambda row: (row['algorithm'], row['implementation'], row['distribution'], row['points'])
+    before = {key(row): row for row in baseline['results'] if 'time_per_call' in row}
+    print('\nChange against the baseline (new time / old time):')
+    for row in results:
+        old = before.get(key(row))
+        if old is None or 'time_per_call' not in row:
+            continue
+        print('%-18s %-18s %-9s %7d pts  %6.2fx' % (key(row) + (row['time_per_call'] / old['time_per_call'],)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the rotating calipers algorithms')
+    parser.add_argument('--algorithms', nargs='+', choices=ALGORITHMS, default=ALGORITHMS)
+    parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS, default=DISTRIBUTIONS)
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES, help='points sampled per hull')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds spent timing each case')
+    parser.add_argument('--max-repeats', type=int, default=1000)
+    parser.add_argument('--brute-max', type=int, default=5000,
+                        help='largest hull (in vertices) the O(n^2) baselines run on')
+    parser.add_argument('--out', default='benchmark.json', help='JSON file to write the results to')
+    parser.add_argument('--compare', help='JSON file of an earlier run to compare against')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.algorithms, args.distributions, args.sizes, args.seed, args.min_time,
+                             args.max_repeats, args.brute_max)
+    report = {
+        'meta': {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+                 'numpy': np.__version__, 'machine': platform.machine(), 'platform': platform.platform(),
+                 'seed': args.seed, 'min_time': args.min_time},
+        'results': results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=1)
+    print('Results written to', args.out)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
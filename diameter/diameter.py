@@ -1,118 +1,258 @@
 import math
 import numpy as np
+from rotating_calipers.dispatch import use_scalar
+from rotating_calipers.engine import CaliperSweep, SweepRecord, check_closed, start_calipers, window_holds
+from rotating_calipers.hull import check_offsets, clean_hull, convex_hull, convex_hulls, group_extreme, sweep_hull
+from rotating_calipers.instrument import timed
+from rotating_calipers.supports import opposite_pairs
 
 
-def next_point_idx(idx, points):
-    if idx == 0:
-        return points.shape[0] - 1
-    else:
-        return idx - 1
-
-
-def vector_angle(v1, v2):
-    return math.acos(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
+def compute_bounding_rectangle(points, compute_hull=False, stats=None, hint=None, span=None, watchdog=False):
+    # points is a counter-clockwise convex hull, or any point set with compute_hull.
+    # Repeated and collinear hull vertices are dropped first (see clean_hull).
+    # stats is an optional rotating_calipers.instrument.SweepStats.
+    # hint=(calipers, angle) of a state recorded for a similar hull (a row of
+    # SweepRecord.calipers and .angles) warm starts the calipers there instead of
+    # on the extreme points, and the sweep only looks span radians
+    # (engine.WARM_SPAN by default) either side of the hint. When the farthest
+    # pair in there is not the diameter, it goes on over every antipodal pair.
+    # The sweep stops after at most n + 2 states; with watchdog a sweep that
+    # has not closed by then raises SweepError.
+    with timed(stats, 'hull'):
+        points = sweep_hull(points, compute_hull, watchdog)
+    if stats is not None:
+        stats.count_hulls(len(points))
 
+    for sweep, edge_pair in sweep_states(points, stats, hint, span, watchdog):
+        p2 = points[sweep.calipers[1].idx]
+        p4 = points[sweep.calipers[3].idx]
 
-def rotate_vec(v, angle):
-    rotation_matrix = np.array([[np.cos(angle), -np.sin(angle)],
-                                [np.sin(angle), np.cos(angle)]])
-    return rotation_matrix @ v
-
+        # Form the bounding box points by calculating the 4 intersections
+        result = np.array(sweep.rectangle())
 
-def line_intersection(v1, p1, v2, p2):
-    mat_1 = np.array([v1, -v2]).T
-    mat_2 = (p2 - p1)
-    result = np.linalg.inv(mat_1) @ mat_2
-    return result[0] * v1 + p1
+        if edge_pair is not None:
+            yield result, (p2, p4), (points[edge_pair[0]], points[edge_pair[1]])
+        else:
+            yield result, (p2, p4), None  # return all the rectangles
 
 
-def compute_bounding_rectangle(points):
-    # Chose the extreme points along each axis
-    p1_idx = np.argmin(points[:, 0])
-    p2_idx = np.argmin(points[:, 1])
-    p3_idx = np.argmax(points[:, 0])
-    p4_idx = np.argmax(points[:, 1])
+def sweep_states(points, stats=None, hint=None, span=None, watchdog=False):
+    # The one sweep loop behind compute_bounding_rectangle and
+    # record_bounding_rectangle, over a hull from sweep_hull. Yields the sweep
+    # in every state (only valid until the next one) and the extra antipodal
+    # pair found on parallel edges as indices, or None.
 
-    # The box starts axis aligned
-    vec_1 = np.array([0, 1])
-    vec_2 = np.array([-1, 0])
-    vec_3 = np.array([0, -1])
-    vec_4 = np.array([1, 0])
+    # Chose the extreme points along each axis, the box starts axis aligned
+    # (or span radians before the hint). The bottom and top calipers (p2 and
+    # p4) drive the sweep.
+    calipers, direction, span = start_calipers([points], hint, span)
+    sweep = CaliperSweep(calipers, drivers=(1, 3), direction=direction, stats=stats)
+    caliper_2 = sweep.calipers[1]
+    caliper_4 = sweep.calipers[3]
 
-    angle = 0
     counter = 0
-    init_p2 = p2_idx
-    init_p4 = p4_idx
+    init_p2 = caliper_2.idx
+    init_p4 = caliper_4.idx
     flag = 0
-    edge_p2idx = -1
-    edge_p4idx = -1
-    while True:
-        if counter and (init_p2 == p4_idx) and (init_p4 == p2_idx):
+    edge_pair = None
+    best = -1.0
+    for _ in range(len(points) + 2):
+        if counter and (init_p2 == caliper_4.idx) and (init_p4 == caliper_2.idx):
             flag = 1
-        p1 = points[p1_idx]
-        p2 = points[p2_idx]
-        p3 = points[p3_idx]
-        p4 = points[p4_idx]
+        if span is not None:
+            best = max(best, distance_sq(caliper_2.point(), caliper_4.point()))
+            if edge_pair is not None:
+                best = max(best, distance_sq(caliper_2.points[edge_pair[0]], caliper_2.points[edge_pair[1]]))
+        yield sweep, edge_pair
 
-        # Form the bounding box points by calculating the 4 intersections
-        rec_p1 = line_intersection(vec_1, p1, vec_2, p2)
-        rec_p2 = line_intersection(vec_2, p2, vec_3, p3)
-        rec_p3 = line_intersection(vec_3, p3, vec_4, p4)
-        rec_p4 = line_intersection(vec_4, p4, vec_1, p1)
+        # rotate clockwise onto the nearest edge, p2 moves first on parallel edges
+        prev_p2 = caliper_2.idx
+        moved, tied = sweep.step()
+        edge_pair = (prev_p2, caliper_4.next_idx()) if tied else None
+
+        counter += 1
+        # Past half a turn every antipodal pair has been seen, even when tied
+        # extreme points keep the anchors from meeting the start ones again
+        if flag or moved is None or sweep.turned_past(2):
+            break
+        if span is not None and sweep.covered(2, span):
+            if window_holds(best, antipodal_pairs(points)[2].max()):
+                break
+            # The farthest pair is outside the window, sweep the rest of the turn
+            span = None
+    else:
+        check_closed('diameter', len(points) + 2, len(points), watchdog)
+    if stats is not None:
+        stats.finish()
 
-        result = np.stack([rec_p1, rec_p2, rec_p3, rec_p4])
 
-        if edge_p2idx != -1:
-            yield result, (p2, p4), (points[edge_p2idx], points[edge_p4idx])
-            edge_p2idx = -1
-            edge_p4idx = -1
-        else:
-            yield result, (p2, p4), None  # return all the rectangles
+def distance_sq(p, q):
+    return (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2
+
+
+def new_record(n):
+    # Buffers for every sweep over hulls of up to n vertices: half a turn walks
+    # each hull edge once, plus the closing state
+    return SweepRecord(n + 2, 4, 1, edge_pairs=True)
+
+
+def record_bounding_rectangle(points, out=None, compute_hull=False, stats=None, hint=None, span=None,
+                              watchdog=False):
+    # The states of compute_bounding_rectangle written into a SweepRecord (out,
+    # or a new one). The p2 and p4 anchors are calipers[:, 1] and calipers[:, 3],
+    # indices into the hull the sweep ran on (points itself for a clean hull).
+    with timed(stats, 'hull'):
+        points = sweep_hull(points, compute_hull, watchdog)
+    if stats is not None:
+        stats.count_hulls(len(points))
+    if out is None:
+        out = new_record(len(points))
+    out.check(len(points) + 2, 4, 1, edge_pairs=True)
+    for sweep, edge_pair in sweep_states(points, stats, hint, span, watchdog):
+        out.append(sweep, edge_pair)
+    return out
 
-        p1_next = points[next_point_idx(p1_idx, points)]
-        p2_next = points[next_point_idx(p2_idx, points)]
-        p3_next = points[next_point_idx(p3_idx, points)]
-        p4_next = points[next_point_idx(p4_idx, points)]
-
-        side_vec_1 = p1_next - p1
-        side_vec_2 = p2_next - p2
-        side_vec_3 = p3_next - p3
-        side_vec_4 = p4_next - p4
-
-        angle_1 = vector_angle(side_vec_1, vec_1)
-        angle_2 = vector_angle(side_vec_2, vec_2)
-        angle_3 = vector_angle(side_vec_3, vec_3)
-        angle_4 = vector_angle(side_vec_4, vec_4)
-
-        angles = [angle_2, angle_4]
-        if angle_2 == angle_4:
-            min_angle_idx = 0
-            edge_p2idx = p2_idx
-            edge_p4idx = next_point_idx(p4_idx, points)
+
+def antipodal_pairs(points, compute_hull=False, stats=None):
+    # Every antipodal vertex pair of a counter-clockwise hull at once, as two int32
+    # index arrays (i < j) and the squared distance of each pair. Indices refer
+    # to points, so with compute_hull they point into the raw point set.
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    vertices = np.arange(points.shape[0])
+    if compute_hull:
+        with timed(stats, 'hull'):
+            vertices = convex_hull(points)
+    hull = points[vertices]
+    n = hull.shape[0]
+
+    with timed(stats, 'sweep'):
+        if n < 3:
+            i, j = np.triu_indices(n, 1)
         else:
-            min_angle_idx = np.argmin(angles)
-        min_angle = angles[min_angle_idx]
-
-        if min_angle_idx == 0:
-            p2_idx = next_point_idx(p2_idx, points)
-            if angle_1 < angle_2:
-                p1_idx = next_point_idx(p1_idx, points)
-            if angle_3 < angle_2:
-                p3_idx = next_point_idx(p3_idx, points)
-        elif min_angle_idx == 1:
-            p4_idx = next_point_idx(p4_idx, points)
-            if angle_1 < angle_4:
-                p1_idx = next_point_idx(p1_idx, points)
-            if angle_3 < angle_4:
-                p3_idx = next_point_idx(p3_idx, points)
-
-        # rotate clockwise by min_angle
-        vec_1 = rotate_vec(vec_1, -min_angle)
-        vec_2 = rotate_vec(vec_2, -min_angle)
-        vec_3 = rotate_vec(vec_3, -min_angle)
-        vec_4 = rotate_vec(vec_4, -min_angle)
-
-        angle = angle + min_angle
-        counter += 1
-        if flag:
-            break
+            offsets = np.array([0, n])
+            i, j, _ = opposite_pairs(hull, offsets, hull, offsets)
+
+            # Each pair shows up once from either end
+            i, j = np.minimum(i, j), np.maximum(i, j)
+            keep = i != j
+            i, j = np.divmod(np.unique(i[keep] * n + j[keep]), n)
+
+    with timed(stats, 'scoring'):
+        d = hull[i] - hull[j]
+        dist_sq = np.einsum('ij,ij->i', d, d)
+    i, j = vertices[i], vertices[j]
+    if stats is not None:
+        stats.steps += i.shape[0]
+        stats.count_hulls(n)
+        stats.finish()
+    return np.minimum(i, j).astype(np.int32), np.maximum(i, j).astype(np.int32), dist_sq
+
+
+def compute_diameters(coords, offsets, compute_hull=False, stats=None):
+    # Diameter of many hulls at once, stored back to back in coords with hull k
+    # spanning offsets[k]:offsets[k + 1] (or arbitrary point sets with
+    # compute_hull). Returns the farthest pair of each hull as indices into
+    # coords (K, 2) and its length (K,).
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    check_offsets(coords, offsets)
+    vertices = np.arange(coords.shape[0])
+    if compute_hull:
+        with timed(stats, 'hull'):
+            vertices, offsets = convex_hulls(coords, offsets)
+    hulls = coords[vertices]
+
+    with timed(stats, 'sweep'):
+        i, j, hull_ids = opposite_pairs(hulls, offsets, hulls, offsets)
+    with timed(stats, 'scoring'):
+        pairs, lengths = best_pairs(hulls, offsets, i, j, hull_ids)
+    if stats is not None:
+        stats.steps += i.shape[0]
+        stats.count_hulls(hulls.shape[0], offsets.shape[0] - 1)
+        stats.finish()
+    return vertices[pairs], lengths
+
+
+def best_pairs(hulls, offsets, i, j, hull_ids):
+    # Farthest of the candidate pairs of every hull
+    d = hulls[i] - hulls[j]
+    dist_sq = np.einsum('ij,ij->i', d, d)
+    pair_offsets = np.concatenate([[0], np.cumsum(np.bincount(hull_ids, minlength=offsets.shape[0] - 1))])
+    best = group_extreme(dist_sq, hull_ids, pair_offsets, largest=True)
+    pairs = np.stack([i[best], j[best]], axis=1)
+    lengths = np.sqrt(dist_sq[best])
+
+    # Hulls of one or two vertices have no caliper pairs to speak of
+    small = np.diff(offsets) <= 2
+    pairs[small, 0] = offsets[:-1][small]
+    pairs[small, 1] = offsets[1:][small] - 1
+    d = hulls[pairs[small, 0]] - hulls[pairs[small, 1]]
+    lengths[small] = np.sqrt(np.einsum('ij,ij->i', d, d))
+    return pairs, lengths
+
+
+def diameter(points, compute_hull=False, stats=None):
+    # Farthest pair of vertices of one hull as indices into points and its
+    # length. Repeated and collinear hull vertices are dropped first (see
+    # clean_hull). Small hulls run scalar_diameter, larger ones the vectorized
+    # antipodal_pairs; the crossover is SCALAR_MAX_VERTICES['diameter'] in
+    # rotating_calipers.dispatch.
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    if points.shape[0] == 0:
+        raise ValueError('The diameter needs at least one point')
+    with timed(stats, 'hull'):
+        vertices = convex_hull(points) if compute_hull else clean_hull(points)
+    hull = points[vertices]
+    if hull.shape[0] >= 3 and not use_scalar('diameter', hull.shape[0]):
+        i, j, dist_sq = antipodal_pairs(hull, stats=stats)
+        best = int(np.argmax(dist_sq))
+        i, j = int(vertices[i[best]]), int(vertices[j[best]])
+        return min(i, j), max(i, j), float(np.sqrt(dist_sq[best]))
+
+    with timed(stats, 'sweep'):
+        i, j, dist_sq = scalar_diameter(hull.tolist())
+    if stats is not None:
+        stats.steps += hull.shape[0]
+        stats.count_hulls(hull.shape[0])
+        stats.finish()
+    i, j = int(vertices[i]), int(vertices[j])
+    return min(i, j), max(i, j), math.sqrt(dist_sq)
+
+
+def scalar_diameter(hull):
+    # Farthest pair of a counter-clockwise hull given as a list of (x, y) on
+    # plain floats. The vertex opposite edge i only moves forward as i does.
+    # Returns the two vertex indices and the squared length.
+    n = len(hull)
+    a, b = hull[0], hull[-1]
+    best = (0, n - 1, (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2)
+    if n < 3:
+        return best
+    # Start on the vertex farthest from the first edge. Walking there from
+    # vertex 1 could stop short on an edge that is parallel to the first one
+    # up to rounding (a vertex a hair off the line through its neighbours).
+    a, b = hull[0], hull[1]
+    j = max(range(n), key=lambda k: (b[0] - a[0]) * (hull[k][1] - a[1]) - (b[1] - a[1]) * (hull[k][0] - a[0]))
+    for i in range(n):
+        a = hull[i]
+        b = hull[i + 1 if i + 1 < n else 0]
+        ex = b[0] - a[0]
+        ey = b[1] - a[1]
+        # Walk to the vertex farthest from the line through edge i
+        turn = 0.0
+        for _ in range(n):
+            c = hull[j]
+            d = hull[j + 1 if j + 1 < n else 0]
+            turn = ex * (d[1] - c[1]) - ey * (d[0] - c[0])
+            if turn <= 0:
+                break
+            j = j + 1 if j + 1 < n else 0
+        # Both ends of the edge, and both ends of a parallel opposite edge
+        opposite = (j, j + 1 if j + 1 < n else 0) if turn == 0 else (j,)
+        for k in opposite:
+            c = hull[k]
+            for p, q in ((i, a), (i + 1 if i + 1 < n else 0, b)):
+                dist_sq = (q[0] - c[0]) ** 2 + (q[1] - c[1]) ** 2
+                if dist_sq > best[2]:
+                    best = (p, k, dist_sq)
+    return best
@@ -1,153 +1,516 @@
 import math
 import numpy as np
+from rotating_calipers.dispatch import use_scalar
+from rotating_calipers.engine import (CaliperSweep, SweepRecord, box_calipers, check_closed, cross, dot, start_calipers,
+                                      window_holds)
+from rotating_calipers.hull import check_offsets, clean_hull, convex_hull, convex_hulls, group_extreme, sweep_hull
+from rotating_calipers.instrument import timed
+from rotating_calipers.supports import edge_table, lookup_supports, opposite_pairs
 
 
-def next_point_idx(idx, points):
-    if idx == 0:
-        return points.shape[0] - 1
-    else:
-        return idx - 1
-
-
-def vector_angle(v1, v2):
-    return math.acos(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
-
+def compute_bounding_rectangle(points1, points2, compute_hull=False, stats=None, hint=None, span=None,
+                               watchdog=False):
+    # Both point sets are counter-clockwise convex hulls, or any point sets with compute_hull.
+    # stats is an optional rotating_calipers.instrument.SweepStats.
+    # hint=(calipers, angle) of a state recorded for similar hulls warm starts
+    # all eight calipers there, see diameter.compute_bounding_rectangle, as do
+    # the local search, the hull cleanup and the step bound (n1 + n2 + 2
+    # states) with watchdog.
+    with timed(stats, 'hull'):
+        points1 = sweep_hull(points1, compute_hull, watchdog)
+        points2 = sweep_hull(points2, compute_hull, watchdog)
+    if stats is not None:
+        stats.count_hulls(len(points1) + len(points2), 2)
 
-def rotate_vec(v, angle):
-    rotation_matrix = np.array([[np.cos(angle), -np.sin(angle)],
-                                [np.sin(angle), np.cos(angle)]])
-    return rotation_matrix @ v
+    for sweep in sweep_states(points1, points2, stats, hint, span, watchdog):
+        p21 = points1[sweep.calipers[1].idx]
+        p42 = points2[sweep.calipers[7].idx]
 
+        # Form the bounding box points by calculating the 4 intersections
+        rec1 = np.array(sweep.rectangle(0))
+        rec2 = np.array(sweep.rectangle(4))
 
-def line_intersection(v1, p1, v2, p2):
-    mat_1 = np.array([v1, -v2]).T
-    mat_2 = (p2 - p1)
-    result = np.linalg.inv(mat_1) @ mat_2
-    return result[0] * v1 + p1
-
+        yield (p21, p42), rec1, rec2  # return all the rectangles
 
-def compute_bounding_rectangle(points1, points2):
-    # Chose the extreme points along each axis
-    p1_idx1 = np.argmin(points1[:, 0])
-    p2_idx1 = np.argmin(points1[:, 1])
-    p3_idx1 = np.argmax(points1[:, 0])
-    p4_idx1 = np.argmax(points1[:, 1])
 
-    p1_idx2 = np.argmin(points2[:, 0])
-    p2_idx2 = np.argmin(points2[:, 1])
-    p3_idx2 = np.argmax(points2[:, 0])
-    p4_idx2 = np.argmax(points2[:, 1])
+def sweep_states(points1, points2, stats=None, hint=None, span=None, watchdog=False):
+    # The one sweep loop behind compute_bounding_rectangle and
+    # record_bounding_rectangle, over hulls from sweep_hull. Yields the sweep in
+    # every state, only valid until the next one.
 
-    # The box starts axis aligned
-    vec_1 = np.array([0, 1])
-    vec_2 = np.array([-1, 0])
-    vec_3 = np.array([0, -1])
-    vec_4 = np.array([1, 0])
+    # Chose the extreme points along each axis of both polygons, the boxes start
+    # axis aligned (or span radians before the hint). The bottom caliper of the
+    # first polygon and the top caliper of the second one drive the sweep.
+    calipers, direction, span = start_calipers([points1, points2], hint, span)
+    sweep = CaliperSweep(calipers, drivers=(1, 7), direction=direction, stats=stats)
+    caliper_21 = sweep.calipers[1]
+    caliper_42 = sweep.calipers[7]
 
-    angle = 0
     counter = 0
-    init_p2 = p2_idx1
-    init_p4 = p4_idx2
+    init_p2 = caliper_21.idx
+    init_p4 = caliper_42.idx
     flag = 0
-    while True:
-        if counter and (init_p2 == p2_idx1) and (init_p4 == p4_idx2):
+    bound = len(points1) + len(points2) + 2
+    best = -1.0
+    for _ in range(bound):
+        if counter and (init_p2 == caliper_21.idx) and (init_p4 == caliper_42.idx):
             flag = 1
-        p11 = points1[p1_idx1]
-        p21 = points1[p2_idx1]
-        p31 = points1[p3_idx1]
-        p41 = points1[p4_idx1]
-        
-        p12 = points2[p1_idx2]
-        p22 = points2[p2_idx2]
-        p32 = points2[p3_idx2]
-        p42 = points2[p4_idx2]
+        if span is not None:
+            p, q = caliper_21.point(), caliper_42.point()
+            best = max(best, (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2)
+        yield sweep
+
+        # rotate clockwise onto the nearest edge of either polygon
+        moved, _ = sweep.step()
 
-        # Form the bounding box points by calculating the 4 intersections
-        rec_p11 = line_intersection(vec_1, p11, vec_2, p21)
-        rec_p21 = line_intersection(vec_2, p21, vec_3, p31)
-        rec_p31 = line_intersection(vec_3, p31, vec_4, p41)
-        rec_p41 = line_intersection(vec_4, p41, vec_1, p11)
-
-        rec_p12 = line_intersection(vec_1, p12, vec_2, p22)
-        rec_p22 = line_intersection(vec_2, p22, vec_3, p32)
-        rec_p32 = line_intersection(vec_3, p32, vec_4, p42)
-        rec_p42 = line_intersection(vec_4, p42, vec_1, p12)
-
-        rec1 = np.stack([rec_p11, rec_p21, rec_p31, rec_p41])
-        rec2 = np.stack([rec_p12, rec_p22, rec_p32, rec_p42])
-
-        yield (p21, p42), rec1, rec2 # return all the rectangles
-
-        p11_next = points1[next_point_idx(p1_idx1, points1)]
-        p21_next = points1[next_point_idx(p2_idx1, points1)]
-        p31_next = points1[next_point_idx(p3_idx1, points1)]
-        p41_next = points1[next_point_idx(p4_idx1, points1)]
-
-        p12_next = points2[next_point_idx(p1_idx2, points2)]
-        p22_next = points2[next_point_idx(p2_idx2, points2)]
-        p32_next = points2[next_point_idx(p3_idx2, points2)]
-        p42_next = points2[next_point_idx(p4_idx2, points2)]
-
-        side_vec_11 = p11_next - p11
-        side_vec_21 = p21_next - p21
-        side_vec_31 = p31_next - p31
-        side_vec_41 = p41_next - p41
-
-        side_vec_12 = p12_next - p12
-        side_vec_22 = p22_next - p22
-        side_vec_32 = p32_next - p32
-        side_vec_42 = p42_next - p42
-
-        angle_11 = vector_angle(side_vec_11, vec_1)
-        angle_21 = vector_angle(side_vec_21, vec_2)
-        angle_31 = vector_angle(side_vec_31, vec_3)
-        angle_41 = vector_angle(side_vec_41, vec_4)
-
-        angle_12 = vector_angle(side_vec_12, vec_1)
-        angle_22 = vector_angle(side_vec_22, vec_2)
-        angle_32 = vector_angle(side_vec_32, vec_3)
-        angle_42 = vector_angle(side_vec_42, vec_4)
-
-        angles = [angle_21, angle_42]
-        min_angle_idx = np.argmin(angles)
-        min_angle = angles[min_angle_idx]
-
-        if min_angle_idx == 0:
-            p2_idx1 = next_point_idx(p2_idx1, points1)
-            if angle_11 < angle_21:
-                p1_idx1 = next_point_idx(p1_idx1, points1)
-            if angle_31 < angle_21:
-                p3_idx1 = next_point_idx(p3_idx1, points1)
-            if angle_41 < angle_21:
-                p4_idx1 = next_point_idx(p4_idx1, points1)
-            if angle_12 < angle_21:
-                p1_idx2 = next_point_idx(p1_idx2, points2)
-            if angle_22 < angle_21:
-                p2_idx2 = next_point_idx(p2_idx2, points2)
-            if angle_32 < angle_21:
-                p3_idx2 = next_point_idx(p3_idx2, points2)
-        elif min_angle_idx == 1:
-            p4_idx2 = next_point_idx(p4_idx2, points2)
-            if angle_12 < angle_42:
-                p1_idx2 = next_point_idx(p1_idx2, points2)
-            if angle_22 < angle_42:
-                p2_idx2 = next_point_idx(p2_idx2, points2)
-            if angle_32 < angle_42:
-                p3_idx2 = next_point_idx(p3_idx2, points2)
-            if angle_11 < angle_42:
-                p1_idx1 = next_point_idx(p1_idx1, points1)
-            if angle_31 < angle_42:
-                p3_idx1 = next_point_idx(p3_idx1, points1)
-            if angle_41 < angle_42:
-                p4_idx1 = next_point_idx(p4_idx1, points1)
-
-        # rotate clockwise by min_angle
-        vec_1 = rotate_vec(vec_1, -min_angle)
-        vec_2 = rotate_vec(vec_2, -min_angle)
-        vec_3 = rotate_vec(vec_3, -min_angle)
-        vec_4 = rotate_vec(vec_4, -min_angle)
-
-        angle = angle + min_angle
         counter += 1
-        if flag:
+        # Past a full turn every pair has been seen, see diameter
+        if flag or moved is None or sweep.turned_past(4):
             break
+        if span is not None and sweep.covered(4, span):
+            optimum = compute_max_distances(points1, [0, len(points1)], points2, [0, len(points2)])[1][0]
+            if window_holds(best, optimum ** 2):
+                break
+            # The farthest pair is outside the window, sweep the rest of the turn
+            span = None
+    else:
+        check_closed('maxdist', bound, (len(points1), len(points2)), watchdog)
+    if stats is not None:
+        stats.finish()
+
+
+def new_record(n1, n2):
+    # Buffers for every sweep over hulls of up to n1 and n2 vertices: a full turn
+    # walks each edge of both hulls once, plus the closing state
+    return SweepRecord(n1 + n2 + 2, 8, 2)
+
+
+def record_bounding_rectangle(points1, points2, out=None, compute_hull=False, stats=None, hint=None,
+                              span=None, watchdog=False):
+    # The states of compute_bounding_rectangle written into a SweepRecord (out,
+    # or a new one). Calipers 0-3 sit on the first polygon and 4-7 on the second,
+    # the pair is calipers[:, 1] on the first and calipers[:, 7] on the second.
+    with timed(stats, 'hull'):
+        points1 = sweep_hull(points1, compute_hull, watchdog)
+        points2 = sweep_hull(points2, compute_hull, watchdog)
+    if stats is not None:
+        stats.count_hulls(len(points1) + len(points2), 2)
+    if out is None:
+        out = new_record(len(points1), len(points2))
+    out.check(len(points1) + len(points2) + 2, 8, 2)
+    for sweep in sweep_states(points1, points2, stats, hint, span, watchdog):
+        out.append(sweep)
+    return out
+
+
+def compute_max_distances(coords1, offsets1, coords2, offsets2, compute_hull=False, stats=None):
+    # Maximum distance between hull k of the first set and hull k of the second
+    # for many pairs at once. Both sets are stored back to back with offsets (or
+    # are arbitrary point sets with compute_hull). Returns the farthest pair as
+    # indices into coords1 and coords2 (K, 2) and its length (K,).
+    coords1 = np.ascontiguousarray(coords1, dtype=np.float64)
+    coords2 = np.ascontiguousarray(coords2, dtype=np.float64)
+    offsets1 = np.asarray(offsets1, dtype=np.int64)
+    offsets2 = np.asarray(offsets2, dtype=np.int64)
+    check_offsets(coords1, offsets1)
+    check_offsets(coords2, offsets2)
+    vertices1 = np.arange(coords1.shape[0])
+    vertices2 = np.arange(coords2.shape[0])
+    if compute_hull:
+        with timed(stats, 'hull'):
+            vertices1, offsets1 = convex_hulls(coords1, offsets1)
+            vertices2, offsets2 = convex_hulls(coords2, offsets2)
+    hulls1 = coords1[vertices1]
+    hulls2 = coords2[vertices2]
+
+    with timed(stats, 'sweep'):
+        i, j, hull_ids = opposite_pairs(hulls1, offsets1, hulls2, offsets2)
+    with timed(stats, 'scoring'):
+        d = hulls1[i] - hulls2[j]
+        dist_sq = np.einsum('ij,ij->i', d, d)
+        pair_offsets = np.concatenate([[0], np.cumsum(np.bincount(hull_ids, minlength=offsets1.shape[0] - 1))])
+        best = group_extreme(dist_sq, hull_ids, pair_offsets, largest=True)
+    pairs = np.stack([vertices1[i[best]], vertices2[j[best]]], axis=1)
+    if stats is not None:
+        stats.steps += i.shape[0]
+        stats.count_hulls(hulls1.shape[0] + hulls2.shape[0], 2 * (offsets1.shape[0] - 1))
+        stats.finish()
+    return pairs, np.sqrt(dist_sq[best])
+
+
+def max_distance(points1, points2, compute_hull=False, stats=None):
+    # Farthest pair between two hulls as indices into points1 and points2 and
+    # its length. Repeated and collinear hull vertices are dropped first (see
+    # clean_hull). Small hulls run scalar_max_distance, larger ones the
+    # vectorized compute_max_distances; the crossover is
+    # SCALAR_MAX_VERTICES['maxdist'] in rotating_calipers.dispatch.
+    points1 = np.ascontiguousarray(points1, dtype=np.float64)
+    points2 = np.ascontiguousarray(points2, dtype=np.float64)
+    if points1.shape[0] == 0 or points2.shape[0] == 0:
+        raise ValueError('The maximum distance needs at least one point on either side')
+    with timed(stats, 'hull'):
+        vertices1 = convex_hull(points1) if compute_hull else clean_hull(points1)
+        vertices2 = convex_hull(points2) if compute_hull else clean_hull(points2)
+    hull1 = points1[vertices1]
+    hull2 = points2[vertices2]
+    if not use_scalar('maxdist', max(hull1.shape[0], hull2.shape[0])):
+        pairs, lengths = compute_max_distances(hull1, [0, hull1.shape[0]], hull2, [0, hull2.shape[0]], stats=stats)
+        return int(vertices1[pairs[0, 0]]), int(vertices2[pairs[0, 1]]), float(lengths[0])
+
+    with timed(stats, 'sweep'):
+        i, j, dist_sq = scalar_max_distance(hull1.tolist(), hull2.tolist())
+    if stats is not None:
+        stats.steps += hull1.shape[0] + hull2.shape[0]
+        stats.count_hulls(hull1.shape[0] + hull2.shape[0], 2)
+        stats.finish()
+    return int(vertices1[i]), int(vertices2[j]), math.sqrt(dist_sq)
+
+
+def scalar_max_distance(hull1, hull2):
+    # Farthest pair between two counter-clockwise hulls given as lists of (x, y)
+    # on plain floats. The vertices of P - Q are visited in angular order by
+    # merging the edges of P with the reversed edges of Q, both starting from
+    # the caliper pointing down, and the farthest one from the origin wins.
+    # Returns the two vertex indices and the squared length.
+    n = len(hull1)
+    m = len(hull2)
+    start1 = min(range(n), key=lambda k: (hull1[k][1], hull1[k][0]))
+    start2 = max(range(m), key=lambda k: (hull2[k][1], hull2[k][0]))
+    best = (0, 0, -1.0)
+    i = j = 0
+    while i < n or j < m:
+        a = hull1[(start1 + i) % n]
+        b = hull2[(start2 + j) % m]
+        dist_sq = (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2
+        if dist_sq > best[2]:
+            best = ((start1 + i) % n, (start2 + j) % m, dist_sq)
+        if i == n:
+            j += 1
+            continue
+        if j == m:
+            i += 1
+            continue
+        # Turn onto whichever edge comes first, both on parallel edges
+        a_next = hull1[(start1 + i + 1) % n]
+        b_next = hull2[(start2 + j + 1) % m]
+        turn = (a_next[0] - a[0]) * (b[1] - b_next[1]) - (a_next[1] - a[1]) * (b[0] - b_next[0])
+        if turn >= 0:
+            i += 1
+        if turn <= 0:
+            j += 1
+    return best
+
+
+def compute_min_distance(points1, points2, compute_hull=False, stats=None, overlap_only=False):
+    # Minimum distance between two convex polygons (counter-clockwise hulls, or
+    # any point sets with compute_hull) in one pass over both hulls. Returns
+    # (p, q, distance, features, overlap): the closest points p on the first
+    # polygon and q on the second, and the features they lie on as a pair of
+    # (a, b) vertex indices, the edge from vertex a to vertex b or a vertex when
+    # a == b. Polygons that intersect have distance 0 and overlap True; when one
+    # reaches into the other there is no closest pair and p, q and features are
+    # None. With overlap_only the sweep stops at the first edge that separates
+    # the polygons and only the overlap flag is returned.
+    #
+    # Two antiparallel calipers, one per polygon, walk the boundary of P - Q:
+    # its vertices are the differences of the vertices they touch. The polygons
+    # are apart when the origin lies outside P - Q, and their distance is the
+    # distance from the origin to its boundary.
+    points1 = np.asarray(points1, dtype=np.float64)
+    points2 = np.asarray(points2, dtype=np.float64)
+    # Repeated and collinear hull vertices are dropped first (see clean_hull),
+    # a zero-length edge has no direction to project on
+    with timed(stats, 'hull'):
+        vertices1 = convex_hull(points1) if compute_hull else clean_hull(points1)
+        vertices2 = convex_hull(points2) if compute_hull else clean_hull(points2)
+    hull1 = points1[vertices1].tolist()
+    hull2 = points2[vertices2].tolist()
+    if stats is not None:
+        stats.count_hulls(len(hull1) + len(hull2), 2)
+
+    # The bottom caliper of the first polygon and the top caliper of the second
+    # start on the lowest vertex of P - Q. A single point has no edge to turn onto.
+    calipers = [box_calipers(hull1)[1], box_calipers(hull2)[3]]
+    drivers = [k for k in (0, 1) if len(calipers[k].points) > 1]
+    sweep = CaliperSweep(calipers, drivers=drivers, stats=stats)
+
+    def corner():
+        p = calipers[0].point()
+        q = calipers[1].point()
+        return p[0] - q[0], p[1] - q[1]
+
+    w = corner()
+    i, j = calipers[0].idx, calipers[1].idx
+    best = (dot(w, w), (i, i), (j, j), hull1[i], hull2[j])
+    inside = bool(drivers)  # origin strictly inside every edge so far
+    hidden = False          # an edge facing away from the origin came first
+    facing = False          # walking the edges that face the origin
+    for _ in range(sum(len(calipers[k].points) for k in drivers)):
+        i, j = calipers[0].idx, calipers[1].idx
+        moved, _ = sweep.step()
+        w_next = corner()
+        e = (w_next[0] - w[0], w_next[1] - w[1])
+
+        # The walk is clockwise, P - Q lies to the right of every edge
+        side = cross(e, (-w[0], -w[1]))
+        if side > 0:
+            facing = True
+            if overlap_only:
+                break
+        else:
+            inside = inside and side < 0
+            # The edges facing the origin are consecutive and the closest point
+            # is on one of them, once past them the rest can be skipped
+            if facing and hidden:
+                break
+            hidden = hidden or not facing
+
+        t = min(max(-dot(w, e) / dot(e, e), 0.0), 1.0)
+        c = (w[0] + t * e[0], w[1] + t * e[1])
+        if dot(c, c) < best[0]:
+            if moved == 0:
+                a, b, hull = i, calipers[0].idx, hull1
+            else:
+                a, b, hull = j, calipers[1].idx, hull2
+            # The caliper walked from a back to b, so the edge runs from b to a
+            feature = (a, a) if t == 0 else (b, b) if t == 1 else (b, a)
+            point = [hull[a][0] + t * (hull[b][0] - hull[a][0]), hull[a][1] + t * (hull[b][1] - hull[a][1])]
+            if moved == 0:
+                best = (dot(c, c), feature, (j, j), point, hull2[j])
+            else:
+                best = (dot(c, c), (i, i), feature, hull1[i], point)
+        w = w_next
+    if stats is not None:
+        stats.finish()
+
+    overlap = not facing and (inside or best[0] == 0)
+    if overlap_only:
+        return overlap
+    if overlap and best[0] > 0:
+        return None, None, 0.0, None, True
+    features = (tuple(int(vertices1[k]) for k in best[1]), tuple(int(vertices2[k]) for k in best[2]))
+    return np.array(best[3]), np.array(best[4]), math.sqrt(best[0]), features, overlap
+
+
+def compute_min_distances(coords1, offsets1, coords2, offsets2, compute_hull=False, stats=None):
+    # Minimum distance between hull k of the first set and hull k of the second
+    # for many pairs at once, stored back to back with offsets as for
+    # compute_max_distances. Returns the closest points (K, 2, 2), the
+    # distances (K,), the features (K, 2, 2) as (a, b) vertex index pairs into
+    # coords1 and coords2 (see compute_min_distance) and the overlap flags (K,).
+    # Pairs where one polygon reaches into the other have nan points and -1
+    # features.
+    coords1 = np.ascontiguousarray(coords1, dtype=np.float64)
+    coords2 = np.ascontiguousarray(coords2, dtype=np.float64)
+    offsets1 = np.asarray(offsets1, dtype=np.int64)
+    offsets2 = np.asarray(offsets2, dtype=np.int64)
+    check_offsets(coords1, offsets1)
+    check_offsets(coords2, offsets2)
+    vertices1 = np.arange(coords1.shape[0])
+    vertices2 = np.arange(coords2.shape[0])
+    if compute_hull:
+        with timed(stats, 'hull'):
+            vertices1, offsets1 = convex_hulls(coords1, offsets1)
+            vertices2, offsets2 = convex_hulls(coords2, offsets2)
+    hulls1 = coords1[vertices1]
+    hulls2 = coords2[vertices2]
+    count = offsets1.shape[0] - 1
+
+    with timed(stats, 'sweep'):
+        # Every edge of P - Q is an edge of one polygon paired with the vertex
+        # of the other touching the antiparallel caliper. Taking both ends of
+        # parallel edges covers the edges of P - Q made of two parallel edges.
+        # Each segment runs from a0 - b0 to a1 - b1, counter-clockwise.
+        _, ids1, quadrants1, fractions1, order1, keys1 = edge_table(hulls1, offsets1)
+        _, ids2, quadrants2, fractions2, order2, keys2 = edge_table(hulls2, offsets2)
+        next1 = next_vertices(offsets1, ids1)
+        next2 = next_vertices(offsets2, ids2)
+        a0, a1, b0, b1, pair = [], [], [], [], []
+        for side in ('left', 'right'):
+            support2 = lookup_supports(order2, keys2, offsets2, ids1, (quadrants1 + 1) % 4, fractions1, side)
+            support1 = lookup_supports(order1, keys1, offsets1, ids2, (quadrants2 + 1) % 4, fractions2, side)
+            a0 += [np.arange(hulls1.shape[0]), support1]
+            a1 += [next1, support1]
+            b0 += [support2, np.arange(hulls2.shape[0])]
+            b1 += [support2, next2]
+            pair += [ids1, ids2]
+        a0, a1, b0, b1, pair = (np.concatenate(x) for x in (a0, a1, b0, b1, pair))
+
+    with timed(stats, 'scoring'):
+        w = hulls1[a0] - hulls2[b0]
+        e = (hulls1[a1] - hulls2[b1]) - w
+        length_sq = np.einsum('ij,ij->i', e, e)
+        nonzero = length_sq > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = np.where(nonzero, np.clip(-np.einsum('ij,ij->i', w, e) / length_sq, 0.0, 1.0), 0.0)
+        c = w + t[:, None] * e
+        dist_sq = np.einsum('ij,ij->i', c, c)
+
+        # Strictly inside P - Q when strictly left of every edge that has a length
+        side = e[:, 0] * w[:, 1] - e[:, 1] * w[:, 0]
+        outside_or_on = np.bincount(pair, weights=nonzero & (side >= 0), minlength=count)
+        inside = (outside_or_on == 0) & (np.bincount(pair, weights=nonzero, minlength=count) > 0)
+
+        order = np.argsort(pair, kind='stable')
+        pair_offsets = np.concatenate([[0], np.cumsum(np.bincount(pair, minlength=count))])
+        best = order[group_extreme(dist_sq[order], pair[order], pair_offsets)]
+        tb = t[best]
+        points = np.stack([hulls1[a0[best]] + tb[:, None] * (hulls1[a1[best]] - hulls1[a0[best]]),
+                           hulls2[b0[best]] + tb[:, None] * (hulls2[b1[best]] - hulls2[b0[best]])], axis=1)
+
+    features = np.empty((count, 2, 2), dtype=np.int64)
+    for k, (x0, x1, vertices) in enumerate(((a0, a1, vertices1), (b0, b1, vertices2))):
+        x0, x1 = vertices[x0[best]], vertices[x1[best]]
+        features[:, k, 0] = np.where(tb == 1, x1, x0)
+        features[:, k, 1] = np.where(tb == 0, x0, x1)
+    distances = np.sqrt(dist_sq[best])
+    overlap = inside | (distances == 0)
+    buried = overlap & (distances > 0)
+    points[buried] = np.nan
+    features[buried] = -1
+    distances[buried] = 0.0
+    if stats is not None:
+        stats.steps += pair.shape[0]
+        stats.count_hulls(hulls1.shape[0] + hulls2.shape[0], 2 * count)
+        stats.finish()
+    return points, distances, features, overlap
+
+
+def next_vertices(offsets, hull_ids):
+    # Index of the vertex after each vertex of its hull
+    local = np.arange(hull_ids.shape[0]) - offsets[hull_ids]
+    return offsets[hull_ids] + (local + 1) % np.diff(offsets)[hull_ids]
+
+
+# Evenly spaced directions the all-pairs bounds project the hulls on. Any
+# vector is within pi / BOUND_DIRECTIONS of one of them, so the bounds are
+# within a factor 1 / cos(pi / BOUND_DIRECTIONS) (0.5% for 32) of each other.
+BOUND_DIRECTIONS = 32
+
+# Rows of the (rows, K, BOUND_DIRECTIONS) bound blocks and hull pairs handed
+# to compute_max_distances at once
+BOUND_ELEMENTS = 1 << 22
+PAIR_CHUNK = 1 << 16
+
+
+def support_table(coords, offsets):
+    # Largest projection of every hull on each bound direction (K, D)
+    angles = np.arange(BOUND_DIRECTIONS) * (2 * np.pi / BOUND_DIRECTIONS)
+    directions = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    return np.maximum.reduceat(coords @ directions.T, offsets[:-1], axis=0)
+
+
+def distance_bounds(supports, rows):
+    # Lower and upper bounds on the maximum distance between hulls `rows` and
+    # every hull. The farthest pair is at least as far apart as the extent of
+    # the two hulls together along any bound direction, and at most that far
+    # divided by the cosine of half the spacing between the directions.
+    half = BOUND_DIRECTIONS // 2
+    opposite = np.roll(supports, half, axis=1)
+    lower = (supports[None, :, :] + opposite[rows][:, None, :]).max(axis=2)
+    return lower, lower / np.cos(np.pi / BOUND_DIRECTIONS)
+
+
+def hull_pair_distances(coords, offsets, first, second):
+    # Exact maximum distance between hulls first[p] and second[p] for every p,
+    # gathering the hull pairs back to back for compute_max_distances
+    sizes = np.diff(offsets)
+    lengths = np.empty(first.shape[0])
+    for start in range(0, first.shape[0], PAIR_CHUNK):
+        a = first[start:start + PAIR_CHUNK]
+        b = second[start:start + PAIR_CHUNK]
+        idx1, offsets1 = gather_hulls(offsets, sizes, a)
+        idx2, offsets2 = gather_hulls(offsets, sizes, b)
+        _, lengths[start:start + PAIR_CHUNK] = compute_max_distances(coords[idx1], offsets1, coords[idx2], offsets2)
+    return lengths
+
+
+def gather_hulls(offsets, sizes, hulls):
+    # Vertex indices of the given hulls back to back, and their offsets
+    counts = sizes[hulls]
+    gathered_offsets = np.concatenate([[0], np.cumsum(counts)])
+    idx = np.arange(gathered_offsets[-1]) + np.repeat(offsets[hulls] - gathered_offsets[:-1], counts)
+    return idx, gathered_offsets
+
+
+def prepare_hulls(coords, offsets, compute_hull):
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    check_offsets(coords, offsets)
+    if compute_hull:
+        vertices, offsets = convex_hulls(coords, offsets)
+        coords = coords[vertices]
+    return coords, offsets
+
+
+def max_distance_matrix(coords, offsets, compute_hull=False, rtol=0.0):
+    # Maximum distance between every pair of the K polygons stored back to back
+    # in coords (hull k spans offsets[k]:offsets[k + 1]), as a symmetric (K, K)
+    # matrix with each polygon's diameter on the diagonal. The default rtol=0
+    # prunes nothing, every pair gets an exact calipers pass. Only with rtol > 0
+    # pairs whose bounds already pin the distance down to that relative error
+    # are answered from the bounds (never above the true distance, at most a
+    # factor 1 + rtol below it) and skip the pass.
+    from diameter.diameter import compute_diameters
+    coords, offsets = prepare_hulls(coords, offsets, compute_hull)
+    count = offsets.shape[0] - 1
+    result = np.zeros((count, count))
+    result[np.diag_indices(count)] = compute_diameters(coords, offsets)[1]
+
+    first, second = np.triu_indices(count, 1)
+    if rtol > 0:
+        supports = support_table(coords, offsets)
+        decided = np.zeros(first.shape[0], dtype=bool)
+        rows = max(1, BOUND_ELEMENTS // (count * BOUND_DIRECTIONS))
+        for start in range(0, count, rows):
+            lower, upper = distance_bounds(supports, np.arange(start, min(start + rows, count)))
+            block = (first >= start) & (first < start + rows)
+            local_lower = lower[first[block] - start, second[block]]
+            local_upper = upper[first[block] - start, second[block]]
+            decided[block] = local_upper <= local_lower * (1 + rtol)
+            result[first[block], second[block]] = local_lower
+        first, second = first[~decided], second[~decided]
+
+    result[first, second] = hull_pair_distances(coords, offsets, first, second)
+    result.T[np.triu_indices(count, 1)] = result[np.triu_indices(count, 1)]
+    return result
+
+
+def farthest_partners(coords, offsets, k=1, compute_hull=False):
+    # The k polygons farthest from each polygon (by maximum distance), as
+    # indices (K, k) and distances (K, k), farthest first. Bounds from the
+    # hull extents along fixed directions rule out most pairs, only pairs whose
+    # upper bound reaches the k-th best lower bound of their row are measured.
+    coords, offsets = prepare_hulls(coords, offsets, compute_hull)
+    count = offsets.shape[0] - 1
+    k = min(k, count - 1)
+    if k < 1:
+        return np.zeros((count, 0), dtype=np.int64), np.zeros((count, 0))
+
+    supports = support_table(coords, offsets)
+    rows = max(1, BOUND_ELEMENTS // (count * BOUND_DIRECTIONS))
+    candidates = []
+    for start in range(0, count, rows):
+        block = np.arange(start, min(start + rows, count))
+        lower, upper = distance_bounds(supports, block)
+        lower[np.arange(block.shape[0]), block] = -np.inf
+        threshold = -np.partition(-lower, k - 1, axis=1)[:, k - 1]
+        i, j = np.nonzero(upper >= threshold[:, None])
+        keep = block[i] != j
+        candidates.append(np.stack([block[i[keep]], j[keep]], axis=1))
+    candidates = np.concatenate(candidates)
+
+    # Measure each unordered pair once
+    pairs = np.unique(np.sort(candidates, axis=1), axis=0)
+    lengths = hull_pair_distances(coords, offsets, pairs[:, 0], pairs[:, 1])
+    row = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    partner = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    lengths = np.concatenate([lengths, lengths])
+
+    # Candidates of each row, farthest first, of which the first k are kept.
+    # Pairs measured for the other row only can show up here as well.
+    order = np.lexsort((-lengths, row))
+    row, partner, lengths = row[order], partner[order], lengths[order]
+    starts = np.searchsorted(row, np.arange(count))
+    take = starts[:, None] + np.arange(k)
+    return partner[take], lengths[take]
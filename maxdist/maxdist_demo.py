@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 
 import matplotlib.pyplot as plt
-from scipy.spatial import ConvexHull
 from matplotlib import pyplot
 import numpy as np
-from maxdist import compute_bounding_rectangle
 import math
+import os
 import sys
 
+# The shared rotating_calipers package lives in the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from maxdist import compute_bounding_rectangle
+from rotating_calipers.hull import convex_hull
+
 
 class RotatingCalipersDemo:
     points = None
@@ -39,7 +43,8 @@ class RotatingCalipersDemo:
         self.fig.canvas.mpl_connect('button_press_event', self.on_click)
         self.fig.canvas.mpl_connect('key_press_event', self.on_press)
 
-        self.points = np.empty(shape=(0, 2), dtype=np.float64)
+        # Clicked points, made into an array once enter is pressed
+        self.points = []
         self.fig.canvas.draw()
 
     def on_click(self, event):
@@ -56,7 +61,7 @@ class RotatingCalipersDemo:
             plt.plot(event.xdata, event.ydata, 'o', color = 'blue')
         elif self.count == 1:
             plt.plot(event.xdata, event.ydata, 'o', color = 'green')
-        self.points = np.append(self.points, np.array([[event.xdata, event.ydata]]), axis=0)
+        self.points.append((event.xdata, event.ydata))
 
         self.fig.canvas.draw()
 
@@ -64,24 +69,25 @@ class RotatingCalipersDemo:
         print('Pressed', event.key)
         sys.stdout.flush()
         if event.key == 'enter':
-            if self.points.shape[0] < 3:
+            if len(self.points) < 3:
                 print('Not enough points provided')
                 return
 
-            hull = ConvexHull(self.points)
+            points = np.array(self.points, dtype=np.float64)
+            vertices = convex_hull(points)
             if self.count == 0:
-                self.hull_points1 = self.points[hull.vertices, :]
+                self.hull_points1 = points[vertices, :]
             elif self.count == 1:
-                self.hull_points2 = self.points[hull.vertices, :]
+                self.hull_points2 = points[vertices, :]
 
-            if hull.vertices.shape[0] < 3:
+            if vertices.shape[0] < 3:
                 print('Not enough vertices on the convex hull')
                 return
 
             #self.running_state = 'executing'
 
-            draw_hull(hull, self.points, self.count)
-            self.points = np.empty(shape=(0, 2), dtype=np.float64)
+            draw_hull(vertices, points, self.count)
+            self.points = []
             self.count += 1
 
             self.fig.canvas.draw()
@@ -147,14 +153,14 @@ def compute_dist(pts):
     return ((p1x - p2x)**2 + (p1y - p2y)**2)**0.5
 
 
-def draw_hull(hull, points, cnt):
+def draw_hull(vertices, points, cnt):
     if not cnt:
         col = 'blue'
     else:
         col = 'green'
-    for hull_idx in range(0, hull.vertices.shape[0]):
-        point_idx = hull.vertices[hull_idx]
-        point_idx_next = hull.vertices[(hull_idx + 1) % hull.vertices.shape[0]]
+    for hull_idx in range(0, vertices.shape[0]):
+        point_idx = vertices[hull_idx]
+        point_idx_next = vertices[(hull_idx + 1) % vertices.shape[0]]
         plt.plot(points[[point_idx, point_idx_next], 0],
                  points[[point_idx, point_idx_next], 1],
                  '-', color=col)
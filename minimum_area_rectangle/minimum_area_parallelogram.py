@@ -0,0 +1,113 @@
+import numpy as np
+from rotating_calipers.engine import cross, line_intersection
+from rotating_calipers.hull import clean_hull, convex_hull
+from rotating_calipers.instrument import timed
+
+# Minimum area parallelogram enclosing a convex polygon. A parallelogram is the
+# intersection of two strips, and the smallest one has both strips flush with a
+# hull edge (Schwarz, Teich, Vainshtein, Welzl and Evans 1995). With H[k] twice
+# the area of the triangle between edge k and the vertex farthest from it, the
+# strips on edges i and j enclose H[i] * H[j] / cross(e_i, e_j), and for a
+# fixed i that is unimodal over the edges j turned less than half a turn from
+# it. So one caliper walks the edges i while a second one follows with j, both
+# only moving forward.
+
+
+# Vertices where the hull turns by less than this are dropped (see clean_hull),
+# so that neighbouring edges are never parallel up to rounding
+FLAT_TOL = 1e-12
+
+
+def edge_heights(hull):
+    # H[k] and the vertex farthest from edge k, a caliper that only moves forward
+    n = len(hull)
+    heights = []
+    tops = []
+    top = 1
+    for k in range(n):
+        a = hull[k]
+        b = hull[k + 1 if k + 1 < n else 0]
+        e = (b[0] - a[0], b[1] - a[1])
+        for _ in range(n):
+            p = hull[top]
+            q = hull[top + 1 if top + 1 < n else 0]
+            if cross(e, (q[0] - p[0], q[1] - p[1])) <= 0:
+                break
+            top = top + 1 if top + 1 < n else 0
+        t = hull[top]
+        heights.append(cross(e, (t[0] - a[0], t[1] - a[1])))
+        tops.append(top)
+    return heights, tops
+
+
+def scalar_min_parallelogram(hull):
+    # Edges i and j of the smallest parallelogram of a counter-clockwise hull
+    # of at least three vertices (a list of (x, y)) on plain floats, with its
+    # area and the vertices farthest from both edges
+    n = len(hull)
+    heights, tops = edge_heights(hull)
+    edges = []
+    for k in range(n):
+        a = hull[k]
+        b = hull[k + 1 if k + 1 < n else 0]
+        edges.append((b[0] - a[0], b[1] - a[1]))
+
+    best = None
+    j = 1  # counts on past n instead of wrapping, edge j % n
+    for i in range(n):
+        e = edges[i]
+        j = max(j, i + 1)
+        turn = cross(e, edges[j % n])
+        # Move on while the next edge is still less than half a turn ahead and
+        # gives a parallelogram at least as small
+        while j + 1 < i + n:
+            next_turn = cross(e, edges[(j + 1) % n])
+            if next_turn <= 0 or heights[(j + 1) % n] * turn > heights[j % n] * next_turn:
+                break
+            j += 1
+            turn = next_turn
+        area = heights[i] * heights[j % n] / turn
+        if best is None or area < best[0]:
+            best = (area, i, j % n)
+    area, i, j = best
+    return i, j, area, tops[i], tops[j]
+
+
+def parallelogram_corners(hull, i, j, top_i, top_j):
+    # Corners where the lines of both strips meet, counter-clockwise
+    n = len(hull)
+    lines = []
+    for k, top in ((i, top_i), (j, top_j)):
+        a = hull[k]
+        b = hull[k + 1 if k + 1 < n else 0]
+        lines.append(((b[0] - a[0], b[1] - a[1]), a, hull[top]))
+    (u, u0, u1), (v, v0, v1) = lines
+    corners = [line_intersection(u, u0, v, v0), line_intersection(u, u0, v, v1),
+               line_intersection(u, u1, v, v1), line_intersection(u, u1, v, v0)]
+    if cross((corners[1][0] - corners[0][0], corners[1][1] - corners[0][1]),
+             (corners[2][0] - corners[1][0], corners[2][1] - corners[1][1])) < 0:
+        corners.reverse()
+    return corners
+
+
+def min_area_parallelogram(points, compute_hull=False, stats=None):
+    # Smallest parallelogram enclosing a counter-clockwise hull (or the hull of
+    # points with compute_hull): its corners (4, 2) counter-clockwise, its area
+    # and the index in points of the vertex where each of the two hull edges
+    # its sides are flush with starts.
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    with timed(stats, 'hull'):
+        vertices = convex_hull(points) if compute_hull else np.arange(points.shape[0])
+        vertices = vertices[clean_hull(points[vertices], FLAT_TOL)]
+    hull = points[vertices].tolist()
+    if len(hull) < 3:
+        raise ValueError('A parallelogram needs a hull of at least three vertices')
+    with timed(stats, 'sweep'):
+        i, j, area, top_i, top_j = scalar_min_parallelogram(hull)
+    with timed(stats, 'scoring'):
+        corners = parallelogram_corners(hull, i, j, top_i, top_j)
+    if stats is not None:
+        stats.steps += 2 * len(hull)
+        stats.count_hulls(len(hull))
+        stats.finish()
+    return np.array(corners), area, (int(vertices[i]), int(vertices[j]))
@@ -1,93 +1,286 @@
 import math
 import numpy as np
+from rotating_calipers.dispatch import use_scalar
+from rotating_calipers.engine import CaliperSweep, SweepRecord, check_closed, start_calipers, window_holds
+from rotating_calipers.hull import check_offsets, clean_hull, convex_hull, convex_hulls, sweep_hull
+from rotating_calipers.instrument import timed
+from rotating_calipers.supports import edge_supports
 
 
-def next_point_idx(idx, points):
-    if idx == 0:
-        return points.shape[0] - 1
+def compute_bounding_rectangle(points, compute_hull=False, stats=None, hint=None, span=None, watchdog=False):
+    # points is a counter-clockwise convex hull, or any point set with compute_hull.
+    # Repeated and collinear hull vertices are dropped first (see clean_hull).
+    # stats is an optional rotating_calipers.instrument.SweepStats.
+    # hint=(calipers, angle) of a state recorded for a similar hull (a row of
+    # SweepRecord.calipers and .angles, e.g. the best rectangle of the previous
+    # frame) starts the box there instead of axis aligned and only looks span
+    # radians (engine.WARM_SPAN by default) either side of the hint. When the
+    # best box in there is not the optimum, the sweep goes on through the rest
+    # of the 90 degrees, so it always finds the same optimum as a cold sweep.
+    # The sweep stops after at most n + 1 rectangles; with watchdog a sweep that
+    # has not turned far enough by then raises SweepError.
+    with timed(stats, 'hull'):
+        points = sweep_hull(points, compute_hull, watchdog)
+    if stats is not None:
+        stats.count_hulls(len(points))
+
+    for sweep in sweep_states(points, stats, hint, span, watchdog):
+        # Form the bounding box points by calculating the 4 intersections
+        yield np.array(sweep.rectangle())  # return all the rectangles
+
+
+def sweep_states(points, stats=None, hint=None, span=None, watchdog=False):
+    # The one sweep loop behind compute_bounding_rectangle and
+    # record_bounding_rectangles, over a hull from sweep_hull. Yields the sweep
+    # in every state, only valid until the next one.
+
+    # The box starts axis aligned on the extreme points along each axis, or
+    # span radians before the hint
+    calipers, direction, span = start_calipers([points], hint, span)
+    sweep = CaliperSweep(calipers, direction=direction, stats=stats)
+
+    best = math.inf
+    for _ in range(len(points) + 1):
+        if sweep.covered(1, span):  # Rotate up to 90 degrees
+            if span is None or window_holds(best, compute_bounding_rectangles(points, [0, len(points)])[1][0]):
+                break
+            # The optimum is outside the window, sweep the rest of the range
+            span = None
+            if sweep.covered(1):
+                break
+        if span is not None:
+            best = min(best, box_area(sweep.corners(0)))
+        yield sweep
+
+        # rotate clockwise onto the nearest hull edge
+        moved, _ = sweep.step()
+        if moved is None:
+            break
     else:
-        return idx - 1
+        if not sweep.covered(1, span):
+            check_closed('minimum area rectangle', len(points) + 1, len(points), watchdog)
+    if stats is not None:
+        stats.finish()
 
 
-def vector_angle(v1, v2):
-    return math.acos(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
+def box_area(corners):
+    (x0, y0), (x1, y1), (x2, y2) = corners[:3]
+    return math.hypot(x1 - x0, y1 - y0) * math.hypot(x2 - x1, y2 - y1)
 
 
-def rotate_vec(v, angle):
-    rotation_matrix = np.array([[np.cos(angle), -np.sin(angle)],
-                                [np.sin(angle), np.cos(angle)]])
-    return rotation_matrix @ v
+def new_record(n):
+    # Buffers for every sweep over hulls of up to n vertices: each step walks one
+    # hull edge and an edge is walked by at most one caliper within 90 degrees
+    return SweepRecord(n + 1, 4, 1)
 
 
-def line_intersection(v1, p1, v2, p2):
-    mat_1 = np.array([v1, -v2]).T
-    mat_2 = (p2 - p1)
-    result = np.linalg.inv(mat_1) @ mat_2
-    return result[0] * v1 + p1
+def record_bounding_rectangles(points, out=None, compute_hull=False, stats=None, hint=None, span=None,
+                               watchdog=False):
+    # The candidates of compute_bounding_rectangle written into a SweepRecord
+    # (out, or a new one) instead of being yielded one by one. Caliper indices
+    # refer to the hull the sweep ran on (points itself for a clean hull).
+    with timed(stats, 'hull'):
+        points = sweep_hull(points, compute_hull, watchdog)
+    if stats is not None:
+        stats.count_hulls(len(points))
+    if out is None:
+        out = new_record(len(points))
+    out.check(len(points) + 1, 4, 1)
+    for sweep in sweep_states(points, stats, hint, span, watchdog):
+        out.append(sweep)
+    return out
 
 
-def compute_bounding_rectangle(points):
-    # Chose the extreme points along each axis
-    p1_idx = np.argmin(points[:, 0])
-    p2_idx = np.argmin(points[:, 1])
-    p3_idx = np.argmax(points[:, 0])
-    p4_idx = np.argmax(points[:, 1])
+def score_edges(coords, offsets, stats=None):
+    # Area of the rectangle flush with every hull edge, using one support lookup
+    # per caliper and no intermediate rectangles
+    with timed(stats, 'sweep'):
+        edges, hull_ids, (far, top, near) = edge_supports(coords, offsets, (0, 1, 2))
+    if stats is not None:
+        stats.steps += edges.shape[0]
+        stats.count_hulls(coords.shape[0], offsets.shape[0] - 1)
+    with timed(stats, 'scoring'):
+        areas = edge_areas(coords, edges, far, top, near)
+    return areas, edges, hull_ids, (far, top, near)
 
-    # The box starts axis aligned
-    vec_1 = np.array([0, 1])
-    vec_2 = np.array([-1, 0])
-    vec_3 = np.array([0, -1])
-    vec_4 = np.array([1, 0])
 
-    angle = 0
-    while angle <= math.pi / 2:  # Rotate up to 90 degrees
-        p1 = points[p1_idx]
-        p2 = points[p2_idx]
-        p3 = points[p3_idx]
-        p4 = points[p4_idx]
+def edge_areas(coords, edges, far, top, near):
+    normals = np.stack([-edges[:, 1], edges[:, 0]], axis=1)
+    length_sq = np.einsum('ij,ij->i', edges, edges)
+    width = np.einsum('ij,ij->i', coords[far] - coords[near], edges)
+    height = np.einsum('ij,ij->i', coords[top] - coords, normals)
+    # A zero-length edge (a repeated vertex) has no direction and never wins
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(length_sq > 0, width * height / length_sq, np.inf)
 
-        # Form the bounding box points by calculating the 4 intersections
-        rec_p1 = line_intersection(vec_1, p1, vec_2, p2)
-        rec_p2 = line_intersection(vec_2, p2, vec_3, p3)
-        rec_p3 = line_intersection(vec_3, p3, vec_4, p4)
-        rec_p4 = line_intersection(vec_4, p4, vec_1, p1)
-
-        result = np.stack([rec_p1, rec_p2, rec_p3, rec_p4])
-
-        yield result  # return all the rectangles
-
-        p1_next = points[next_point_idx(p1_idx, points)]
-        p2_next = points[next_point_idx(p2_idx, points)]
-        p3_next = points[next_point_idx(p3_idx, points)]
-        p4_next = points[next_point_idx(p4_idx, points)]
-
-        side_vec_1 = p1_next - p1
-        side_vec_2 = p2_next - p2
-        side_vec_3 = p3_next - p3
-        side_vec_4 = p4_next - p4
-
-        angle_1 = vector_angle(side_vec_1, vec_1)
-        angle_2 = vector_angle(side_vec_2, vec_2)
-        angle_3 = vector_angle(side_vec_3, vec_3)
-        angle_4 = vector_angle(side_vec_4, vec_4)
-
-        angles = [angle_1, angle_2, angle_3, angle_4]
-        min_angle_idx = np.argmin(angles)
-        min_angle = angles[min_angle_idx]
-
-        if min_angle_idx == 0:
-            p1_idx = next_point_idx(p1_idx, points)
-        elif min_angle_idx == 1:
-            p2_idx = next_point_idx(p2_idx, points)
-        elif min_angle_idx == 2:
-            p3_idx = next_point_idx(p3_idx, points)
-        elif min_angle_idx == 3:
-            p4_idx = next_point_idx(p4_idx, points)
-
-        # rotate clockwise by min_angle
-        vec_1 = rotate_vec(vec_1, -min_angle)
-        vec_2 = rotate_vec(vec_2, -min_angle)
-        vec_3 = rotate_vec(vec_3, -min_angle)
-        vec_4 = rotate_vec(vec_4, -min_angle)
-
-        angle = angle + min_angle
+
+def point_areas(areas):
+    # Only a hull collapsed onto a single point has nothing but zero-length
+    # edges, and its box is that point
+    return np.where(np.isinf(areas), 0.0, areas)
+
+
+def rectangle_from_edge(coords, edges, edge_idx, far, top, near):
+    # Rebuild the rectangles flush with the given edges. Corners come out in the
+    # same order as the sweep: rec_p1 joins the left and bottom calipers.
+    edge = edges[edge_idx]
+    angle = np.mod(-np.arctan2(edge[:, 1], edge[:, 0]), math.pi / 2)
+
+    # Axes of the rotated caliper frame, vec_1 points "up" and vec_4 "right"
+    vec_1 = np.stack([np.sin(angle), np.cos(angle)], axis=1)
+    vec_4 = np.stack([vec_1[:, 1], -vec_1[:, 0]], axis=1)
+
+    touching = np.stack([coords[edge_idx], coords[far[edge_idx]],
+                         coords[top[edge_idx]], coords[near[edge_idx]]], axis=1)
+    up = np.einsum('kij,kj->ki', touching, vec_1)
+    right = np.einsum('kij,kj->ki', touching, vec_4)
+    lo_u, hi_u = up.min(axis=1)[:, None], up.max(axis=1)[:, None]
+    lo_r, hi_r = right.min(axis=1)[:, None], right.max(axis=1)[:, None]
+
+    rects = np.stack([lo_r * vec_4 + lo_u * vec_1,
+                      hi_r * vec_4 + lo_u * vec_1,
+                      hi_r * vec_4 + hi_u * vec_1,
+                      lo_r * vec_4 + hi_u * vec_1], axis=1)
+    return rects, angle
+
+
+def compute_bounding_rectangles(coords, offsets, compute_hull=False, stats=None):
+    # Minimum area rectangle of many hulls at once. `coords` holds every hull back
+    # to back and `offsets` has one more entry than there are hulls. With
+    # compute_hull they can be arbitrary point sets instead.
+    # Returns the rectangles (K, 4, 2), their areas (K,) and angles (K,).
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    check_offsets(coords, offsets)
+    if compute_hull:
+        with timed(stats, 'hull'):
+            vertices, offsets = convex_hulls(coords, offsets)
+            coords = coords[vertices]
+    areas, edges, hull_ids, supports = score_edges(coords, offsets, stats)
+
+    # Best edge of each hull: group by hull, smallest area first
+    with timed(stats, 'scoring'):
+        order = np.lexsort((areas, hull_ids))
+        best = order[offsets[:-1]]
+        rects, angles = rectangle_from_edge(coords, edges, best, *supports)
+    if stats is not None:
+        stats.finish()
+    return rects, point_areas(areas[best]), angles
+
+
+def min_area_rectangle(points, compute_hull=False, stats=None):
+    # Only the optimum of compute_bounding_rectangle: the rectangle, its area,
+    # its angle and the index in points of the vertex where the hull edge it is
+    # flush with starts. Small hulls run scalar_min_area, larger ones the
+    # vectorized score_edges; the crossover is
+    # SCALAR_MAX_VERTICES['min_area_rectangle'] in rotating_calipers.dispatch.
+    # Repeated and collinear hull vertices are dropped first, as in
+    # compute_bounding_rectangle.
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    if points.shape[0] == 0:
+        raise ValueError('A rectangle needs at least one point')
+    with timed(stats, 'hull'):
+        vertices = convex_hull(points) if compute_hull else clean_hull(points)
+    hull = points[vertices]
+    n = hull.shape[0]
+    if n >= 3 and use_scalar('min_area_rectangle', n):
+        points = hull.tolist()
+        with timed(stats, 'sweep'):
+            best, numerator, length_sq, far, top, near = scalar_min_area(points)
+            area = numerator / length_sq
+        with timed(stats, 'scoring'):
+            rect, angle = scalar_rectangle(points, best, far, top, near)
+        if stats is not None:
+            stats.steps += n
+            stats.count_hulls(n)
+            stats.finish()
+        return np.array(rect), area, angle, int(vertices[best])
+
+    areas, edges, _, supports = score_edges(hull, np.array([0, n]), stats)
+    with timed(stats, 'scoring'):
+        best = int(np.argmin(areas))
+        rects, angles = rectangle_from_edge(hull, edges, np.array([best]), *supports)
+    if stats is not None:
+        stats.finish()
+    return rects[0], point_areas(areas[best:best + 1])[0], angles[0], int(vertices[best])
+
+
+def scalar_min_area(hull, exact=False):
+    # Smallest rectangle flush with an edge of a counter-clockwise hull of at
+    # least three vertices, given as a list of (x, y), on plain floats. The
+    # vertices touching the far, top and near calipers only move forward as
+    # the edge does. Returns the edge, its area as numerator / denominator (so
+    # integer hulls stay exact) and the three support vertices. exact compares
+    # the areas without dividing, for integer hulls (rotating_calipers.lattice).
+    # Zero-length edges are skipped, as in the vectorized edge_areas, and a hull
+    # collapsed onto a single point gives None.
+    n = len(hull)
+    # Only the last of repeated vertices starts a real edge. Running on those
+    # also keeps the calipers from stalling on a repeat.
+    distinct = [k for k in range(n) if hull[k][0] != hull[(k + 1) % n][0] or hull[k][1] != hull[(k + 1) % n][1]]
+    if not distinct:
+        return None
+    if len(distinct) < n:
+        k, numerator, length_sq, far, top, near = scalar_min_area([hull[k] for k in distinct], exact)
+        return distinct[k], numerator, length_sq, distinct[far], distinct[top], distinct[near]
+    far = top = near = 1
+    best = None
+    for k in range(n):
+        a = hull[k]
+        b = hull[k + 1 if k + 1 < n else 0]
+        ex = b[0] - a[0]
+        ey = b[1] - a[1]
+        # Farthest along the edge, farthest from it and farthest back along it
+        for _ in range(n):
+            p = hull[far]
+            q = hull[far + 1 if far + 1 < n else 0]
+            if ex * (q[0] - p[0]) + ey * (q[1] - p[1]) <= 0:
+                break
+            far = far + 1 if far + 1 < n else 0
+        if k == 0:
+            top = far
+        for _ in range(n):
+            p = hull[top]
+            q = hull[top + 1 if top + 1 < n else 0]
+            if ex * (q[1] - p[1]) - ey * (q[0] - p[0]) <= 0:
+                break
+            top = top + 1 if top + 1 < n else 0
+        if k == 0:
+            near = top
+        for _ in range(n):
+            p = hull[near]
+            q = hull[near + 1 if near + 1 < n else 0]
+            if ex * (q[0] - p[0]) + ey * (q[1] - p[1]) >= 0:
+                break
+            near = near + 1 if near + 1 < n else 0
+
+        f, t, r = hull[far], hull[top], hull[near]
+        width = (f[0] - r[0]) * ex + (f[1] - r[1]) * ey
+        height = ex * (t[1] - a[1]) - ey * (t[0] - a[0])
+        numerator = width * height
+        length_sq = ex * ex + ey * ey
+        if best is None:
+            better = True
+        elif exact:
+            better = numerator * best[2] < best[1] * length_sq
+        else:
+            better = numerator / length_sq < best[1] / best[2]
+        if better:
+            best = (k, numerator, length_sq, far, top, near)
+    return best
+
+
+def scalar_rectangle(hull, k, far, top, near):
+    # rectangle_from_edge for a single edge on plain floats
+    a = hull[k]
+    b = hull[k + 1 if k + 1 < len(hull) else 0]
+    angle = (-math.atan2(b[1] - a[1], b[0] - a[0])) % (math.pi / 2)
+    ux, uy = math.sin(angle), math.cos(angle)
+    rx, ry = uy, -ux
+    touching = (a, hull[far], hull[top], hull[near])
+    up = [p[0] * ux + p[1] * uy for p in touching]
+    right = [p[0] * rx + p[1] * ry for p in touching]
+    lo_u, hi_u = min(up), max(up)
+    lo_r, hi_r = min(right), max(right)
+    rect = [(r * rx + u * ux, r * ry + u * uy) for r, u in ((lo_r, lo_u), (hi_r, lo_u), (hi_r, hi_u), (lo_r, hi_u))]
+    return rect, angle
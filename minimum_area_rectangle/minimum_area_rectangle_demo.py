@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 
 import matplotlib.pyplot as plt
-from scipy.spatial import ConvexHull
 from matplotlib import pyplot
 import numpy as np
-from minimum_area_rectangle import compute_bounding_rectangle
 import math
+import os
 import sys
 
+# The shared rotating_calipers package lives in the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from minimum_area_rectangle import compute_bounding_rectangle
+from rotating_calipers.hull import convex_hull
+
 
 class RotatingCalipersDemo:
     points = None
@@ -38,7 +42,8 @@ class RotatingCalipersDemo:
         self.fig.canvas.mpl_connect('button_press_event', self.on_click)
         self.fig.canvas.mpl_connect('key_press_event', self.on_press)
 
-        self.points = np.empty(shape=(0, 2), dtype=np.float64)
+        # Clicked points, made into an array once enter is pressed
+        self.points = []
         self.fig.canvas.draw()
 
     def on_click(self, event):
@@ -53,7 +58,7 @@ class RotatingCalipersDemo:
             return
 
         plt.plot(event.xdata, event.ydata, 'o')
-        self.points = np.append(self.points, np.array([[event.xdata, event.ydata]]), axis=0)
+        self.points.append((event.xdata, event.ydata))
 
         self.fig.canvas.draw()
 
@@ -61,20 +66,21 @@ class RotatingCalipersDemo:
         print('Pressed', event.key)
         sys.stdout.flush()
         if event.key == 'enter':
-            if self.points.shape[0] < 3:
+            if len(self.points) < 3:
                 print('Not enough points provided')
                 return
 
-            hull = ConvexHull(self.points)
-            hull_points = self.points[hull.vertices, :]
+            points = np.array(self.points, dtype=np.float64)
+            vertices = convex_hull(points)
+            hull_points = points[vertices, :]
 
-            if hull.vertices.shape[0] < 3:
+            if vertices.shape[0] < 3:
                 print('Not enough vertices on the convex hull')
                 return
 
             self.running_state = 'executing'
 
-            draw_hull(hull, self.points)
+            draw_hull(vertices, points)
 
             self.fig.canvas.draw()
 
@@ -120,10 +126,10 @@ def compute_area_of_rect(rect):
     return area
 
 
-def draw_hull(hull, points):
-    for hull_idx in range(0, hull.vertices.shape[0]):
-        point_idx = hull.vertices[hull_idx]
-        point_idx_next = hull.vertices[(hull_idx + 1) % hull.vertices.shape[0]]
+def draw_hull(vertices, points):
+    for hull_idx in range(0, vertices.shape[0]):
+        point_idx = vertices[hull_idx]
+        point_idx_next = vertices[(hull_idx + 1) % vertices.shape[0]]
         plt.plot(points[[point_idx, point_idx_next], 0],
                  points[[point_idx, point_idx_next], 1],
                  '-', color='magenta')
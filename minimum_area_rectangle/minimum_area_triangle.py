@@ -0,0 +1,243 @@
+import math
+import numpy as np
+from rotating_calipers.engine import cross
+from rotating_calipers.hull import clean_hull, convex_hull
+from rotating_calipers.instrument import timed
+
+# Minimum area triangle enclosing a convex polygon. The smallest triangle has a
+# side flush with a hull edge and the midpoint of every side touches the hull
+# (O'Rourke, Aggarwal, Maddila and Baldwin 1986). With side C flush with edge c
+# the other two sides touch the hull at the same height y, half the height of
+# the apex, so the triangle has twice the width w(y) of the hull at that height
+# as base and 2y as height. Its area 2y w(y) only has one point y where the
+# tangents at both touching points can meet at the apex (where the derivative
+# of the area, w + y w', changes sign), so each edge c has one candidate.
+#
+# Every edge is handled in its own frame, x along the edge and y away from it,
+# both scaled by the edge length so no square roots are needed. The right chain
+# runs up from the end of edge c to the top of the hull, the left chain back
+# down to its start. The touching points are searched for from where they were
+# for the previous edge; they move forward with the edge like any caliper, so
+# the whole sweep is linear in practice (and never worse than O(n log n)).
+
+
+# Vertices where the hull turns by less than this are dropped (see clean_hull).
+# The sides are solved for where hull edges meet, and a vertex that is only off
+# the line through its neighbours by rounding makes those divisions blow up.
+FLAT_TOL = 1e-12
+
+
+def first_false(test, lo, hi, start):
+    # Smallest k in lo..hi where test(k) is False (hi + 1 if there is none) for
+    # a test that is True up to some k and False from there on. The search
+    # gallops out from start, so a boundary d away costs O(log d) tests.
+    start = min(max(start, lo), hi)
+    if test(start):
+        known, step = start, 1
+        while known + step <= hi and test(known + step):
+            known += step
+            step *= 2
+        low, high = known + 1, min(known + step, hi + 1)
+    else:
+        known, step = start, 1
+        while known - step >= lo and not test(known - step):
+            known -= step
+            step *= 2
+        low, high = max(known - step + 1, lo), known
+    while low < high:
+        mid = (low + high) // 2
+        if test(mid):
+            low = mid + 1
+        else:
+            high = mid
+    return low
+
+
+class EdgeFrame:
+    # The hull seen from edge c. Vertex indices count on past n instead of
+    # wrapping: the right chain is c + 1..top, the left chain high..c + n.
+    def __init__(self, hull, c, top):
+        self.hull = hull
+        self.n = len(hull)
+        self.origin = hull[c]
+        b = hull[(c + 1) % self.n]
+        self.e = (b[0] - self.origin[0], b[1] - self.origin[1])
+        self.c = c
+        while self.y(top + 1) > self.y(top):
+            top += 1
+        self.top = top
+        # The left chain starts at the other end of a top edge parallel to c
+        self.high = top + 1 if self.y(top + 1) == self.y(top) else top
+
+    def x(self, k):
+        p = self.hull[k % self.n]
+        return self.e[0] * (p[0] - self.origin[0]) + self.e[1] * (p[1] - self.origin[1])
+
+    def y(self, k):
+        p = self.hull[k % self.n]
+        return cross(self.e, (p[0] - self.origin[0], p[1] - self.origin[1]))
+
+    def slope(self, k, m):
+        # dx / dy along the edge between vertices k and m
+        return (self.x(m) - self.x(k)) / (self.y(m) - self.y(k))
+
+    def right(self, k):
+        # Right boundary at vertex k: x and the slopes of the tangents there,
+        # from the edge above (the flattest) to the edge below
+        above = -math.inf if k == self.top else self.slope(k, k + 1)
+        below = math.inf if k == self.c + 1 else self.slope(k - 1, k)
+        return self.x(k), above, below
+
+    def left(self, k):
+        # Left boundary at vertex k, tangent slopes from the edge below to the
+        # edge above
+        below = -math.inf if k == self.c + self.n else self.slope(k, k + 1)
+        above = math.inf if k == self.high else self.slope(k - 1, k)
+        return self.x(k), below, above
+
+    def on_right_edge(self, k, y):
+        # Right boundary at height y on the edge from vertex k up to k + 1
+        s = self.slope(k, k + 1)
+        return self.x(k) + s * (y - self.y(k)), s, s
+
+    def on_left_edge(self, k, y):
+        # Left boundary at height y on the edge from vertex k down to k + 1
+        s = self.slope(k, k + 1)
+        return self.x(k) + s * (y - self.y(k)), s, s
+
+    def left_at(self, y, hint):
+        # Left boundary at height y: the first left vertex at or below it,
+        # and x with the tangent slopes there
+        k = first_false(lambda m: self.y(m) > y, self.high, self.c + self.n, hint)
+        if self.y(k) == y:
+            return k, self.left(k)
+        return k, self.on_left_edge(k - 1, y)
+
+
+def derivative(y, right, left):
+    # Range of w + y w' at height y, half the derivative of the area
+    r, r_lo, r_hi = right
+    l, l_lo, l_hi = left
+    w = r - l
+    return w + y * (r_lo - l_hi), w + y * (r_hi - l_lo)
+
+
+def edge_triangle(frame, right_hint, left_hint):
+    # The candidate triangle of edge c: the height y of the touching points,
+    # the right and left boundary there (x and tangent slopes) and the right
+    # and left vertex where the searches ended
+    def below_optimum(k):
+        # True while the derivative is still positive at right vertex k
+        y = frame.y(k)
+        if y == 0:
+            return True
+        _, left = frame.left_at(y, left_hint)
+        return derivative(y, frame.right(k), left)[0] > 0
+
+    k = first_false(below_optimum, frame.c + 1, frame.top, right_hint)
+    y = frame.y(k)
+    j, left = frame.left_at(y, left_hint)
+    right = frame.right(k)
+    if derivative(y, right, left)[1] >= 0:
+        return y, right, left, k, j
+
+    # Between right vertices k - 1 and k, on the right edge. Look through the
+    # left vertices in between the same way.
+    lo, hi = frame.y(k - 1), y
+    first = first_false(lambda m: frame.y(m) >= hi, frame.high, frame.c + frame.n, j)
+    last = first_false(lambda m: frame.y(m) > lo, frame.high, frame.c + frame.n, j) - 1
+
+    def above_optimum(m):
+        # True while the derivative is negative at left vertex m
+        ym = frame.y(m)
+        return derivative(ym, frame.on_right_edge(k - 1, ym), frame.left(m))[1] < 0
+
+    j = first_false(above_optimum, first, last, j)
+    if j <= last:
+        ym = frame.y(j)
+        right = frame.on_right_edge(k - 1, ym)
+        left = frame.left(j)
+        if derivative(ym, right, left)[0] <= 0:
+            return ym, right, left, k, j
+        lo = ym
+    if j - 1 >= first:
+        hi = frame.y(j - 1)
+
+    # Both touching points on edges, where w + y w' is linear in y
+    s = frame.slope(k - 1, k)
+    t = frame.slope(j - 1, j)
+    r0 = frame.x(k - 1) - s * frame.y(k - 1)
+    l0 = frame.x(j) - t * frame.y(j)
+    y = min(max((l0 - r0) / (2 * (s - t)), lo), hi)
+    return y, (r0 + s * y, s, s), (l0 + t * y, t, t), k, j
+
+
+def scalar_min_triangle(hull):
+    # Smallest enclosing triangle of a counter-clockwise hull of at least three
+    # vertices without repeated or collinear ones (a list of (x, y)), on plain
+    # floats. Returns its corners counter-clockwise, its area and for each side
+    # the hull edge it is flush with (the index of the vertex it starts at) or
+    # -1 where the side only touches a vertex, in the order of the corners:
+    # side k runs from corner k to corner k + 1.
+    n = len(hull)
+    best = None
+    top = 1
+    right_hint = 1
+    left_hint = 2
+    for c in range(n):
+        frame = EdgeFrame(hull, c, max(top, c + 1))
+        top = frame.top
+        y, right, left, right_hint, left_hint = edge_triangle(frame, right_hint, left_hint)
+        r, r_lo, r_hi = right
+        l, l_lo, l_hi = left
+        length_sq = frame.e[0] * frame.e[0] + frame.e[1] * frame.e[1]
+        area = 2 * y * (r - l) / length_sq
+        if best is not None and area >= best[0]:
+            continue
+
+        # The apex: where the tangents at both touching points meet, 2y up
+        low = max(r + y * r_lo, l + y * l_lo)
+        high = min(r + y * r_hi, l + y * l_hi)
+        apex = low if math.isfinite(low) else high
+        sides = [c % n, -1, -1]
+        # A side at the end of the range of its tangents is flush with an edge
+        if r_lo == r_hi:
+            sides[1] = (right_hint - 1) % n
+        elif apex == r + y * r_lo:
+            sides[1] = right_hint % n
+        elif apex == r + y * r_hi:
+            sides[1] = (right_hint - 1) % n
+        if l_lo == l_hi:
+            sides[2] = (left_hint - 1) % n
+        elif apex == l + y * l_lo:
+            sides[2] = left_hint % n
+        elif apex == l + y * l_hi:
+            sides[2] = (left_hint - 1) % n
+
+        corners = []
+        for cx, cy in ((2 * l - apex, 0), (2 * r - apex, 0), (apex, 2 * y)):
+            corners.append((frame.origin[0] + (cx * frame.e[0] - cy * frame.e[1]) / length_sq,
+                            frame.origin[1] + (cx * frame.e[1] + cy * frame.e[0]) / length_sq))
+        best = (area, corners, sides)
+    return best[1], best[0], best[2]
+
+
+def min_area_triangle(points, compute_hull=False, stats=None):
+    # Smallest triangle enclosing a counter-clockwise hull (or the hull of
+    # points with compute_hull): its corners (3, 2) counter-clockwise, its area
+    # and for each side the index in points of the vertex where the hull edge
+    # it is flush with starts, -1 for a side that only touches a vertex.
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    with timed(stats, 'hull'):
+        vertices = convex_hull(points) if compute_hull else np.arange(points.shape[0])
+        vertices = vertices[clean_hull(points[vertices], FLAT_TOL)]
+    hull = points[vertices].tolist()
+    if len(hull) < 3:
+        raise ValueError('A triangle needs a hull of at least three vertices')
+    with timed(stats, 'sweep'):
+        corners, area, sides = scalar_min_triangle(hull)
+    if stats is not None:
+        stats.steps += len(hull)
+        stats.count_hulls(len(hull))
+        stats.finish()
+    return np.array(corners), area, tuple(int(vertices[k]) if k >= 0 else -1 for k in sides)
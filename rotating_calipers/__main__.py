@@ -0,0 +1,4 @@
+import sys
+from rotating_calipers.cli import main
+
+sys.exit(main())
@@ -0,0 +1,141 @@
+import math
+import os
+from multiprocessing import get_context, shared_memory
+import numpy as np
+from diameter.diameter import compute_diameters
+from maxdist.maxdist import compute_max_distances
+from minimum_area_rectangle.minimum_area_rectangle import compute_bounding_rectangles
+from rotating_calipers.hull import check_offsets
+
+# Runs the batched kernels over very large sets of polygons on a process pool.
+# The ragged input (coords plus offsets, hull k spanning offsets[k]:offsets[k + 1])
+# is copied once into shared memory, every worker gets a range of hull numbers
+# instead of a pickled copy of its hulls, and writes its part of the result
+# straight into shared output arrays.
+KERNELS = ('diameter', 'maxdist', 'min_area_rectangle')
+
+
+def run_kernel(kernel, coords, offsets, coords2=None, offsets2=None, compute_hull=False):
+    if kernel == 'diameter':
+        return compute_diameters(coords, offsets, compute_hull)
+    if kernel == 'maxdist':
+        return compute_max_distances(coords, offsets, coords2, offsets2, compute_hull)
+    if kernel == 'min_area_rectangle':
+        return compute_bounding_rectangles(coords, offsets, compute_hull)
+    raise ValueError('Unknown kernel: ' + str(kernel))
+
+
+def kernel_outputs(kernel, count):
+    # Shape and dtype of every array the kernel returns for `count` hulls
+    if kernel == 'min_area_rectangle':
+        return [((count, 4, 2), np.float64), ((count,), np.float64), ((count,), np.float64)]
+    return [((count, 2), np.int64), ((count,), np.float64)]
+
+
+def share(array=None, shape=None, dtype=None):
+    # A new shared memory block holding a copy of array (or room for shape, dtype)
+    if array is not None:
+        shape, dtype = array.shape, array.dtype
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+    if array is not None:
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, tuple(shape), np.dtype(dtype).str)
+
+
+def view(shm, spec):
+    _, shape, dtype = spec
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def fill_chunk(kernel, handles, specs, start, stop, compute_hull):
+    # The array views must not outlive this call, the shared memory can only be
+    # closed once they are gone
+    arrays = [view(shm, spec) for shm, spec in zip(handles, specs)]
+    if kernel == 'maxdist':
+        coords, offsets, coords2, offsets2 = arrays[:4]
+        results = arrays[4:]
+    else:
+        coords, offsets = arrays[:2]
+        coords2 = offsets2 = None
+        results = arrays[2:]
+
+    # Hulls start:stop as a batch of their own, offsets rebased to the slice
+    base = offsets[start]
+    if kernel == 'maxdist':
+        base2 = offsets2[start]
+        coords2 = coords2[base2:offsets2[stop]]
+        offsets2 = offsets2[start:stop + 1] - base2
+    chunk = run_kernel(kernel, coords[base:offsets[stop]], offsets[start:stop + 1] - base,
+                       coords2, offsets2, compute_hull)
+    for result, values in zip(results, chunk):
+        result[start:stop] = values
+
+    # Pair indices come back relative to the slice
+    if kernel == 'diameter':
+        results[0][start:stop] += base
+    elif kernel == 'maxdist':
+        results[0][start:stop, 0] += base
+        results[0][start:stop, 1] += base2
+
+
+def batch_worker(kernel, specs, start, stop, compute_hull):
+    handles = [shared_memory.SharedMemory(name=spec[0]) for spec in specs]
+    try:
+        fill_chunk(kernel, handles, specs, start, stop, compute_hull)
+    finally:
+        for shm in handles:
+            shm.close()
+
+
+def run_batch(kernel, coords, offsets, coords2=None, offsets2=None, workers=None,
+              chunk_size=None, compute_hull=False):
+    # Same results as calling the kernel on the whole batch: compute_diameters
+    # for 'diameter', compute_max_distances for 'maxdist' (pairing hull k of
+    # coords with hull k of coords2) and compute_bounding_rectangles for
+    # 'min_area_rectangle'. workers defaults to the CPU count and chunk_size
+    # (hulls per task) to four tasks per worker.
+    if kernel not in KERNELS:
+        raise ValueError('Unknown kernel: ' + str(kernel))
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+    check_offsets(coords, offsets)
+    inputs = [coords, offsets]
+    if kernel == 'maxdist':
+        coords2 = np.ascontiguousarray(coords2, dtype=np.float64)
+        offsets2 = np.ascontiguousarray(offsets2, dtype=np.int64)
+        check_offsets(coords2, offsets2)
+        if offsets2.shape != offsets.shape:
+            raise ValueError('maxdist needs the same number of hulls in both sets')
+        inputs += [coords2, offsets2]
+
+    count = offsets.shape[0] - 1
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or count == 0:
+        return run_kernel(kernel, coords, offsets, coords2, offsets2, compute_hull)
+    chunk_size = chunk_size or max(1, math.ceil(count / (4 * workers)))
+
+    handles = []
+    specs = []
+    try:
+        for array in inputs:
+            shm, spec = share(array)
+            handles.append(shm)
+            specs.append(spec)
+        for shape, dtype in kernel_outputs(kernel, count):
+            shm, spec = share(shape=shape, dtype=dtype)
+            handles.append(shm)
+            specs.append(spec)
+
+        tasks = [(kernel, specs, start, min(start + chunk_size, count), compute_hull)
+                 for start in range(0, count, chunk_size)]
+        with get_context().Pool(workers) as pool:
+            pool.starmap(batch_worker, tasks, chunksize=1)
+
+        # Copy out before the shared memory goes away
+        first_output = len(inputs)
+        return tuple(view(shm, spec).copy() for shm, spec in zip(handles[first_output:], specs[first_output:]))
+    finally:
+        for shm in handles:
+            shm.close()
+            shm.unlink()
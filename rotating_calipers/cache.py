@@ -0,0 +1,192 @@
+import hashlib
+import inspect
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
+import numpy as np
+
+# Results of the diameter, maxdist and minimum area rectangle entry points kept
+# by the content of their inputs. The key hashes the coordinate buffers and the
+# other arguments, so a footprint that comes back in a fresh array still skips
+# the hull and the sweep. Results are stored as read only copies (see freeze),
+# since every hit hands out the same objects.
+
+# Arguments a function writes its result into (the SweepRecord of the record_*
+# functions). Calls that pass one are never cached.
+OUTPUT_ARGUMENTS = ('out',)
+
+
+class ResultCache:
+    # Least recently used cache holding at most max_entries results and
+    # max_bytes of result arrays (either limit can be None). Results larger
+    # than max_bytes on their own are returned but not stored.
+    def __init__(self, max_entries=1024, max_bytes=64 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (result, nbytes)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def call(self, function, *args, bypass=False, refresh=False, **kwargs):
+        # function(*args, **kwargs) through the cache. Sweeps that yield their
+        # states (compute_bounding_rectangle) come back as a tuple of the states.
+        # bypass skips the cache altogether, refresh computes the result again
+        # and replaces the stored one. A `stats` argument is passed on but is
+        # not part of the key, and only sees the calls that miss. Calls with an
+        # output buffer (OUTPUT_ARGUMENTS) always bypass the cache.
+        key = None if bypass else call_key(function, args, kwargs)
+        if key is None:
+            return evaluate(function, args, kwargs)
+        if not refresh:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        self.misses += 1
+        result = freeze(evaluate(function, args, kwargs))
+        self.store(key, result)
+        return result
+
+    def wrap(self, function):
+        # function with the cache in front of it, taking the same arguments plus
+        # bypass and refresh
+        def cached(*args, bypass=False, refresh=False, **kwargs):
+            return self.call(function, *args, bypass=bypass, refresh=refresh, **kwargs)
+        cached.__name__ = function.__name__
+        cached.__wrapped__ = function
+        return cached
+
+    def store(self, key, result):
+        self.discard(key)
+        nbytes = result_bytes(result)
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return
+        self.entries[key] = (result, nbytes)
+        self.nbytes += nbytes
+        while ((self.max_entries is not None and len(self.entries) > self.max_entries) or
+               (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+        return entry is not None
+
+    def invalidate(self, function=None, *args, **kwargs):
+        # Drop the result of one call, or everything without a function.
+        # Returns the number of results dropped.
+        if function is None:
+            count = len(self.entries)
+            self.entries.clear()
+            self.nbytes = 0
+            return count
+        key = call_key(function, args, kwargs)
+        return int(key is not None and self.discard(key))
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries), 'bytes': self.nbytes}
+
+
+def evaluate(function, args, kwargs):
+    result = function(*args, **kwargs)
+    if inspect.isgenerator(result):
+        result = list(result)
+    return result
+
+
+def call_key(function, args, kwargs):
+    # Digest of the function and every argument but stats, arrays by content.
+    # Arguments are matched to the parameters first, so passing one by position
+    # or by name, or leaving it at its default, gives the same key. None for a
+    # call that writes into an output buffer.
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update((function.__module__ + '.' + function.__qualname__).encode())
+    signature = function_signature(function)
+    if signature is None:
+        named = dict(kwargs)
+        for arg in args:
+            hash_value(digest, arg)
+    else:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        named = {}
+        for name, value in bound.arguments.items():
+            if signature.parameters[name].kind == inspect.Parameter.VAR_KEYWORD:
+                named.update(value)
+            else:
+                named[name] = value
+    if any(named.get(name) is not None for name in OUTPUT_ARGUMENTS):
+        return None
+    for name in sorted(named):
+        if name != 'stats':
+            digest.update(name.encode())
+            hash_value(digest, named[name])
+    return digest.digest()
+
+
+@lru_cache(maxsize=256)
+def function_signature(function):
+    # Looked up once per function, it costs more than hashing a small hull
+    try:
+        return inspect.signature(function)
+    except (TypeError, ValueError):
+        return None
+
+
+def hash_value(digest, value):
+    if isinstance(value, (tuple, list)) and not all(np.isscalar(v) for v in value):
+        digest.update(b'(%d' % len(value))
+        for v in value:
+            hash_value(digest, v)
+        digest.update(b')')
+        return
+    if value is None or isinstance(value, (bool, int, float, str)):
+        digest.update(repr(value).encode() + b';')
+        return
+    # Arrays, and lists of numbers or points
+    array = np.ascontiguousarray(value)
+    digest.update(('%s%s;' % (array.dtype.str, array.shape)).encode())
+    digest.update(memoryview(array).cast('B'))
+
+
+def freeze(result):
+    # Read only copy of the result. Arrays are copied since a result can be a
+    # view into the caller's points (the states of compute_bounding_rectangle),
+    # which the caller is free to overwrite afterwards. Lists become tuples and
+    # dicts read only mappings, every hit hands out the same objects.
+    if isinstance(result, np.ndarray):
+        result = np.array(result, copy=True)
+        result.setflags(write=False)
+        return result
+    if isinstance(result, (tuple, list)):
+        return tuple(freeze(item) for item in result)
+    if isinstance(result, (dict, MappingProxyType)):
+        return MappingProxyType({key: freeze(item) for key, item in result.items()})
+    return result
+
+
+def result_bytes(result):
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    if isinstance(result, (tuple, list)):
+        return sum(result_bytes(item) for item in result)
+    if isinstance(result, MappingProxyType):
+        return sum(result_bytes(item) for item in result.values())
+    return 8
@@ -0,0 +1,212 @@
+import argparse
+import sys
+import numpy as np
+from rotating_calipers.batch import KERNELS, run_batch
+from rotating_calipers.trace import record_trace, write_trace
+
+# Headless batch runs over many polygons, for pipelines instead of the
+# interactive demos:
+#
+#   python -m rotating_calipers diameter polygons.npz --out diameters.csv
+#   python -m rotating_calipers maxdist first.csv --other second.csv --workers 8
+#   python -m rotating_calipers min_area_rectangle points.npy --offsets offsets.npy --compute-hull
+#
+# Polygons are flat coordinates plus offsets, polygon k spanning rows
+# offsets[k]:offsets[k + 1]:
+#   .npz      arrays `coords` (N, 2) and `offsets` (K + 1,)
+#   .npy      coords (N, 2), memory mapped, with the offsets in --offsets (one
+#             polygon without)
+#   .csv      columns polygon, x, y with a header, the rows of a polygon next to
+#             each other
+#   .parquet  the same columns as the CSV (needs pyarrow)
+# Results are written a chunk of polygons at a time, as CSV (to stdout without
+# --out) or Parquet. Vertex numbers count from the first point of each polygon.
+# Only NumPy is needed, matplotlib and scipy are never imported. With --trace
+# the sweep over a single polygon is recorded for rotating_calipers.replay.
+
+# Polygons run and written per chunk
+CHUNK_SIZE = 1 << 16
+
+COLUMNS = {'diameter': ['polygon', 'first', 'second', 'length'],
+           'maxdist': ['polygon', 'first', 'second', 'distance'],
+           'min_area_rectangle': ['polygon', 'area', 'angle', 'x1', 'y1', 'x2', 'y2', 'x3', 'y3', 'x4', 'y4']}
+
+
+def read_polygons(path, offsets_path=None):
+    # Coordinates (N, 2), offsets (K + 1,) and the id of every polygon (K,)
+    path = str(path)
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            coords, offsets = data['coords'], data['offsets']
+    elif path.endswith('.npy'):
+        coords = np.load(path, mmap_mode='r')
+        offsets = np.load(offsets_path) if offsets_path else np.array([0, coords.shape[0]])
+    elif path.endswith('.csv'):
+        with open(path) as f:
+            header = [name.strip() for name in f.readline().split(',')]
+        columns = [column_index(header, name, path) for name in ('polygon', 'x', 'y')]
+        table = np.loadtxt(path, delimiter=',', skiprows=1, usecols=columns, ndmin=2)
+        return grouped(table[:, 0], table[:, 1:])
+    elif path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError('Reading Parquet needs pyarrow') from None
+        table = pq.read_table(path, columns=['polygon', 'x', 'y'])
+        ids = table.column('polygon').to_numpy()
+        return grouped(ids, np.stack([table.column('x').to_numpy(), table.column('y').to_numpy()], axis=1))
+    else:
+        raise ValueError('Unknown polygon file type: ' + path)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if coords.ndim != 2 or coords.shape[1] != 2:
+        raise ValueError('Expected (N, 2) coordinates, got shape ' + str(coords.shape))
+    if offsets[0] != 0 or offsets[-1] != coords.shape[0] or np.any(np.diff(offsets) < 0):
+        raise ValueError('Offsets must rise from 0 to the number of points')
+    return coords, offsets, np.arange(offsets.shape[0] - 1)
+
+
+def column_index(header, name, path):
+    if name not in header:
+        raise ValueError('%s has no %s column' % (path, name))
+    return header.index(name)
+
+
+def grouped(ids, coords):
+    # Offsets from runs of equal polygon ids
+    ids = np.asarray(ids)
+    starts = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+    offsets = np.concatenate([[0], starts, [ids.shape[0]]]).astype(np.int64)
+    if ids.shape[0] == 0:
+        offsets = offsets[:1]
+    polygon_ids = ids[offsets[:-1]]
+    if np.unique(polygon_ids).shape[0] != polygon_ids.shape[0]:
+        raise ValueError('The rows of each polygon must be next to each other')
+    if polygon_ids.dtype.kind == 'f' and np.all(polygon_ids == np.round(polygon_ids)):
+        polygon_ids = polygon_ids.astype(np.int64)
+    return np.ascontiguousarray(coords, dtype=np.float64), offsets, polygon_ids
+
+
+def run_chunks(kernel, coords, offsets, coords2=None, offsets2=None, chunk_size=CHUNK_SIZE,
+               workers=1, compute_hull=False):
+    # Yields (first polygon, columns) for every chunk of polygons, the columns
+    # as in COLUMNS without the polygon id. workers > 1 spreads each chunk over
+    # a process pool with run_batch.
+    count = offsets.shape[0] - 1
+    for start in range(0, count, chunk_size):
+        stop = min(start + chunk_size, count)
+        base = offsets[start]
+        chunk_offsets = offsets[start:stop + 1] - base
+        chunk = np.asarray(coords[base:offsets[stop]], dtype=np.float64)
+        if kernel == 'maxdist':
+            base2 = offsets2[start]
+            chunk2 = np.asarray(coords2[base2:offsets2[stop]], dtype=np.float64)
+            pairs, lengths = run_batch(kernel, chunk, chunk_offsets, chunk2, offsets2[start:stop + 1] - base2,
+                                       workers=workers, compute_hull=compute_hull)
+            # Vertex numbers within each polygon of either set
+            pairs = pairs - np.stack([chunk_offsets[:-1], offsets2[start:stop] - base2], axis=1)
+            yield start, [pairs[:, 0], pairs[:, 1], lengths]
+        elif kernel == 'diameter':
+            pairs, lengths = run_batch(kernel, chunk, chunk_offsets, workers=workers, compute_hull=compute_hull)
+            pairs = pairs - chunk_offsets[:-1, None]
+            yield start, [pairs[:, 0], pairs[:, 1], lengths]
+        else:
+            rectangles, areas, angles = run_batch(kernel, chunk, chunk_offsets, workers=workers,
+                                                  compute_hull=compute_hull)
+            yield start, [areas, angles] + [rectangles[:, c // 2, c % 2] for c in range(8)]
+
+
+class CsvWriter:
+    # To a new file, or to stdout without a path
+    def __init__(self, path, columns):
+        self.f = sys.stdout if path is None else open(path, 'w')
+        self.f.write(','.join(columns) + '\n')
+
+    def write(self, values):
+        # Integers as they are, floats with every digit they need to round trip
+        formats = ['%d' if v.dtype.kind in 'iu' else '%s' if v.dtype.kind in 'OU' else '%.17g' for v in values]
+        np.savetxt(self.f, np.rec.fromarrays(values), fmt=formats, delimiter=',')
+        self.f.flush()
+
+    def close(self):
+        if self.f is not sys.stdout:
+            self.f.close()
+
+
+class ParquetWriter:
+    # One row group per chunk
+    def __init__(self, path, columns):
+        try:
+            import pyarrow
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError('Writing Parquet needs pyarrow') from None
+        self.pyarrow = pyarrow
+        self.pq = pq
+        self.path = path
+        self.columns = columns
+        self.writer = None
+
+    def write(self, values):
+        table = self.pyarrow.table(dict(zip(self.columns, values)))
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m rotating_calipers',
+                                     description='Rotating calipers over many polygons stored as columns.')
+    parser.add_argument('kernel', choices=KERNELS)
+    parser.add_argument('input', help='.npz, .npy, .csv or .parquet polygons')
+    parser.add_argument('--offsets', help='offsets .npy for an .npy input')
+    parser.add_argument('--other', help='second set of polygons for maxdist, paired by position')
+    parser.add_argument('--other-offsets', help='offsets .npy for an .npy --other')
+    parser.add_argument('--out', help='.csv or .parquet results (CSV to stdout without)')
+    parser.add_argument('--compute-hull', action='store_true', help='polygons are point sets, not hulls')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='polygons per chunk')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes, 0 for one per CPU')
+    parser.add_argument('--trace', help='record the sweep over one polygon to this file instead (see replay)')
+    parser.add_argument('--polygon', type=int, default=0, help='position of the polygon to --trace')
+    args = parser.parse_args(argv)
+    if args.kernel == 'maxdist' and not args.other:
+        parser.error('maxdist needs --other')
+    if args.chunk_size < 1:
+        parser.error('--chunk-size must be positive')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    coords, offsets, ids = read_polygons(args.input, args.offsets)
+    coords2 = offsets2 = None
+    if args.kernel == 'maxdist':
+        coords2, offsets2, _ = read_polygons(args.other, args.other_offsets)
+        if offsets2.shape != offsets.shape:
+            raise ValueError('maxdist needs the same number of polygons in both inputs')
+
+    if args.trace:
+        k = args.polygon
+        if not 0 <= k < offsets.shape[0] - 1:
+            raise ValueError('No polygon %d in %s' % (k, args.input))
+        other = None if coords2 is None else coords2[offsets2[k]:offsets2[k + 1]]
+        write_trace(args.trace, record_trace(args.kernel, coords[offsets[k]:offsets[k + 1]], other, args.compute_hull))
+        return 0
+
+    columns = COLUMNS[args.kernel]
+    if args.out is None or args.out.endswith('.csv'):
+        writer = CsvWriter(args.out, columns)
+    elif args.out.endswith('.parquet'):
+        writer = ParquetWriter(args.out, columns)
+    else:
+        raise ValueError('Unknown result file type: ' + args.out)
+    try:
+        for start, values in run_chunks(args.kernel, coords, offsets, coords2, offsets2, args.chunk_size,
+                                        args.workers or None, args.compute_hull):
+            writer.write([ids[start:start + values[0].shape[0]]] + values)
+    finally:
+        writer.close()
+    return 0
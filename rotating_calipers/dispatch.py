@@ -0,0 +1,79 @@
+import math
+import time
+import numpy as np
+
+# Crossover between the scalar and the vectorized kernels of the single hull
+# entry points (diameter.diameter, maxdist.max_distance and
+# minimum_area_rectangle.min_area_rectangle). Up to this many hull vertices the
+# fixed cost of a few dozen small NumPy calls outweighs the arithmetic, and a
+# plain float loop wins. Set the values directly or measure them on the
+# machine at hand with calibrate().
+SCALAR_MAX_VERTICES = {'diameter': 128, 'maxdist': 128, 'min_area_rectangle': 64}
+
+CALIBRATION_SIZES = (4, 8, 16, 24, 32, 48, 64, 96, 128, 192, 256, 384, 512)
+
+
+def use_scalar(kernel, vertices):
+    return vertices <= SCALAR_MAX_VERTICES[kernel]
+
+
+def calibration_calls(kernel):
+    # Call taking the hull(s) of a given size, hulls made of points on a circle
+    from diameter.diameter import diameter
+    from maxdist.maxdist import max_distance
+    from minimum_area_rectangle.minimum_area_rectangle import min_area_rectangle
+    if kernel == 'diameter':
+        return lambda hulls: diameter(hulls[0])
+    if kernel == 'maxdist':
+        return lambda hulls: max_distance(hulls[0], hulls[1])
+    if kernel == 'min_area_rectangle':
+        return lambda hulls: min_area_rectangle(hulls[0])
+    raise ValueError('Unknown kernel: ' + str(kernel))
+
+
+def time_path(call, hulls, kernel, threshold, min_time):
+    # Best time of one call with the threshold forced to pick one path
+    saved = SCALAR_MAX_VERTICES[kernel]
+    SCALAR_MAX_VERTICES[kernel] = threshold
+    try:
+        best = math.inf
+        spent = 0.0
+        while spent < min_time:
+            start = time.perf_counter()
+            call(hulls)
+            elapsed = time.perf_counter() - start
+            best = min(best, elapsed)
+            spent += elapsed
+        return best
+    finally:
+        SCALAR_MAX_VERTICES[kernel] = saved
+
+
+def calibrate(kernels=tuple(SCALAR_MAX_VERTICES), sizes=CALIBRATION_SIZES, min_time=0.02, seed=0, apply=True):
+    # Time both paths of every kernel on hulls of the given sizes and take the
+    # largest size below the first one where the vectorized path is faster as
+    # the new threshold (stored in SCALAR_MAX_VERTICES with apply). Returns the
+    # thresholds and the timings {kernel: [(size, scalar, vectorized)]}.
+    rng = np.random.default_rng(seed)
+    thresholds = {}
+    timings = {}
+    for kernel in kernels:
+        call = calibration_calls(kernel)
+        rows = []
+        threshold = 0
+        for size in sizes:
+            hulls = []
+            for _ in range(2):
+                angles = np.sort(rng.uniform(0, 2 * np.pi, size))
+                hulls.append(np.stack([np.cos(angles), np.sin(angles)], axis=1))
+            scalar = time_path(call, hulls, kernel, math.inf, min_time)
+            vectorized = time_path(call, hulls, kernel, -1, min_time)
+            rows.append((size, scalar, vectorized))
+            if scalar > vectorized:
+                break
+            threshold = size
+        thresholds[kernel] = threshold
+        timings[kernel] = rows
+    if apply:
+        SCALAR_MAX_VERTICES.update(thresholds)
+    return thresholds, timings
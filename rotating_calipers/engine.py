@@ -0,0 +1,321 @@
+# Trig-free caliper stepping shared by the diameter, maxdist and minimum area
+# rectangle sweeps. Every decision is a cross or dot product of hull edges and
+# the calipers are always aligned with an actual hull edge, so no rotation error
+# builds up over long sweeps. All per-step arithmetic is on Python floats.
+import math
+import time
+import numpy as np
+
+
+def cross(v1, v2):
+    return v1[0] * v2[1] - v1[1] * v2[0]
+
+
+def dot(v1, v2):
+    return v1[0] * v2[0] + v1[1] * v2[1]
+
+
+def rotate_quarters(v, quarters):
+    # Rotate counter-clockwise by a whole number of quarter turns (exact)
+    x, y = v
+    for _ in range(quarters % 4):
+        x, y = -y, x
+    return x, y
+
+
+def reached_by(e, d):
+    # True when rotating clockwise onto direction d passes over or lands on e
+    c = cross(e, d)
+    return c < 0 or (c == 0 and dot(e, d) > 0)
+
+
+def line_intersection(v1, p1, v2, p2):
+    t = cross((p2[0] - p1[0], p2[1] - p1[1]), v2) / cross(v1, v2)
+    return p1[0] + t * v1[0], p1[1] + t * v1[1]
+
+
+# Radians either side of its hint that a warm started sweep searches first
+WARM_SPAN = 0.1
+
+
+class SweepError(RuntimeError):
+    # A sweep ran into its step bound without closing, raised with watchdog=True
+    pass
+
+
+def check_closed(name, states, vertices, watchdog):
+    # Called when a sweep used up its step bound. Every sweep over a clean
+    # counter-clockwise hull closes well within it, so this only happens for
+    # input that is not one (e.g. clockwise, or not convex).
+    if watchdog:
+        raise SweepError('%s sweep did not close within %d states on hulls of %s vertices, the input is '
+                         'probably not a counter-clockwise convex polygon' % (name, states, vertices))
+
+
+class Caliper:
+    # A caliper anchored at a hull vertex. Its direction is the sweep direction
+    # turned counter-clockwise by `quarter` quarter turns. Hulls are counter-clockwise
+    # and the calipers walk them clockwise, one vertex back at a time.
+    def __init__(self, points, idx, quarter):
+        self.points = points
+        self.idx = idx
+        self.quarter = quarter
+
+    def next_idx(self):
+        if self.idx == 0:
+            return len(self.points) - 1
+        return self.idx - 1
+
+    def point(self):
+        return self.points[self.idx]
+
+    def edge(self):
+        # The edge leaving the anchor, expressed in the frame of the sweep direction
+        p = self.points[self.idx]
+        q = self.points[self.next_idx()]
+        return rotate_quarters((q[0] - p[0], q[1] - p[1]), -self.quarter)
+
+    def advance(self):
+        self.idx = self.next_idx()
+
+    def settle(self, direction):
+        # Walk to the vertex the caliper touches when the sweep points along
+        # `direction`: back while the edge arriving at the anchor still lies
+        # ahead, forward while the edge leaving it is strictly behind. False if
+        # that takes more than a full lap, which only happens for a bad hint.
+        n = len(self.points)
+        for _ in range(n):
+            p = self.points[(self.idx + 1) % n]
+            q = self.points[self.idx]
+            if reached_by(rotate_quarters((q[0] - p[0], q[1] - p[1]), -self.quarter), direction):
+                break
+            self.idx = (self.idx + 1) % n
+        else:
+            return False
+        for _ in range(n):
+            if cross(self.edge(), direction) >= 0:
+                return True
+            self.advance()
+        return False
+
+
+def box_calipers(points):
+    # Four axis aligned calipers on the extreme points, in the order of vec_1..vec_4:
+    # left pointing up, bottom pointing left, right pointing down, top pointing right
+    if hasattr(points, 'tolist'):
+        points = points.tolist()
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    extremes = [xs.index(min(xs)), ys.index(min(ys)), xs.index(max(xs)), ys.index(max(ys))]
+    return [Caliper(points, idx, quarter) for quarter, idx in enumerate(extremes)]
+
+
+def hinted_calipers(point_sets, hint, span):
+    # Calipers for a warm started sweep. `hint` is (indices, angle) of a state
+    # of an earlier sweep, e.g. record.calipers[k] and record.angles[k]; caliper
+    # k sits on point_sets[k // 4]. The sweep starts span radians before the
+    # hinted angle. Returns the calipers and the start direction, or None when
+    # the hint does not fit the points.
+    indices, angle = hint
+    angle = float(angle) - span
+    if len(indices) != 4 * len(point_sets) or not math.isfinite(angle):
+        return None
+    direction = (math.sin(angle), math.cos(angle))
+    calipers = []
+    for k, idx in enumerate(indices):
+        points = point_sets[k // 4]
+        if hasattr(points, 'tolist'):
+            points = points.tolist()
+        idx = int(idx)
+        if not 0 <= idx < len(points):
+            return None
+        caliper = Caliper(points, idx, k % 4)
+        if not caliper.settle(direction):
+            return None
+        calipers.append(caliper)
+    return calipers, direction
+
+
+def start_calipers(point_sets, hint=None, span=None):
+    # Calipers, start direction and span of a sweep: warm started from the hint
+    # when it fits, searching span radians (WARM_SPAN by default) either side of
+    # it, otherwise axis aligned on the extreme points of every set and no span
+    if hint is not None:
+        span = WARM_SPAN if span is None else span
+        placed = hinted_calipers(point_sets, hint, span)
+        if placed is not None:
+            return placed + (span,)
+    calipers = []
+    for points in point_sets:
+        calipers += box_calipers(points)
+    return calipers, (0, 1), None
+
+
+def window_holds(best, optimum):
+    # True when the best value a warm started sweep found within its span is
+    # the optimum over the whole range (from a vectorized kernel), up to
+    # rounding. The optimum can jump to an edge far from the hint, then the
+    # sweep has to go on over the rest of the range.
+    return math.isclose(best, optimum, rel_tol=1e-9)
+
+
+class CaliperSweep:
+    # Rotates a set of calipers clockwise together. Only the `drivers` decide how
+    # far each step turns; every other caliper follows along as the sweep passes
+    # its edges. With a SweepStats as `stats` every step and rectangle is counted
+    # and timed.
+    def __init__(self, calipers, drivers=None, direction=(0, 1), stats=None):
+        self.calipers = calipers
+        self.stats = stats
+        self.drivers = list(range(len(calipers))) if drivers is None else list(drivers)
+        self.start = direction
+        self.direction = direction
+        self.quarter_turns = 0
+
+    def caliper_direction(self, i):
+        return rotate_quarters(self.direction, self.calipers[i].quarter)
+
+    def step(self):
+        # Turn to the nearest driver edge. On ties the first driver listed moves
+        # and the others are returned; they follow on the next (zero angle) step.
+        if self.stats is None:
+            return self.turn()
+        start = time.perf_counter()
+        best, tied = self.turn()
+        self.stats.count_step(tied, start)
+        return best, tied
+
+    def turn(self):
+        # A caliper on a single point has no edge to turn onto, with nothing
+        # but those the sweep cannot move and returns (None, [])
+        best = None
+        best_edge = None
+        tied = []
+        for i in self.drivers:
+            e = self.calipers[i].edge()
+            if e == (0, 0):
+                continue
+            if best is None:
+                best, best_edge = i, e
+                continue
+            c = cross(best_edge, e)
+            if c == 0 and dot(best_edge, e) < 0:
+                # Opposite edges, one of them half a turn ahead (the way back
+                # along a two vertex hull): the other one comes first
+                if dot(best_edge, self.direction) < 0:
+                    best, best_edge, tied = i, e, []
+                continue
+            if c < 0:
+                continue
+            if c == 0:
+                tied.append(i)
+            else:
+                best, best_edge, tied = i, e, []
+
+        if best is None:
+            return None, []
+        self.direction = best_edge
+        self.calipers[best].advance()
+        for i, caliper in enumerate(self.calipers):
+            if i in self.drivers:
+                continue
+            while reached_by(caliper.edge(), self.direction):
+                caliper.advance()
+        self.update_quarter_turns()
+        return best, tied
+
+    def update_quarter_turns(self):
+        # Track how far the sweep has turned without any angles: the direction
+        # always lies in the quarter between the start turned clockwise by
+        # quarter_turns and quarter_turns + 1.
+        d = self.direction
+        while True:
+            lo = rotate_quarters(self.start, -self.quarter_turns)
+            hi = rotate_quarters(self.start, -self.quarter_turns - 1)
+            if cross(lo, d) <= 0 < cross(hi, d):
+                return
+            self.quarter_turns += 1
+
+    def covered(self, quarters, span=None):
+        # True once the sweep has turned `quarters` quarter turns, or more than
+        # twice `span` radians for a local warm started sweep
+        if span is None:
+            return self.quarter_turns >= quarters
+        return self.turned() > 2 * span
+
+    def turned_past(self, quarters):
+        # True once the sweep has turned strictly more than `quarters` quarter turns
+        if self.quarter_turns != quarters:
+            return self.quarter_turns > quarters
+        boundary = rotate_quarters(self.start, -quarters)
+        return cross(boundary, self.direction) != 0
+
+    def rectangle(self, first=0):
+        # Corners where the lines of calipers first..first + 3 meet
+        if self.stats is None:
+            return self.corners(first)
+        start = time.perf_counter()
+        corners = self.corners(first)
+        self.stats.times['scoring'] += time.perf_counter() - start
+        return corners
+
+    def corners(self, first):
+        corners = []
+        for k in range(4):
+            a = first + k
+            b = first + (k + 1) % 4
+            corners.append(line_intersection(self.caliper_direction(a), self.calipers[a].point(),
+                                             self.caliper_direction(b), self.calipers[b].point()))
+        return corners
+
+    def turned(self):
+        # Clockwise rotation from the start direction in radians
+        boundary = rotate_quarters(self.start, -self.quarter_turns)
+        within = math.atan2(-cross(boundary, self.direction), dot(boundary, self.direction))
+        return self.quarter_turns * math.pi / 2 + within
+
+    def angle(self):
+        # Clockwise rotation from straight up, only needed for reporting and hints
+        return math.atan2(self.start[0], self.start[1]) + self.turned()
+
+
+class SweepRecord:
+    # Structure of arrays holding every state of a sweep: the rectangles of each
+    # group of four calipers, the caliper anchor indices and the sweep angle.
+    # Allocate once with the largest number of states expected and pass it to
+    # the record functions again and again, nothing else gets allocated per step.
+    def __init__(self, max_states, calipers, rectangles, edge_pairs=False):
+        self.rectangles = np.empty((max_states, rectangles, 4, 2))
+        self.calipers = np.empty((max_states, calipers), dtype=np.int64)
+        self.angles = np.empty(max_states)
+        # Extra antipodal pair found on parallel edges, -1 where there is none
+        self.edge_pairs = np.empty((max_states, 2), dtype=np.int64) if edge_pairs else None
+        self.count = 0
+
+    def check(self, max_states, calipers, rectangles, edge_pairs=False):
+        # Fail before sweeping if the buffers cannot hold a sweep of this shape
+        if (self.angles.shape[0] < max_states or self.calipers.shape[1] != calipers or
+                self.rectangles.shape[1] != rectangles or (edge_pairs and self.edge_pairs is None)):
+            raise ValueError('SweepRecord is too small for this sweep')
+        self.count = 0
+
+    def append(self, sweep, edge_pair=None):
+        k = self.count
+        if k >= self.angles.shape[0]:
+            raise ValueError('SweepRecord is full after %d states' % k)
+        for r in range(self.rectangles.shape[1]):
+            for c, corner in enumerate(sweep.rectangle(4 * r)):
+                self.rectangles[k, r, c, 0] = corner[0]
+                self.rectangles[k, r, c, 1] = corner[1]
+        for i, caliper in enumerate(sweep.calipers):
+            self.calipers[k, i] = caliper.idx
+        self.angles[k] = sweep.angle()
+        if self.edge_pairs is not None:
+            self.edge_pairs[k, 0], self.edge_pairs[k, 1] = edge_pair if edge_pair else (-1, -1)
+        self.count = k + 1
+
+    def result(self):
+        # Views of the filled part of the buffers
+        k = self.count
+        edge_pairs = None if self.edge_pairs is None else self.edge_pairs[:k]
+        return self.rectangles[:k], self.calipers[:k], self.angles[:k], edge_pairs
@@ -0,0 +1,317 @@
+import numpy as np
+from rotating_calipers.engine import SweepError
+from rotating_calipers.supports import pseudo_angle
+
+# Convex hulls in the order the caliper sweeps expect: counter-clockwise, the
+# same orientation as scipy.spatial.ConvexHull(points).vertices in 2D. The
+# sweeps walk that order backwards, which rotates the calipers clockwise.
+#
+# Point sets are ragged: all points back to back in one (N, 2) array and an
+# offsets array where set k spans offsets[k]:offsets[k + 1].
+
+
+def group_ids(offsets):
+    sizes = np.diff(offsets)
+    return np.repeat(np.arange(sizes.shape[0]), sizes)
+
+
+def check_offsets(coords, offsets):
+    # Sets follow each other from row 0 and hold at least one point each. An
+    # empty set would silently pick up the result of the set after it.
+    if offsets.ndim != 1 or offsets.shape[0] == 0 or offsets[0] != 0 or offsets[-1] > coords.shape[0]:
+        raise ValueError('Offsets must rise from 0 to at most the number of points')
+    if np.any(np.diff(offsets) <= 0):
+        raise ValueError('Offsets must increase, every polygon needs at least one point')
+
+
+def first_in_group(mask, gid):
+    # Index of the first True entry of every group that has one
+    idx = np.flatnonzero(mask)
+    g = gid[idx]
+    keep = np.ones(idx.shape[0], dtype=bool)
+    keep[1:] = g[1:] != g[:-1]
+    return g[keep], idx[keep]
+
+
+def group_extreme(values, gid, offsets, largest=False):
+    # Index of the first minimum (or maximum) of values in every non-empty group
+    sizes = np.diff(offsets)
+    if sizes.shape[0] == 1:
+        return np.array([np.argmax(values) if largest else np.argmin(values)])
+    starts = offsets[:-1][sizes > 0]
+    reduce = np.maximum if largest else np.minimum
+    best = np.empty(sizes.shape[0], dtype=values.dtype)
+    best[sizes > 0] = reduce.reduceat(values, starts)
+    result = np.zeros(sizes.shape[0], dtype=np.int64)
+    groups, idx = first_in_group(values == best[gid], gid)
+    result[groups] = idx
+    return result
+
+
+def per_point(values, gid):
+    # Spread per group values over the points, a plain scalar for a single group
+    if values.shape[0] == 1:
+        return values[0]
+    return values[gid]
+
+
+def akl_toussaint_filter(coords, offsets):
+    # Mask of the points that can still be on the hull. The extreme points along
+    # x, y, x + y and x - y span an octagon (counter-clockwise) and every point
+    # strictly inside it is dropped.
+    gid = group_ids(offsets)
+    x = coords[:, 0]
+    y = coords[:, 1]
+    s = x + y
+    d = x - y
+    octagon = [group_extreme(x, gid, offsets),
+               group_extreme(s, gid, offsets),
+               group_extreme(y, gid, offsets),
+               group_extreme(d, gid, offsets, largest=True),
+               group_extreme(x, gid, offsets, largest=True),
+               group_extreme(s, gid, offsets, largest=True),
+               group_extreme(y, gid, offsets, largest=True),
+               group_extreme(d, gid, offsets)]
+    del s, d
+
+    inside = np.ones(coords.shape[0], dtype=bool)
+    collapsed = np.ones(offsets.shape[0] - 1, dtype=bool)
+    for k in range(8):
+        a = coords[octagon[k]]
+        b = coords[octagon[(k + 1) % 8]]
+        ex = b[:, 0] - a[:, 0]
+        ey = b[:, 1] - a[:, 1]
+        # Collapsed octagon edges do not constrain anything
+        flat = (ex == 0) & (ey == 0)
+        collapsed &= flat
+        side = ex * a[:, 1] - ey * a[:, 0]
+        inside &= ((per_point(ex, gid) * y - per_point(ey, gid) * x > per_point(side, gid)) |
+                   per_point(flat, gid))
+    # Nothing is strictly inside an octagon collapsed to a single point
+    inside &= ~per_point(collapsed, gid)
+    return ~inside
+
+
+def left_turns(x, y, gid, stall=8):
+    # Keep the points of every sorted chain that form strict left turns with
+    # their neighbours. Each pass drops all middle points that are on or to the
+    # right of the segment joining their neighbours, which are never hull
+    # vertices. Once a pass drops fewer than 1 / stall of the points the rest is
+    # finished with the sequential monotone chain stack.
+    keep = np.arange(x.shape[0])
+    while keep.shape[0] > 2:
+        kx, ky, kg = x[keep], y[keep], gid[keep]
+        turn = ((kx[1:-1] - kx[:-2]) * (ky[2:] - ky[1:-1]) -
+                (ky[1:-1] - ky[:-2]) * (kx[2:] - kx[1:-1]))
+        middle = (kg[:-2] == kg[1:-1]) & (kg[1:-1] == kg[2:])
+        drop = np.zeros(keep.shape[0], dtype=bool)
+        drop[1:-1] = middle & (turn <= 0)
+        dropped = np.count_nonzero(drop)
+        if dropped == 0:
+            return keep
+        keep = keep[~drop]
+        if dropped * stall < keep.shape[0]:
+            break
+    return monotone_chain_stack(keep, x, y, gid)
+
+
+def monotone_chain_stack(order, x, y, gid):
+    result = []
+    stack = []
+    group = None
+    for i in order.tolist():
+        g = gid[i]
+        if g != group:
+            result.extend(stack)
+            stack = []
+            group = g
+        while len(stack) >= 2:
+            a, b = stack[-2], stack[-1]
+            if (x[b] - x[a]) * (y[i] - y[b]) - (y[b] - y[a]) * (x[i] - x[b]) > 0:
+                break
+            stack.pop()
+        stack.append(i)
+    result.extend(stack)
+    return np.array(result, dtype=np.int64)
+
+
+def drop_chain_ends(chain, gid, keep_single):
+    cg = gid[chain]
+    last = np.ones(chain.shape[0], dtype=bool)
+    last[:-1] = cg[:-1] != cg[1:]
+    if keep_single:
+        first = np.ones(chain.shape[0], dtype=bool)
+        first[1:] = cg[1:] != cg[:-1]
+        last &= ~first
+    return chain[~last]
+
+
+def convex_hulls(coords, offsets, prefilter=True):
+    # Hull of every point set. Returns the hull vertices as indices into coords,
+    # counter-clockwise starting from the lowest leftmost point, and the offsets
+    # of each hull in that array. Duplicate and collinear points are dropped.
+    coords = np.asarray(coords, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    gid = group_ids(offsets)
+
+    candidates = np.arange(coords.shape[0])
+    if prefilter:
+        candidates = np.flatnonzero(akl_toussaint_filter(coords, offsets))
+
+    # Sort by set, then x, then y, and drop repeated points
+    x = coords[candidates, 0]
+    y = coords[candidates, 1]
+    g = gid[candidates]
+    order = np.lexsort((y, x, g))
+    candidates, x, y, g = candidates[order], x[order], y[order], g[order]
+    repeated = np.zeros(candidates.shape[0], dtype=bool)
+    repeated[1:] = (g[1:] == g[:-1]) & (x[1:] == x[:-1]) & (y[1:] == y[:-1])
+    candidates, x, y, g = candidates[~repeated], x[~repeated], y[~repeated], g[~repeated]
+
+    # Lower chain left to right, upper chain right to left
+    lower = left_turns(x, y, g)
+    upper = left_turns(x[::-1], y[::-1], g[::-1])
+    upper = candidates.shape[0] - 1 - upper
+
+    # Each chain ends where the other starts, so drop the last point of each.
+    # A set of a single point only keeps it in the lower chain.
+    lower = drop_chain_ends(lower, g, keep_single=True)
+    upper = drop_chain_ends(upper, g, keep_single=False)
+
+    vertices = np.concatenate([lower, upper])
+    rank = np.concatenate([np.zeros(lower.shape[0]), np.ones(upper.shape[0])])
+    order = np.lexsort((np.arange(vertices.shape[0]), rank, g[vertices]))
+    vertices = vertices[order]
+
+    sizes = np.bincount(g[vertices], minlength=offsets.shape[0] - 1)
+    hull_offsets = np.concatenate([[0], np.cumsum(sizes)])
+    return candidates[vertices], hull_offsets
+
+
+def convex_hull(points, prefilter=True):
+    # Hull vertices of one point set as indices into points, counter-clockwise
+    points = np.asarray(points, dtype=np.float64)
+    vertices, _ = convex_hulls(points, np.array([0, points.shape[0]]), prefilter)
+    return vertices
+
+
+def edge_keys(hull):
+    # Pseudo angles of the edges of a hull from convex_hull, counted from
+    # straight down, where its first (leftmost) vertex starts supporting, so they
+    # increase along the hull. A last edge running straight down closes the turn.
+    edges = np.roll(hull, -1, axis=0) - hull
+    keys = pseudo_angle(-edges[:, 1], edges[:, 0])
+    keys[keys == 0] = 4
+    return keys, edges
+
+
+def merge_hulls(points, first, second):
+    # Hull of the union of two hulls (vertex indices into points, in the order
+    # convex_hull returns them) in O(n + m), without looking at any other point.
+    # Two calipers turn together around both hulls, one edge direction at a
+    # time. Between two edge directions each hull touches its caliper at a
+    # single vertex and the outer of the two is on the merged hull. Where the
+    # outer one changes, the bridge between the hulls is an edge of the merged
+    # hull. The overlap of the hulls does not matter.
+    first = np.asarray(first, dtype=np.int64)
+    second = np.asarray(second, dtype=np.int64)
+    if first.shape[0] < 3 or second.shape[0] < 3:
+        both = np.concatenate([first, second])
+        return both[convex_hull(points[both], prefilter=False)]
+    p = points[first]
+    q = points[second]
+    keys_p, edges_p = edge_keys(p)
+    keys_q, edges_q = edge_keys(q)
+
+    # The caliper directions where either hull turns a corner, each with the
+    # vertex of both hulls touching the caliper just past it
+    bounds, where = np.unique(np.concatenate([[0.0], keys_p, keys_q]), return_index=True)
+    directions = np.concatenate([[[0.0, -1.0]], edges_p, edges_q])[where]
+    i = np.searchsorted(keys_p, bounds, side='right') % p.shape[0]
+    j = np.searchsorted(keys_q, bounds, side='right') % q.shape[0]
+
+    # The side of the caliper through q that p is on, at both ends of every
+    # stretch between two corners; p is outer where it is negative. Within a
+    # stretch (less than half a turn) the outer vertex changes at most once.
+    d = p[i] - q[j]
+    after = directions[:, 0] * d[:, 1] - directions[:, 1] * d[:, 0]
+    following = np.roll(directions, -1, axis=0)
+    before = following[:, 0] * d[:, 1] - following[:, 1] * d[:, 0]
+    p_after = np.where(after != 0, after < 0, before <= 0)
+    p_before = np.where(before != 0, before < 0, after <= 0)
+    outer = np.stack([np.where(p_after, first[i], second[j]), np.where(p_before, first[i], second[j])], axis=1).ravel()
+    repeated = outer == np.roll(outer, 1)
+    merged = outer[~repeated] if not repeated.all() else outer[:1]
+
+    # Vertices the merged hull runs straight through (or where both hulls share
+    # a point, once) are dropped, then start at the leftmost vertex again
+    merged = merged[clean_hull(points[merged])]
+    m = points[merged]
+    return np.roll(merged, -np.lexsort((m[:, 1], m[:, 0]))[0])
+
+
+def clean_hull(points, flat_tol=0.0):
+    # Indices of the vertices of a counter-clockwise hull that are neither a
+    # repeat of the vertex before them nor on the line through their two
+    # neighbours, which the sweeps need to close in a bounded number of steps.
+    # The output of convex_hull comes back unchanged. A hull collapsed onto a
+    # line keeps its two end points and one collapsed onto a point its first.
+    # With flat_tol > 0 vertices where the boundary turns by less than that
+    # (the sine of the angle) either way count as on the line too.
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    keep = np.arange(points.shape[0])
+    while keep.shape[0] > 1:
+        p = points[keep]
+        d = p - np.roll(p, 1, axis=0)
+        repeated = (d[:, 0] == 0) & (d[:, 1] == 0)
+        if repeated.all():
+            return keep[:1]
+        if repeated.any():
+            keep = keep[~repeated]
+            continue
+        if keep.shape[0] == 2:
+            break
+        following = np.roll(d, -1, axis=0)
+        turn = np.abs(d[:, 0] * following[:, 1] - d[:, 1] * following[:, 0])
+        if flat_tol > 0:
+            turn[turn <= flat_tol * np.hypot(d[:, 0], d[:, 1]) * np.hypot(following[:, 0], following[:, 1])] = 0
+        if (turn == 0).all():
+            # Every vertex on one line, only its two ends matter
+            order = np.lexsort((p[:, 1], p[:, 0]))
+            return np.sort(keep[[order[0], order[-1]]])
+        # Drop vertices the boundary runs straight through, never the tip of a
+        # spike where it doubles back
+        flat = (turn == 0) & (d[:, 0] * following[:, 0] + d[:, 1] * following[:, 1] > 0)
+        if not flat.any():
+            break
+        keep = keep[~flat]
+    return keep
+
+
+def check_convex(points):
+    # SweepError unless a clean hull turns left at every vertex
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if points.shape[0] < 3:
+        return
+    d = points - np.roll(points, 1, axis=0)
+    following = np.roll(d, -1, axis=0)
+    turn = d[:, 0] * following[:, 1] - d[:, 1] * following[:, 0]
+    # A convex polygon also turns exactly once around
+    winding = np.arctan2(turn, d[:, 0] * following[:, 0] + d[:, 1] * following[:, 1]).sum()
+    if (turn <= 0).any() or winding > 3 * np.pi:
+        raise SweepError('Expected a counter-clockwise convex polygon')
+
+
+def sweep_hull(points, compute_hull=False, watchdog=False):
+    # The hull a caliper sweep runs on: the hull of points with compute_hull,
+    # otherwise points itself without repeated or collinear vertices. With
+    # watchdog that has to be a counter-clockwise convex polygon.
+    points = np.asarray(points)
+    if compute_hull:
+        return points[convex_hull(points)]
+    keep = clean_hull(points)
+    if keep.shape[0] != points.shape[0]:
+        points = points[keep]
+    if watchdog:
+        check_convex(points)
+    return points
@@ -0,0 +1,66 @@
+import numpy as np
+from rotating_calipers.hull import clean_hull, convex_hull
+from rotating_calipers.supports import edge_table, lookup_supports, quadrant_fraction
+
+# Extent of one hull along arbitrary directions, e.g. many sensor headings.
+# The edge directions are sorted by pseudo angle once (supports.edge_table),
+# after which the vertex touching a caliper at any angle is one binary search
+# away: support points, widths and oriented boxes cost O(log n) per angle
+# instead of a sweep or a projection of every vertex. Every query takes a
+# scalar angle or an array of them (radians, counter-clockwise from +x) and
+# answers all of them with array operations.
+
+
+class HullIndex:
+    def __init__(self, points, compute_hull=False):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if points.shape[0] == 0:
+            raise ValueError('A hull index needs at least one point')
+        # Indices into points of the hull vertices, counter-clockwise
+        self.vertices = convex_hull(points) if compute_hull else clean_hull(points)
+        self.hull = points[self.vertices]
+        self.offsets = np.array([0, self.hull.shape[0]])
+        _, _, _, _, self.order, self.sorted_keys = edge_table(self.hull, self.offsets)
+
+    def lookup(self, angles, turns=0):
+        # Hull vertex farthest along every angle turned by `turns` quarter turns.
+        # Quarter turns only change the quadrant, so they stay exact.
+        angles = np.asarray(angles, dtype=np.float64)
+        quadrants, fractions = quadrant_fraction(np.cos(angles), np.sin(angles))
+        return lookup_supports(self.order, self.sorted_keys, self.offsets, np.zeros(angles.shape, dtype=np.int64),
+                               (quadrants + turns) % 4, fractions)
+
+    def support(self, angles):
+        # Index into points of the vertex farthest along every angle, and its
+        # coordinates (shape of angles plus (2,))
+        k = self.lookup(angles)
+        return self.vertices[k], self.hull[k]
+
+    def extent(self, angles, turns=0):
+        # Smallest and largest projection of the hull on every angle turned by
+        # `turns` quarter turns
+        angles = np.asarray(angles, dtype=np.float64)
+        u = np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+        for _ in range(turns % 4):
+            u = np.stack([-u[..., 1], u[..., 0]], axis=-1)
+        high = (self.hull[self.lookup(angles, turns)] * u).sum(axis=-1)
+        low = (self.hull[self.lookup(angles, turns + 2)] * u).sum(axis=-1)
+        return low, high
+
+    def width(self, angles):
+        # Width of the hull measured along every angle: the distance between
+        # the two caliper lines perpendicular to it
+        low, high = self.extent(angles)
+        return high - low
+
+    def oriented_box(self, angles):
+        # Smallest box with sides along every angle and across it: corners
+        # (shape of angles plus (4, 2)) counter-clockwise, and areas
+        angles = np.asarray(angles, dtype=np.float64)
+        u = np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+        v = np.stack([-u[..., 1], u[..., 0]], axis=-1)
+        a0, a1 = self.extent(angles)
+        b0, b1 = self.extent(angles, 1)
+        corners = np.stack([a0[..., None] * u + b0[..., None] * v, a1[..., None] * u + b0[..., None] * v,
+                            a1[..., None] * u + b1[..., None] * v, a0[..., None] * u + b1[..., None] * v], axis=-2)
+        return corners, (a1 - a0) * (b1 - b0)
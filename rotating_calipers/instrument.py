@@ -0,0 +1,77 @@
+import time
+from contextlib import nullcontext
+
+# Opt-in instrumentation for the algorithm entry points. Pass a SweepStats as
+# `stats=` to record how many caliper steps a call took, how many of them were
+# ties (parallel edges on two calipers), how big the hulls were and where the
+# time went. Without it every sweep step pays for a single `is None` check.
+PHASES = ('hull', 'sweep', 'scoring')
+
+NOT_TIMED = nullcontext()
+
+
+class SweepStats:
+    # Counters add up over every call the object is passed to, reset() starts
+    # over. The vectorized entry points do not step calipers one at a time,
+    # their `steps` is the number of candidate caliper positions they evaluate.
+    #
+    # Phases: 'hull' is building the convex hull (compute_hull only), 'sweep'
+    # is moving the calipers (or the vectorized support lookups) and 'scoring'
+    # is turning caliper positions into rectangles, distances or areas.
+    def __init__(self, callback=None):
+        # callback(stats_dict) is called at the end of every instrumented call
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.steps = 0
+        self.ties = 0
+        self.hulls = 0
+        self.hull_vertices = 0
+        self.times = dict.fromkeys(PHASES, 0.0)
+
+    def timed(self, phase):
+        return PhaseTimer(self, phase)
+
+    def count_step(self, tied, start):
+        self.steps += 1
+        self.ties += len(tied)
+        self.times['sweep'] += time.perf_counter() - start
+
+    def count_hulls(self, vertices, hulls=1):
+        self.hulls += hulls
+        self.hull_vertices += vertices
+
+    def finish(self):
+        self.calls += 1
+        if self.callback is not None:
+            self.callback(self.as_dict())
+
+    def as_dict(self):
+        result = {'calls': self.calls, 'steps': self.steps, 'ties': self.ties, 'hulls': self.hulls,
+                  'hull_vertices': self.hull_vertices}
+        for phase in PHASES:
+            result[phase + '_time'] = self.times[phase]
+        return result
+
+
+class PhaseTimer:
+    def __init__(self, stats, phase):
+        self.stats = stats
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.stats.times[self.phase] += time.perf_counter() - self.start
+        return False
+
+
+def timed(stats, phase):
+    # `with timed(stats, 'hull'):` adds the time of the block to a phase, or does
+    # nothing when stats is None
+    if stats is None:
+        return NOT_TIMED
+    return stats.timed(phase)
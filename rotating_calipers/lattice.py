@@ -0,0 +1,137 @@
+from fractions import Fraction
+import numpy as np
+from diameter.diameter import scalar_diameter
+from maxdist.maxdist import scalar_max_distance
+from minimum_area_rectangle.minimum_area_rectangle import scalar_min_area, scalar_rectangle
+from rotating_calipers.dispatch import use_scalar
+from rotating_calipers.hull import convex_hull
+from rotating_calipers.instrument import timed
+from rotating_calipers.supports import opposite_pairs
+
+# Exact results for points on an integer grid (pixel masks, quantized tiles).
+# Every caliper decision is an integer cross or dot product, squared distances
+# and doubled areas come out as Python ints and rectangle areas as Fractions,
+# so results are the same bit for bit on every machine.
+#
+# Hulls of at most LATTICE_LIMIT in every coordinate are built and looked up on
+# float64: every cross product of the hull is an integer below 2**53, and the
+# support lookup keys of distinct edge directions stay apart, so both are
+# exact. Large hulls then score their pairs in int64. Larger coordinates need a
+# counter-clockwise hull as input and run the scalar kernels on Python ints,
+# which never overflow.
+LATTICE_LIMIT = 1 << 22
+
+
+def lattice_points(points):
+    # (N, 2) int64 copy of points, which must all be integers
+    points = np.asarray(points)
+    if points.dtype.kind == 'f':
+        if not np.all(np.isfinite(points)) or np.any(points != np.round(points)):
+            raise ValueError('Lattice points need integer coordinates')
+        if points.size and np.abs(points).max() >= 2.0 ** 63:
+            raise ValueError('Lattice coordinates must fit in int64')
+    elif points.dtype.kind not in 'iub':
+        raise ValueError('Lattice points need integer coordinates, got ' + str(points.dtype))
+    return points.astype(np.int64).reshape(-1, 2)
+
+
+def within_limit(points):
+    return points.size == 0 or np.abs(points).max() <= LATTICE_LIMIT
+
+
+def lattice_hull(points, compute_hull, stats):
+    # Integer points and the indices of their hull vertices
+    points = lattice_points(points)
+    vertices = np.arange(points.shape[0])
+    if compute_hull:
+        if not within_limit(points):
+            raise ValueError('compute_hull needs coordinates of at most %d, pass a hull instead' % LATTICE_LIMIT)
+        with timed(stats, 'hull'):
+            vertices = convex_hull(points)
+    else:
+        # Repeated vertices stall the scalar calipers on a zero-length edge.
+        # Compared on the integers, clean_hull would round large ones.
+        hull = points[vertices]
+        repeated = np.all(hull == np.roll(hull, 1, axis=0), axis=1)
+        if repeated.any():
+            vertices = vertices[~repeated] if not repeated.all() else vertices[:1]
+    if stats is not None:
+        stats.count_hulls(vertices.shape[0])
+    return points, vertices
+
+
+def exact_diameter(points, compute_hull=False, stats=None):
+    # Farthest pair of vertices as indices into points and its exact squared length
+    points, vertices = lattice_hull(points, compute_hull, stats)
+    hull = points[vertices]
+    n = hull.shape[0]
+    with timed(stats, 'sweep'):
+        if n < 3 or use_scalar('diameter', n) or not within_limit(hull):
+            i, j, dist_sq = scalar_diameter(hull.tolist())
+        else:
+            offsets = np.array([0, n])
+            first, second, _ = opposite_pairs(hull.astype(np.float64), offsets, hull.astype(np.float64), offsets)
+            d = hull[first] - hull[second]
+            lengths = d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]
+            best = int(np.argmax(lengths))
+            i, j, dist_sq = int(first[best]), int(second[best]), int(lengths[best])
+    if stats is not None:
+        stats.steps += n
+        stats.finish()
+    i, j = int(vertices[i]), int(vertices[j])
+    return min(i, j), max(i, j), dist_sq
+
+
+def exact_max_distance(points1, points2, compute_hull=False, stats=None):
+    # Farthest pair between two hulls as indices into points1 and points2 and
+    # its exact squared length
+    points1, vertices1 = lattice_hull(points1, compute_hull, stats)
+    points2, vertices2 = lattice_hull(points2, compute_hull, stats)
+    hull1 = points1[vertices1]
+    hull2 = points2[vertices2]
+    n, m = hull1.shape[0], hull2.shape[0]
+    with timed(stats, 'sweep'):
+        if use_scalar('maxdist', max(n, m)) or not (within_limit(hull1) and within_limit(hull2)):
+            i, j, dist_sq = scalar_max_distance(hull1.tolist(), hull2.tolist())
+        else:
+            first, second, _ = opposite_pairs(hull1.astype(np.float64), np.array([0, n]),
+                                              hull2.astype(np.float64), np.array([0, m]))
+            d = hull1[first] - hull2[second]
+            lengths = d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]
+            best = int(np.argmax(lengths))
+            i, j, dist_sq = int(first[best]), int(second[best]), int(lengths[best])
+    if stats is not None:
+        stats.steps += n + m
+        stats.finish()
+    return int(vertices1[i]), int(vertices2[j]), dist_sq
+
+
+def exact_min_area_rectangle(points, compute_hull=False, stats=None):
+    # min_area_rectangle with the edge chosen by exact comparisons: the
+    # rectangle (float corners), its area as a Fraction, its angle and the
+    # index in points of the vertex where the hull edge it is flush with starts
+    points, vertices = lattice_hull(points, compute_hull, stats)
+    hull = points[vertices].tolist()
+    if len(hull) < 3:
+        raise ValueError('A rectangle needs a hull of at least three vertices')
+    with timed(stats, 'sweep'):
+        best, numerator, length_sq, far, top, near = scalar_min_area(hull, exact=True)
+    with timed(stats, 'scoring'):
+        rect, angle = scalar_rectangle(hull, best, far, top, near)
+    if stats is not None:
+        stats.steps += len(hull)
+        stats.finish()
+    return np.array(rect, dtype=np.float64), Fraction(numerator, length_sq), angle, int(vertices[best])
+
+
+def doubled_area(points, compute_hull=False):
+    # Twice the area of a counter-clockwise hull (or of the hull of points),
+    # an exact integer
+    points, vertices = lattice_hull(points, compute_hull, None)
+    hull = points[vertices].tolist()
+    total = 0
+    for k in range(len(hull)):
+        a = hull[k - 1]
+        b = hull[k]
+        total += a[0] * b[1] - a[1] * b[0]
+    return total
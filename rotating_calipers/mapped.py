@@ -0,0 +1,58 @@
+import numpy as np
+from rotating_calipers.hull import convex_hull
+from rotating_calipers.instrument import timed
+from rotating_calipers.metrics import METRICS, compute_metrics
+
+# Hull and metrics of point sets too big for memory. The points stay in a file
+# (.npy, or raw binary x, y pairs) that is memory mapped and read one chunk at a
+# time; only the hull of everything read so far is carried to the next chunk,
+# so memory stays around the chunk size plus the hull size.
+
+# Points read per chunk
+CHUNK_SIZE = 1 << 20
+
+
+def open_points(path, dtype=np.float64, offset=0):
+    # Read only (N, 2) memory map of a .npy file, or of a raw file of x, y pairs
+    # of the given dtype starting `offset` bytes in
+    if str(path).endswith('.npy'):
+        points = np.load(path, mmap_mode='r')
+    else:
+        points = np.memmap(path, dtype=dtype, mode='r', offset=offset)
+        if points.shape[0] % 2:
+            raise ValueError('A raw point file needs an even number of values')
+        points = points.reshape(-1, 2)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError('Expected (N, 2) points, got shape ' + str(points.shape))
+    return points
+
+
+def hull_from_file(path, chunk_size=CHUNK_SIZE, dtype=np.float64, offset=0, stats=None):
+    # Convex hull of all the points in the file, counter-clockwise. Returns the
+    # hull vertices as row numbers in the file and their coordinates.
+    points = open_points(path, dtype, offset)
+    rows = np.zeros(0, dtype=np.int64)
+    hull = np.zeros((0, 2))
+    with timed(stats, 'hull'):
+        for start in range(0, points.shape[0], chunk_size):
+            chunk = np.asarray(points[start:start + chunk_size], dtype=np.float64)
+            candidates = np.concatenate([hull, chunk])
+            vertices = convex_hull(candidates)
+            rows = np.concatenate([rows, np.arange(start, start + chunk.shape[0])])[vertices]
+            hull = candidates[vertices]
+            del chunk, candidates
+    return rows, hull
+
+
+def metrics_from_file(path, metrics=METRICS, chunk_size=CHUNK_SIZE, dtype=np.float64, offset=0, stats=None):
+    # compute_metrics over all the points in the file, from one caliper pass
+    # over the hull built chunk by chunk. Vertex numbers in the result (width)
+    # are row numbers in the file.
+    rows, hull = hull_from_file(path, chunk_size, dtype, offset, stats)
+    if hull.shape[0] == 0:
+        raise ValueError('No points in ' + str(path))
+    result = compute_metrics(hull, metrics, stats=stats)
+    if 'width' in result:
+        width, edge, opposite = result['width']
+        result['width'] = (width, int(rows[edge]), int(rows[opposite]))
+    return result
@@ -0,0 +1,124 @@
+import math
+import numpy as np
+from rotating_calipers.engine import CaliperSweep, box_calipers, check_closed, cross, dot
+from rotating_calipers.hull import check_convex, clean_hull, convex_hull
+from rotating_calipers.instrument import timed
+
+# Diameter, width and the minimum area and minimum perimeter rectangles from one
+# rotating calipers pass. Four box calipers turning through 90 degrees see every
+# hull edge flush with one of them exactly once, and the opposite pairs (1, 3)
+# and (2, 4) between them visit every antipodal vertex pair.
+METRICS = ('diameter', 'width', 'area', 'perimeter')
+
+
+def compute_metrics(points, metrics=METRICS, compute_hull=False, stats=None, watchdog=False):
+    # Returns a dict with an entry per requested metric:
+    #   diameter:  (p, q, length) of the farthest pair of hull vertices
+    #   width:     (width, edge, opposite) where the hull edge from vertex `edge`
+    #              to the following vertex and vertex `opposite` touch the
+    #              closest pair of parallel lines
+    #   area:      (rectangle, area) of the minimum area bounding rectangle
+    #   perimeter: (rectangle, perimeter) of the minimum perimeter bounding rectangle
+    # Vertex indices refer to points. stats is an optional SweepStats. Repeated
+    # and collinear hull vertices are dropped first, and the sweep stops after
+    # n + 4 steps; with watchdog one that has not closed by then raises SweepError.
+    unknown = set(metrics) - set(METRICS)
+    if unknown:
+        raise ValueError('Unknown metrics: ' + ', '.join(sorted(unknown)))
+    want_diameter = 'diameter' in metrics
+    want_width = 'width' in metrics
+    want_area = 'area' in metrics
+    want_perimeter = 'perimeter' in metrics
+
+    points = np.asarray(points)
+    with timed(stats, 'hull'):
+        vertices = convex_hull(points) if compute_hull else clean_hull(points)
+        if watchdog and not compute_hull:
+            check_convex(points[vertices])
+    hull = points[vertices].tolist()
+    if stats is not None:
+        stats.count_hulls(len(hull))
+
+    sweep = CaliperSweep(box_calipers(hull), stats=stats)
+    calipers = sweep.calipers
+
+    best_pair = None
+    best_dist = -1.0
+    best_width = None
+    best_area = None
+    best_perimeter = None
+
+    def visit_pair(i, j):
+        nonlocal best_pair, best_dist
+        p, q = hull[i], hull[j]
+        dist = (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2
+        if dist > best_dist:
+            best_dist = dist
+            best_pair = (i, j)
+
+    def visit_state():
+        nonlocal best_area, best_perimeter
+        if want_diameter:
+            visit_pair(calipers[0].idx, calipers[2].idx)
+            visit_pair(calipers[1].idx, calipers[3].idx)
+        if not (want_area or want_perimeter):
+            return
+        # Side lengths times |d|: the caliper pairs (1, 3) and (2, 4) are
+        # parallel and perpendicular to the sweep direction d
+        d = sweep.direction
+        p1, p2, p3, p4 = (c.point() for c in calipers)
+        across = abs(cross(d, (p3[0] - p1[0], p3[1] - p1[1])))
+        along = abs(dot(d, (p4[0] - p2[0], p4[1] - p2[1])))
+        length_sq = dot(d, d)
+        if want_area:
+            area = across * along / length_sq
+            if best_area is None or area < best_area[1]:
+                best_area = (sweep.rectangle(), area)
+        if want_perimeter:
+            perimeter = 2 * (across + along) / math.sqrt(length_sq)
+            if best_perimeter is None or perimeter < best_perimeter[1]:
+                best_perimeter = (sweep.rectangle(), perimeter)
+
+    visit_state()
+    for _ in range(len(hull) + 4):
+        previous = [c.idx for c in calipers]
+        moved, tied = sweep.step()
+        # Edges that only become flush at exactly 90 degrees still count
+        if moved is None or sweep.turned_past(1):
+            break
+
+        if want_width:
+            # The caliper that moved is flush with the edge it just walked over
+            opposite = calipers[(moved + 2) % 4]
+            p = calipers[moved].point()
+            q = opposite.point()
+            d = sweep.caliper_direction(moved)
+            width = abs(cross(d, (q[0] - p[0], q[1] - p[1]))) / math.sqrt(dot(d, d))
+            if best_width is None or width < best_width[0]:
+                best_width = (width, calipers[moved].idx, opposite.idx)
+
+        if want_diameter and (moved + 2) % 4 in tied:
+            # Parallel edges on both sides, the next move of the opposite caliper
+            # skips the pair of the old anchor and the new opposite vertex
+            visit_pair(previous[moved], calipers[(moved + 2) % 4].next_idx())
+
+        visit_state()
+    else:
+        check_closed('metrics', len(hull) + 4, len(hull), watchdog)
+
+    if stats is not None:
+        stats.finish()
+
+    result = {}
+    if want_diameter:
+        i, j = best_pair
+        result['diameter'] = (points[vertices[i]], points[vertices[j]], math.sqrt(best_dist))
+    if want_width:
+        # A single point has no edge, its width is zero
+        width, edge, opposite = best_width or (0.0, 0, 0)
+        result['width'] = (width, int(vertices[edge]), int(vertices[opposite]))
+    if want_area:
+        result['area'] = (np.array(best_area[0]), best_area[1])
+    if want_perimeter:
+        result['perimeter'] = (np.array(best_perimeter[0]), best_perimeter[1])
+    return result
@@ -0,0 +1,57 @@
+import os
+from multiprocessing import get_context, shared_memory
+import numpy as np
+from rotating_calipers.batch import share, view
+from rotating_calipers.hull import convex_hull, merge_hulls
+
+# Convex hull of one very large point set on a process pool. The points are
+# copied once into shared memory and split into shards of consecutive rows,
+# every worker builds the hull of its shard, and the shard hulls are merged
+# pairwise with merge_hulls, which only looks at hull vertices. Shards may
+# overlap anywhere in the plane, so the points need no sorting first.
+MIN_SHARD = 1 << 16
+
+
+def shard_vertices(shm, spec, start, stop, prefilter):
+    # The view must not outlive this call, see batch.fill_chunk
+    return convex_hull(view(shm, spec)[start:stop], prefilter) + start
+
+
+def hull_worker(spec, start, stop, prefilter):
+    shm = shared_memory.SharedMemory(name=spec[0])
+    try:
+        return shard_vertices(shm, spec, start, stop, prefilter)
+    finally:
+        shm.close()
+
+
+def merge_all(points, hulls):
+    # Pairwise rounds, so every vertex takes part in O(log shards) merges
+    while len(hulls) > 1:
+        hulls = [merge_hulls(points, hulls[k], hulls[k + 1]) if k + 1 < len(hulls) else hulls[k]
+                 for k in range(0, len(hulls), 2)]
+    return hulls[0]
+
+
+def parallel_convex_hull(points, workers=None, shards=None, prefilter=True):
+    # Same as convex_hull(points): the hull vertices as indices into points,
+    # counter-clockwise from the leftmost one. workers defaults to the CPU count
+    # and shards to one per worker, each at least MIN_SHARD points; smaller
+    # inputs are not worth starting a pool for.
+    points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+    count = points.shape[0]
+    workers = workers or os.cpu_count() or 1
+    shards = min(shards or workers, count // MIN_SHARD)
+    if workers == 1 or shards <= 1:
+        return convex_hull(points, prefilter)
+    bounds = np.linspace(0, count, shards + 1).astype(np.int64)
+
+    shm, spec = share(points)
+    try:
+        tasks = [(spec, int(start), int(stop), prefilter) for start, stop in zip(bounds[:-1], bounds[1:])]
+        with get_context().Pool(min(workers, shards)) as pool:
+            hulls = pool.starmap(hull_worker, tasks, chunksize=1)
+    finally:
+        shm.close()
+        shm.unlink()
+    return merge_all(points, hulls)
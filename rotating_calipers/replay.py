@@ -0,0 +1,150 @@
+import argparse
+import os
+import sys
+import numpy as np
+from matplotlib import animation
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.image import imsave
+from rotating_calipers.trace import read_trace
+
+# Replays a sweep trace (rotating_calipers.trace) with blitting: the hulls are
+# drawn once as the background and every state only updates the data of a few
+# animated artists, so traces of thousands of states play smoothly. Headless
+# export writes PNG frames or a video without any GUI backend.
+#
+#   python -m rotating_calipers.replay sweep.trace
+#   python -m rotating_calipers.replay sweep.trace --frames frames/ --every 10
+#   python -m rotating_calipers.replay sweep.trace --video sweep.gif --fps 30
+
+HULL_COLORS = ('magenta', 'blue')
+
+
+class Replay:
+    # Artists for one trace on a figure, created once and moved to state k by
+    # update(k)
+    def __init__(self, trace, fig):
+        self.trace = trace
+        self.fig = fig
+        self.ax = fig.add_subplot(111)
+        self.ax.set_aspect(1)
+        self.ax.set_xticks([])
+        self.ax.set_yticks([])
+        for hull, color in zip(trace.hulls, HULL_COLORS):
+            closed = np.concatenate([hull, hull[:1]])
+            self.ax.plot(closed[:, 0], closed[:, 1], '-o', color=color, markersize=2)
+        points = np.concatenate(trace.hulls)
+        low, high = points.min(axis=0), points.max(axis=0)
+        pad = 0.75 * (high - low).max() + 1e-9
+        self.ax.set_xlim(low[0] - pad, high[0] + pad)
+        self.ax.set_ylim(low[1] - pad, high[1] + pad)
+
+        # Everything drawn per state, computed for all states up front
+        self.boxes = trace.rectangles()
+        self.pairs = trace.pairs()
+        if self.pairs is None:
+            sides = np.linalg.norm(np.diff(self.boxes[:, 0, :3], axis=1), axis=2)
+            self.values = sides[:, 0] * sides[:, 1]
+            self.best = np.minimum.accumulate(self.values)
+            self.label = 'Area: {0:.4}, smallest {1:.4}'
+        else:
+            self.values = np.linalg.norm(self.pairs[:, 0] - self.pairs[:, 1], axis=1)
+            if trace.edge_pairs is not None:
+                has_edge = trace.edge_pairs[:, 0] >= 0
+                edge = trace.hulls[0][trace.edge_pairs[has_edge]]
+                edge_lengths = np.linalg.norm(edge[:, 0] - edge[:, 1], axis=1)
+                self.values[has_edge] = np.maximum(self.values[has_edge], edge_lengths)
+            self.best = np.maximum.accumulate(self.values)
+            self.label = 'Pair Distance: {0:.4}, largest {1:.4}'
+
+        self.box_lines = [self.ax.plot([], [], '-', color='r', animated=True)[0] for _ in range(self.boxes.shape[1])]
+        self.pair_line = self.ax.plot([], [], ':', color='black', animated=True)[0]
+        self.edge_line = self.ax.plot([], [], ':', color='black', animated=True)[0]
+        self.text = self.ax.text(0.02, 0.95, '', transform=self.ax.transAxes, fontsize=12, animated=True)
+
+    def artists(self):
+        return self.box_lines + [self.pair_line, self.edge_line, self.text]
+
+    def update(self, k):
+        for r, line in enumerate(self.box_lines):
+            box = self.boxes[k, r]
+            line.set_data(np.append(box[:, 0], box[0, 0]), np.append(box[:, 1], box[0, 1]))
+        if self.pairs is not None:
+            self.pair_line.set_data(self.pairs[k, :, 0], self.pairs[k, :, 1])
+        edge_pairs = self.trace.edge_pairs
+        if edge_pairs is not None and edge_pairs[k, 0] >= 0:
+            edge = self.trace.hulls[0][edge_pairs[k]]
+            self.edge_line.set_data(edge[:, 0], edge[:, 1])
+        else:
+            self.edge_line.set_data([], [])
+        self.text.set_text(self.label.format(self.values[k], self.best[k]))
+        return self.artists()
+
+
+def show(trace, interval=50, every=1):
+    # Play every `every`-th state of the trace in a window, interval
+    # milliseconds per state
+    import matplotlib.pyplot as plt
+    replay = Replay(trace, plt.figure())
+    anim = animation.FuncAnimation(replay.fig, replay.update, frames=range(0, len(trace), every),
+                                   interval=interval, blit=True, repeat=False)
+    plt.show()
+    return anim
+
+
+def headless_replay(trace, size, dpi):
+    fig = Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(fig)
+    return Replay(trace, fig)
+
+
+def export_frames(trace, directory, every=1, size=(8, 6), dpi=100):
+    # Every `every`-th state as a PNG in directory, blitted onto a background
+    # rendered once. Returns the file names.
+    replay = headless_replay(trace, size, dpi)
+    canvas = replay.fig.canvas
+    canvas.draw()
+    background = canvas.copy_from_bbox(replay.fig.bbox)
+    os.makedirs(directory, exist_ok=True)
+    names = []
+    for k in range(0, len(trace), every):
+        canvas.restore_region(background)
+        for artist in replay.update(k):
+            replay.ax.draw_artist(artist)
+        name = os.path.join(directory, 'frame_%06d.png' % k)
+        imsave(name, np.asarray(canvas.buffer_rgba()))
+        names.append(name)
+    return names
+
+
+def export_video(trace, path, fps=25, every=1, size=(8, 6), dpi=100):
+    # Every `every`-th state as a video: GIF through Pillow, anything else
+    # (e.g. .mp4) through ffmpeg
+    replay = headless_replay(trace, size, dpi)
+    writer = animation.PillowWriter(fps=fps) if str(path).endswith('.gif') else animation.FFMpegWriter(fps=fps)
+    anim = animation.FuncAnimation(replay.fig, replay.update, frames=range(0, len(trace), every), blit=True)
+    anim.save(path, writer=writer)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m rotating_calipers.replay',
+                                     description='Replay a sweep trace, or export it as frames or a video.')
+    parser.add_argument('trace')
+    parser.add_argument('--frames', help='directory for PNG frames')
+    parser.add_argument('--video', help='.gif, or a format ffmpeg writes (e.g. .mp4)')
+    parser.add_argument('--every', type=int, default=1, help='only every n-th state')
+    parser.add_argument('--fps', type=int, default=25)
+    parser.add_argument('--interval', type=int, default=50, help='milliseconds per state in the window')
+    args = parser.parse_args(argv)
+    trace = read_trace(args.trace)
+    if args.frames:
+        export_frames(trace, args.frames, args.every)
+    if args.video:
+        export_video(trace, args.video, args.fps, args.every)
+    if not (args.frames or args.video):
+        show(trace, args.interval, args.every)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
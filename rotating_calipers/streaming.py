@@ -0,0 +1,312 @@
+import heapq
+from bisect import bisect_left, bisect_right
+import numpy as np
+from rotating_calipers.hull import convex_hull
+from rotating_calipers.supports import pseudo_angle
+
+# Convex hull, diameter and minimum area rectangle of a point set that keeps
+# growing. The hull is kept counter-clockwise from its lowest leftmost vertex,
+# so the edge directions are sorted and the vertex any caliper touches is a
+# binary search away. Every hull edge carries the rectangle flush with it and
+# its antipodal pairs, and a new hull vertex only rescores the edges whose
+# calipers it now touches.
+
+
+def edge_key(dx, dy):
+    # Same quadrant and fraction as supports.quadrant_fraction, as a tuple so
+    # that quarter turns compare exactly
+    if dy > 0:
+        quadrant = 0 if dx > 0 else 1
+    elif dx < 0:
+        quadrant = 2
+    elif dy < 0:
+        quadrant = 3
+    else:
+        quadrant = 0
+    s = abs(dx) + abs(dy)
+    if s == 0:
+        return 0, 0.0
+    return quadrant, (abs(dy) if quadrant % 2 == 0 else abs(dx)) / s
+
+
+def turned(key, quarters):
+    return (key[0] + quarters) % 4, key[1]
+
+
+def lowest(vertices):
+    # Index of the lowest leftmost vertex, where the sorted edge directions start
+    return min(range(len(vertices)), key=lambda i: (vertices[i][1], vertices[i][0]))
+
+
+def cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+class StreamingHull:
+    # Feed points with add_point or add_points and read hull(), diameter() and
+    # min_area_rectangle() at any time. Points inside the current hull only cost
+    # an O(log n) containment test (vectorized for batches).
+    def __init__(self, points=None):
+        self.vertices = []  # hull vertices as (x, y) tuples
+        self.keys = []      # direction key of the edge leaving each vertex
+        self.ids = []       # stable id of each vertex
+        self.next_id = 0
+        self.records = {}   # vertex id -> score of the edge leaving it
+        self.next_seq = 0
+        self.area_heap = []
+        self.diameter_heap = []
+        if points is not None:
+            self.add_points(points)
+
+    def hull(self):
+        return np.array(self.vertices, dtype=np.float64).reshape(-1, 2)
+
+    def diameter(self):
+        # (p, q, length) of the farthest pair of points seen so far
+        n = len(self.vertices)
+        if n == 0:
+            return None
+        if n < 3:
+            p, q = self.vertices[0], self.vertices[-1]
+            return np.array(p), np.array(q), float(np.hypot(p[0] - q[0], p[1] - q[1]))
+        record = self.best(self.diameter_heap)
+        p, q = record[4]
+        return np.array(p), np.array(q), float(np.sqrt(record[3]))
+
+    def min_area_rectangle(self):
+        # (rectangle corners (4, 2), area) of the smallest enclosing rectangle
+        n = len(self.vertices)
+        if n == 0:
+            return None
+        if n < 3:
+            p, q = self.vertices[0], self.vertices[-1]
+            return np.array([p, q, q, p], dtype=np.float64), 0.0
+        record = self.best(self.area_heap)
+        ex, ey, lo, hi, base, height = record[2]
+        length_sq = ex * ex + ey * ey
+        rect = [((s * ex - t * ey) / length_sq, (s * ey + t * ex) / length_sq)
+                for s, t in ((lo, base), (hi, base), (hi, height), (lo, height))]
+        return np.array(rect), record[1]
+
+    def best(self, heap):
+        # Top of a heap, dropping entries of edges that were rescored or removed
+        while True:
+            _, seq, vertex_id = heap[0]
+            record = self.records.get(vertex_id)
+            if record is not None and record[0] == seq:
+                return record
+            heapq.heappop(heap)
+
+    def add_point(self, point):
+        # Returns True when the hull changed
+        p = (float(point[0]), float(point[1]))
+        n = len(self.vertices)
+        if n < 3:
+            before = set(self.vertices)
+            self.rebuild(self.vertices + [p])
+            return set(self.vertices) != before
+
+        visible = self.visible_edge(p)
+        if visible is None:
+            return False
+        self.insert(p, visible)
+        return True
+
+    def add_points(self, points):
+        # Returns the number of points that changed the hull. A batch with many
+        # points outside the hull is merged with one hull computation instead.
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(self.vertices) >= 3:
+            points = points[~self.contains(points)]
+        if len(self.vertices) < 3 or points.shape[0] > max(64, len(self.vertices) // 4):
+            before = set(self.vertices)
+            self.rebuild(self.vertices + [tuple(p) for p in points.tolist()])
+            return len(set(self.vertices) - before)
+        return sum(self.add_point(p) for p in points.tolist())
+
+    def contains(self, points):
+        # Mask of the points that are certainly inside or on the hull. Each point
+        # is placed in a wedge of the fan around vertex 0 by angle, then the
+        # wedge and the hull edge closing it are checked exactly; points the
+        # angle lookup got wrong fall through to add_point.
+        hull = self.hull()
+        n = hull.shape[0]
+        rays = hull[1:] - hull[0]
+        rel = points - hull[0]
+        k = np.searchsorted(pseudo_angle(rays[:, 0], rays[:, 1]), pseudo_angle(rel[:, 0], rel[:, 1]), side='right')
+        k = np.clip(k, 1, n - 2)
+        a, b = rays[k - 1], rays[k]
+        after_a = a[:, 0] * rel[:, 1] - a[:, 1] * rel[:, 0] >= 0
+        before_b = b[:, 0] * rel[:, 1] - b[:, 1] * rel[:, 0] <= 0
+        e = b - a
+        r = rel - a
+        return after_a & before_b & (e[:, 0] * r[:, 1] - e[:, 1] * r[:, 0] >= 0)
+
+    def visible_edge(self, p):
+        # Index of a hull edge that has p strictly on its outer side, or None
+        # when p is inside or on the hull. Binary search over the fan of
+        # triangles around vertex 0.
+        v = self.vertices
+        n = len(v)
+        if cross(v[0], v[1], p) < 0:
+            return 0
+        if cross(v[0], v[n - 1], p) > 0:
+            return n - 1
+        lo, hi = 1, n - 1
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if cross(v[0], v[mid], p) >= 0:
+                lo = mid
+            else:
+                hi = mid
+        if cross(v[lo], v[hi], p) < 0:
+            return lo
+        return None
+
+    def insert(self, p, visible):
+        # Replace the chain of vertices p can see by p itself. Edges with p on
+        # their line count as visible too, their inner vertex ends up collinear.
+        v = self.vertices
+        n = len(v)
+        start = visible
+        end = (visible + 1) % n
+        for _ in range(n):
+            before = (start - 1) % n
+            if cross(v[before], v[start], p) > 0:
+                break
+            start = before
+        for _ in range(n):
+            after = (end + 1) % n
+            if cross(v[end], v[after], p) > 0:
+                break
+            end = after
+
+        for vertex_id in self.chain_ids(start, end):
+            del self.records[vertex_id]
+        if start < end:
+            self.vertices[start + 1:end] = [p]
+            self.ids[start + 1:end] = [self.next_id]
+            self.keys[start + 1:end] = [None]
+            at = start + 1
+        else:
+            # The chain wraps around vertex 0
+            self.vertices = self.vertices[end:start + 1] + [p]
+            self.ids = self.ids[end:start + 1] + [self.next_id]
+            self.keys = self.keys[end:start + 1] + [None]
+            at = len(self.vertices) - 1
+        self.next_id += 1
+
+        # Keep the lowest leftmost vertex first so the edge keys stay sorted
+        first = 0
+        if (p[1], p[0]) < (self.vertices[0][1], self.vertices[0][0]) or at == len(self.vertices) - 1:
+            first = lowest(self.vertices)
+        if first:
+            self.vertices = self.vertices[first:] + self.vertices[:first]
+            self.ids = self.ids[first:] + self.ids[:first]
+            self.keys = self.keys[first:] + self.keys[:first]
+            at = (at - first) % len(self.vertices)
+
+        n = len(self.vertices)
+        before = (at - 1) % n
+        self.keys[before] = self.edge_key(before)
+        self.keys[at] = self.edge_key(at)
+
+        # Rescore the new edges and every edge with a caliper in the range of
+        # directions p now supports
+        lo, hi = self.keys[before], self.keys[at]
+        affected = {before, at}
+        for quarters in (1, 2, 3):
+            affected.update(self.edges_between(turned(lo, -quarters), turned(hi, -quarters)))
+        for k in affected:
+            self.score(k)
+        self.trim_heaps()
+
+    def chain_ids(self, start, end):
+        # Ids of the vertices strictly between start and end going forward
+        n = len(self.vertices)
+        k = (start + 1) % n
+        while k != end:
+            yield self.ids[k]
+            k = (k + 1) % n
+
+    def edges_between(self, lo, hi):
+        # Indices of the edges whose keys lie in [lo, hi], wrapping past +x
+        if lo <= hi:
+            return range(bisect_left(self.keys, lo), bisect_right(self.keys, hi))
+        return list(range(bisect_left(self.keys, lo), len(self.keys))) + list(range(bisect_right(self.keys, hi)))
+
+    def edge_key(self, k):
+        p = self.vertices[k]
+        q = self.vertices[(k + 1) % len(self.vertices)]
+        return edge_key(q[0] - p[0], q[1] - p[1])
+
+    def support(self, key, first=True):
+        # Vertex touched by the caliper whose outward normal has direction key,
+        # the first or last one when a hull edge is parallel to the caliper
+        query = turned(key, 1)
+        pos = bisect_left(self.keys, query) if first else bisect_right(self.keys, query)
+        return pos % len(self.keys)
+
+    def score(self, k):
+        # Rectangle flush with edge k and the antipodal pairs of its end points
+        v = self.vertices
+        a = v[k]
+        b = v[(k + 1) % len(v)]
+        ex, ey = b[0] - a[0], b[1] - a[1]
+        key = self.keys[k]
+        far = v[self.support(key)]
+        top = v[self.support(turned(key, 1))]
+        near = v[self.support(turned(key, 2))]
+        length_sq = ex * ex + ey * ey
+
+        # Rectangle in (along the edge, across it) coordinates scaled by |e|^2
+        lo = near[0] * ex + near[1] * ey
+        hi = far[0] * ex + far[1] * ey
+        base = a[1] * ex - a[0] * ey
+        height = top[1] * ex - top[0] * ey
+        area = (hi - lo) * (height - base) / length_sq
+
+        # The opposite vertex, or both ends of a parallel opposite edge
+        best = (-1.0, None)
+        opposite = {self.support(turned(key, 1)), self.support(turned(key, 1), first=False)}
+        for c in (a, b):
+            for j in opposite:
+                d = v[j]
+                dist_sq = (c[0] - d[0]) ** 2 + (c[1] - d[1]) ** 2
+                if dist_sq > best[0]:
+                    best = (dist_sq, (c, d))
+
+        seq = self.next_seq
+        self.next_seq += 1
+        vertex_id = self.ids[k]
+        self.records[vertex_id] = (seq, area, (ex, ey, lo, hi, base, height), best[0], best[1])
+        heapq.heappush(self.area_heap, (area, seq, vertex_id))
+        heapq.heappush(self.diameter_heap, (-best[0], seq, vertex_id))
+
+    def trim_heaps(self):
+        # Rescored edges leave stale heap entries behind, drop them now and then
+        if len(self.area_heap) > 4 * len(self.records) + 64:
+            self.area_heap = [(r[1], r[0], i) for i, r in self.records.items()]
+            self.diameter_heap = [(-r[3], r[0], i) for i, r in self.records.items()]
+            heapq.heapify(self.area_heap)
+            heapq.heapify(self.diameter_heap)
+
+    def rebuild(self, points):
+        # Hull and scores from scratch
+        points = np.array(points, dtype=np.float64).reshape(-1, 2)
+        hull = points[convex_hull(points)] if points.shape[0] else points
+        self.vertices = [tuple(p) for p in hull.tolist()]
+        if self.vertices:
+            first = lowest(self.vertices)
+            self.vertices = self.vertices[first:] + self.vertices[:first]
+        self.ids = list(range(self.next_id, self.next_id + len(self.vertices)))
+        self.next_id += len(self.vertices)
+        self.records = {}
+        self.area_heap = []
+        self.diameter_heap = []
+        if len(self.vertices) < 3:
+            self.keys = [None] * len(self.vertices)
+            return
+        self.keys = [self.edge_key(k) for k in range(len(self.vertices))]
+        for k in range(len(self.vertices)):
+            self.score(k)
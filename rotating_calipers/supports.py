@@ -0,0 +1,124 @@
+import numpy as np
+
+# Vectorized caliper placement. Instead of stepping calipers one edge at a time,
+# the vertex a caliper touches for any direction is looked up directly: the
+# edge directions of a counter-clockwise convex polygon are sorted by angle, so
+# the support vertex of a direction is found with one searchsorted.
+#
+# Hulls are stored back to back in `coords` (counter-clockwise, as returned by
+# rotating_calipers.hull) and hull k spans offsets[k]:offsets[k + 1].
+
+
+def quadrant_fraction(dx, dy):
+    # Trig-free stand-in for the angle of (dx, dy): the quadrant (0 to 3,
+    # counter-clockwise from +x) and a monotone fraction in [0, 1) within it.
+    # Rotating a vector by a quarter turn only changes the quadrant, the
+    # fraction comes out bit for bit the same, so parallel edges stay exact ties.
+    # A zero vector counts as pointing along +x.
+    dx = np.asarray(dx, dtype=np.float64)
+    dy = np.asarray(dy, dtype=np.float64)
+    quadrant = np.where(dy > 0, np.where(dx > 0, 0, 1),
+                        np.where(dx < 0, 2, np.where(dy < 0, 3, 0)))
+    s = np.abs(dx) + np.abs(dy)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = np.where(quadrant % 2 == 0, np.abs(dy), np.abs(dx)) / s
+    return quadrant, np.where(s > 0, fraction, 0.0)
+
+
+def pseudo_angle(dx, dy):
+    # Monotone stand-in for atan2 on [0, 4), one unit per quadrant
+    quadrant, fraction = quadrant_fraction(dx, dy)
+    return quadrant + fraction
+
+
+def edge_table(coords, offsets):
+    # Edge vectors, the hull of each edge, their quadrants and fractions, and the
+    # lookup keys sorted by hull and angle with the edge index of each sorted key
+    sizes = np.diff(offsets)
+    hull_ids = np.repeat(np.arange(sizes.shape[0]), sizes)
+    local = np.arange(coords.shape[0]) - offsets[hull_ids]
+    next_idx = offsets[hull_ids] + (local + 1) % sizes[hull_ids]
+    edges = coords[next_idx] - coords
+
+    # A zero-length edge (a repeated vertex) sorts with the next real edge, its
+    # end is the same point as that edge's start
+    directions = edges.copy()
+    pending = np.flatnonzero(~edges.any(axis=1))
+    for _ in range(sizes.max() if sizes.shape[0] else 0):
+        if pending.shape[0] == 0:
+            break
+        directions[pending] = directions[next_idx[pending]]
+        pending = pending[~directions[pending].any(axis=1)]
+
+    # The edges of a convex hull are already in angle order, only cyclically:
+    # start each hull at the edge after the one drop in angle. Sorting by key
+    # instead would swap nearly parallel edges whose keys come out a rounding
+    # error apart (a vertex a hair off the line through its neighbours), and
+    # hand out the wrong one of their vertices.
+    quadrants, fractions = quadrant_fraction(directions[:, 0], directions[:, 1])
+    angles = quadrants + fractions
+    previous = offsets[hull_ids] + (local - 1) % sizes[hull_ids]
+    drops = np.lexsort((angles - angles[previous], hull_ids))
+    first = np.zeros(sizes.shape[0], dtype=np.int64)
+    first[sizes > 0] = drops[offsets[:-1][sizes > 0]] - offsets[:-1][sizes > 0]
+    rank = (local - first[hull_ids]) % sizes[hull_ids]
+    order = np.lexsort((rank, hull_ids))
+    # Rounding slips are flattened so the keys stay sorted for searchsorted
+    sorted_keys = np.maximum.accumulate(4 * hull_ids[order] + angles[order])
+    return edges, hull_ids, quadrants, fractions, order, sorted_keys
+
+
+def lookup_supports(order, sorted_keys, offsets, hull_ids, quadrants, fractions, side='left'):
+    # Vertex of hull hull_ids[i] touching a caliper line whose outward normal
+    # points along (quadrants[i], fractions[i]). A vertex supports the direction
+    # when its outgoing edge is the first one at or beyond a further quarter
+    # turn. When an edge is parallel to the caliper, side='left' gives its first
+    # vertex and side='right' its last one.
+    query = (4 * hull_ids + (quadrants + 1) % 4) + fractions
+    pos = np.searchsorted(sorted_keys, query, side=side)
+    pos = np.where(pos >= offsets[hull_ids + 1], offsets[hull_ids], pos)
+    return order[pos]
+
+
+def edge_supports(coords, offsets, turns):
+    # For every edge of every hull, the index of the vertex that touches a caliper
+    # turned by `turns` quarter turns counter-clockwise from the edge direction
+    edges, hull_ids, quadrants, fractions, order, sorted_keys = edge_table(coords, offsets)
+    supports = []
+    for turn in turns:
+        supports.append(lookup_supports(order, sorted_keys, offsets, hull_ids,
+                                        (quadrants + turn) % 4, fractions))
+    return edges, hull_ids, supports
+
+
+def opposite_pairs(coords_a, offsets_a, coords_b, offsets_b):
+    # For every vertex of hull k in a, the vertices of hull k in b touching the
+    # opposite caliper for some direction. The farthest pair of points between
+    # two convex polygons, and with a = b the diameter, is always among them.
+    # Returns global indices into coords_a and coords_b and the hull of each
+    # pair, grouped by hull. No hull may be empty.
+    _, hull_ids, quadrants, fractions, _, _ = edge_table(coords_a, offsets_a)
+    _, _, _, _, order_b, sorted_keys_b = edge_table(coords_b, offsets_b)
+    inward = (quadrants + 1) % 4
+    first = lookup_supports(order_b, sorted_keys_b, offsets_b, hull_ids, inward, fractions, side='left')
+    last = lookup_supports(order_b, sorted_keys_b, offsets_b, hull_ids, inward, fractions, side='right')
+
+    # Vertex k + 1 sits between edges k and k + 1, so its opposite vertices run
+    # from the first one touching the caliper opposite edge k to the last one
+    # touching the caliper opposite edge k + 1
+    sizes_a = np.diff(offsets_a)[hull_ids]
+    sizes_b = np.diff(offsets_b)[hull_ids]
+    base_b = offsets_b[hull_ids]
+    vertex = offsets_a[hull_ids] + (np.arange(coords_a.shape[0]) - offsets_a[hull_ids] + 1) % sizes_a
+    counts = (last[vertex] - first) % sizes_b + 1
+
+    # A single point or segment is opposite to the whole other hull (the normal
+    # cones of a segment's ends are half planes, which the count above can wrap)
+    single = sizes_a <= 2
+    first = np.where(single, base_b, first)
+    counts = np.where(single, sizes_b, counts)
+
+    total = counts.sum()
+    steps = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    pair_b = np.repeat(base_b, counts) + (np.repeat(first - base_b, counts) + steps) % np.repeat(sizes_b, counts)
+    return np.repeat(vertex, counts), pair_b, np.repeat(hull_ids, counts)
@@ -0,0 +1,136 @@
+import struct
+import numpy as np
+from diameter.diameter import new_record as new_diameter_record
+from diameter.diameter import record_bounding_rectangle as record_diameter
+from maxdist.maxdist import new_record as new_maxdist_record
+from maxdist.maxdist import record_bounding_rectangle as record_maxdist
+from minimum_area_rectangle.minimum_area_rectangle import new_record as new_rectangle_record
+from minimum_area_rectangle.minimum_area_rectangle import record_bounding_rectangles
+from rotating_calipers.batch import KERNELS
+from rotating_calipers.hull import sweep_hull
+
+# Compact binary traces of a sweep, so the sweep runs at full speed and the
+# drawing happens afterwards (rotating_calipers.replay). A trace keeps the hulls
+# the sweep ran on, the caliper anchors of every state and the sweep angle;
+# rectangles and measured pairs are rebuilt from those when needed, so a state
+# costs 8 bytes for the angle plus 2 (or 4) bytes per caliper, and 8 more for
+# the edge pair of the diameter.
+#
+# File layout, little endian:
+#   header   magic, kernel number in KERNELS, hull count, bytes per caliper
+#            index, edge pair flag, state count
+#   hulls    per hull its vertex count (u4) and (n, 2) float64 vertices
+#   states   calipers (S, C) u2 or u4, angles (S,) f8, edge pairs (S, 2) i4
+#            when flagged (diameter only)
+MAGIC = b'RCTRACE1'
+HEADER = struct.Struct('<8sBBBBI')
+
+
+class Trace:
+    # One recorded sweep. calipers[k, c] is the anchor of caliper c in state k
+    # as a vertex of hulls[c // 4], angles[k] the clockwise angle of the sweep
+    # from straight up. edge_pairs is the extra antipodal pair the diameter
+    # finds on parallel edges (-1 where there is none), None for the others.
+    def __init__(self, kernel, hulls, calipers, angles, edge_pairs=None):
+        if kernel not in KERNELS:
+            raise ValueError('Unknown kernel: ' + str(kernel))
+        self.kernel = kernel
+        self.hulls = [np.ascontiguousarray(hull, dtype=np.float64).reshape(-1, 2) for hull in hulls]
+        self.calipers = np.asarray(calipers, dtype=np.int64)
+        self.angles = np.asarray(angles, dtype=np.float64)
+        self.edge_pairs = None if edge_pairs is None else np.asarray(edge_pairs, dtype=np.int64)
+
+    def __len__(self):
+        return self.angles.shape[0]
+
+    def anchors(self):
+        # (S, C, 2) point of every caliper in every state
+        return np.stack([self.hulls[c // 4][self.calipers[:, c]] for c in range(self.calipers.shape[1])], axis=1)
+
+    def rectangles(self):
+        # (S, C // 4, 4, 2) box of every group of four calipers, corners in the
+        # order of CaliperSweep.rectangle
+        direction = np.stack([np.sin(self.angles), np.cos(self.angles)], axis=1)
+        directions = [direction]
+        for _ in range(3):
+            directions.append(np.stack([-directions[-1][:, 1], directions[-1][:, 0]], axis=1))
+        anchors = self.anchors()
+        boxes = np.empty((len(self), anchors.shape[1] // 4, 4, 2))
+        for r in range(boxes.shape[1]):
+            for k in range(4):
+                a, b = 4 * r + k, 4 * r + (k + 1) % 4
+                v1, v2 = directions[a % 4], directions[b % 4]
+                p1, p2 = anchors[:, a], anchors[:, b]
+                d = p2 - p1
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    t = (d[:, 0] * v2[:, 1] - d[:, 1] * v2[:, 0]) / (v1[:, 0] * v2[:, 1] - v1[:, 1] * v2[:, 0])
+                boxes[:, r, k] = p1 + t[:, None] * v1
+        return boxes
+
+    def pairs(self):
+        # (S, 2, 2) pair measured in every state: the antipodal pair of the
+        # diameter or the pair between the hulls of maxdist, None for the
+        # rectangle
+        anchors = self.anchors()
+        if self.kernel == 'diameter':
+            return anchors[:, [1, 3]]
+        if self.kernel == 'maxdist':
+            return anchors[:, [1, 7]]
+        return None
+
+
+def record_trace(kernel, points1, points2=None, compute_hull=False):
+    # Trace of the sweep of one kernel over a hull (or two for maxdist), or
+    # over the hulls of point sets with compute_hull
+    if kernel not in KERNELS:
+        raise ValueError('Unknown kernel: ' + str(kernel))
+    hulls = [sweep_hull(points1, compute_hull)]
+    if kernel == 'diameter':
+        record = record_diameter(hulls[0], new_diameter_record(len(hulls[0])))
+    elif kernel == 'maxdist':
+        hulls.append(sweep_hull(points2, compute_hull))
+        record = record_maxdist(hulls[0], hulls[1], new_maxdist_record(len(hulls[0]), len(hulls[1])))
+    else:
+        record = record_bounding_rectangles(hulls[0], new_rectangle_record(len(hulls[0])))
+    _, calipers, angles, edge_pairs = record.result()
+    return Trace(kernel, hulls, calipers.copy(), angles.copy(), None if edge_pairs is None else edge_pairs.copy())
+
+
+def write_trace(path, trace):
+    index_bytes = 2 if max(len(hull) for hull in trace.hulls) <= 1 << 16 else 4
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, KERNELS.index(trace.kernel), len(trace.hulls), index_bytes,
+                            trace.edge_pairs is not None, len(trace)))
+        for hull in trace.hulls:
+            f.write(struct.pack('<I', hull.shape[0]))
+            f.write(hull.astype('<f8').tobytes())
+        f.write(trace.calipers.astype('<u%d' % index_bytes).tobytes())
+        f.write(trace.angles.astype('<f8').tobytes())
+        if trace.edge_pairs is not None:
+            f.write(trace.edge_pairs.astype('<i4').tobytes())
+
+
+def read_trace(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError('Not a sweep trace: ' + str(path))
+    magic, kernel, hull_count, index_bytes, has_edge_pairs, states = HEADER.unpack_from(data)
+    if magic != MAGIC or kernel >= len(KERNELS) or index_bytes not in (2, 4):
+        raise ValueError('Not a sweep trace: ' + str(path))
+    pos = HEADER.size
+    hulls = []
+    for _ in range(hull_count):
+        n, = struct.unpack_from('<I', data, pos)
+        pos += 4
+        hulls.append(np.frombuffer(data, '<f8', 2 * n, pos).reshape(n, 2))
+        pos += 16 * n
+    caliper_count = 4 * hull_count
+    calipers = np.frombuffer(data, '<u%d' % index_bytes, states * caliper_count, pos).reshape(states, caliper_count)
+    pos += index_bytes * states * caliper_count
+    angles = np.frombuffer(data, '<f8', states, pos)
+    pos += 8 * states
+    edge_pairs = None
+    if has_edge_pairs:
+        edge_pairs = np.frombuffer(data, '<i4', 2 * states, pos).reshape(states, 2)
+    return Trace(KERNELS[kernel], hulls, calipers, angles, edge_pairs)
@@ -0,0 +1,122 @@
+from collections import deque
+import numpy as np
+from maxdist.maxdist import compute_max_distances
+from rotating_calipers.streaming import StreamingHull
+
+# Diameter of the last N points (or of the points of the last T seconds) of a
+# stream, kept as a queue built from two stacks. New points go on the back,
+# where a StreamingHull keeps the hull and diameter of everything pushed since
+# the last flip. Old points leave from the front, which holds the hull and
+# diameter of every suffix of the points moved there by the last flip. The
+# window is one front suffix plus the back, and its diameter is the largest of
+# their two diameters and the maximum distance between their hulls. Each point
+# is inserted into two streaming hulls in its lifetime, so the cost per sample
+# depends on the hull size rather than on the window length.
+
+# Hull pairs up to this many vertex pairs are compared directly
+BRUTE_FORCE_PAIRS = 4096
+
+
+def max_distance(hull1, hull2):
+    # (p, q, length) of the farthest pair between two counter-clockwise hulls
+    if hull1.shape[0] * hull2.shape[0] <= BRUTE_FORCE_PAIRS:
+        d = hull1[:, None, :] - hull2[None, :, :]
+        dist_sq = np.einsum('ijk,ijk->ij', d, d)
+        i, j = np.unravel_index(np.argmax(dist_sq), dist_sq.shape)
+        return hull1[i], hull2[j], float(np.sqrt(dist_sq[i, j]))
+    pairs, lengths = compute_max_distances(hull1, [0, hull1.shape[0]], hull2, [0, hull2.shape[0]])
+    return hull1[pairs[0, 0]], hull2[pairs[0, 1]], float(lengths[0])
+
+
+class SlidingDiameter:
+    # Give either size (number of points) or duration (time span, points need
+    # a time) for the window. update() returns the diameter of the window after
+    # the new point as (p, q, length).
+    def __init__(self, size=None, duration=None):
+        if (size is None) == (duration is None):
+            raise ValueError('Give either a window size or a duration')
+        if size is not None and size < 1:
+            raise ValueError('The window size must be at least 1')
+        self.size = size
+        self.duration = duration
+        self.times = deque()  # time of every point in the window, oldest first
+        self.front = []       # (hull, diameter) of each suffix of the front points
+        self.front_start = 0
+        self.back_points = []
+        self.back = StreamingHull()
+        self.back_version = 0
+        self.cache_key = None
+        self.cache = None
+
+    def __len__(self):
+        return len(self.front) - self.front_start + len(self.back_points)
+
+    def update(self, point, time=None):
+        if self.duration is not None and time is None:
+            raise ValueError('A time based window needs the time of every point')
+        self.times.append(time)
+        self.back_points.append(point)
+        if self.back.add_point(point):
+            self.back_version += 1
+
+        if self.size is not None:
+            while len(self) > self.size:
+                self.evict()
+        else:
+            while time - self.times[0] > self.duration:
+                self.evict()
+        return self.diameter()
+
+    def evict(self):
+        if self.front_start == len(self.front):
+            self.flip()
+        self.front_start += 1
+        self.times.popleft()
+
+    def flip(self):
+        # Move the back points to the front, newest first, keeping the hull and
+        # diameter of every suffix. Suffixes whose hull did not change share it.
+        suffix = StreamingHull()
+        front = []
+        snapshot = None
+        for point in reversed(self.back_points):
+            if suffix.add_point(point) or snapshot is None:
+                snapshot = (suffix.hull(), suffix.diameter())
+            front.append(snapshot)
+        front.reverse()
+        self.front = front
+        self.front_start = 0
+        self.back_points = []
+        self.back = StreamingHull()
+        self.back_version += 1
+
+    def diameter(self):
+        if len(self) == 0:
+            return None
+        if self.front_start == len(self.front):
+            return self.back.diameter()
+        hull, front_diameter = self.front[self.front_start]
+        if not self.back_points:
+            return front_diameter
+
+        # The farthest pair across front and back only changes with their hulls
+        key = (id(hull), self.back_version)
+        if key != self.cache_key:
+            self.cache_key = key
+            self.cache = max_distance(hull, self.back.hull())
+        return max(front_diameter, self.back.diameter(), self.cache, key=lambda d: d[2])
+
+
+def sliding_diameters(points, size=None, times=None, duration=None):
+    # Diameter of the window ending at every point of a stream, as the lengths
+    # (n,) and the farthest pairs (n, 2, 2)
+    points = np.asarray(points, dtype=np.float64)
+    window = SlidingDiameter(size, duration)
+    lengths = np.empty(points.shape[0])
+    pairs = np.empty((points.shape[0], 2, 2))
+    for k, point in enumerate(points.tolist()):
+        p, q, length = window.update(point, None if times is None else times[k])
+        lengths[k] = length
+        pairs[k, 0] = p
+        pairs[k, 1] = q
+    return lengths, pairs
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The algorithm directories and the shared rotating_calipers package are
+# imported from the repository root, as the demos do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
@@ -0,0 +1,168 @@
+import numpy as np
+from rotating_calipers.hull import convex_hull
+
+# Brute force answers and random hulls the kernels are checked against
+
+
+def farthest_pair(points1, points2=None):
+    # Largest distance over all pairs of points, O(n m)
+    points2 = points1 if points2 is None else points2
+    d = points1[:, None, :] - points2[None, :, :]
+    return float(np.sqrt(np.einsum('ijk,ijk->ij', d, d).max()))
+
+
+def min_area_box(points):
+    # Smallest rectangle area over every direction of an edge between two
+    # points, O(n^2) directions with every point projected on each
+    points = np.unique(points, axis=0)
+    if points.shape[0] < 3:
+        return 0.0
+    best = np.inf
+    for k in range(points.shape[0]):
+        e = points - points[k]
+        e = e[np.einsum('ij,ij->i', e, e) > 0]
+        u = e / np.linalg.norm(e, axis=1)[:, None]
+        along = points @ u.T
+        across = points @ np.stack([-u[:, 1], u[:, 0]], axis=1).T
+        areas = np.ptp(along, axis=0) * np.ptp(across, axis=0)
+        best = min(best, areas.min())
+    return float(best)
+
+
+def random_points(rng, n, kind):
+    if kind == 'normal':
+        return rng.normal(size=(n, 2))
+    if kind == 'lattice':
+        return rng.integers(-6, 7, size=(n, 2)).astype(np.float64)
+    if kind == 'circle':
+        a = rng.uniform(0, 2 * np.pi, n)
+        return np.stack([np.cos(a), np.sin(a)], axis=1)
+    if kind == 'skinny':
+        return rng.uniform(-1, 1, size=(n, 2)) * [10.0, 0.01]
+    raise ValueError(kind)
+
+
+KINDS = ('normal', 'lattice', 'circle', 'skinny')
+
+
+def random_hulls(seed, count=40, low=3, high=80):
+    # (points, hull) pairs, the hull counter-clockwise with at least 3 vertices
+    rng = np.random.default_rng(seed)
+    hulls = []
+    while len(hulls) < count:
+        points = random_points(rng, int(rng.integers(low, high)), KINDS[len(hulls) % len(KINDS)])
+        hull = points[convex_hull(points)]
+        if hull.shape[0] >= 3:
+            hulls.append((points, hull))
+    return hulls
+
+
+def with_repeated_vertex(hull, k=0):
+    return np.insert(hull, k, hull[k], axis=0)
+
+
+def with_collinear_vertex(hull, k=0):
+    # The midpoint of edge k inserted as a vertex
+    middle = (hull[k] + hull[(k + 1) % hull.shape[0]]) / 2
+    return np.insert(hull, k + 1, middle, axis=0)
+
+
+def min_distance(hull1, hull2):
+    # Distance between two disjoint convex polygons: the smallest distance from
+    # a vertex of one to an edge of the other
+    def to_edges(points, hull):
+        a = hull[None, :, :]
+        e = np.roll(hull, -1, axis=0)[None, :, :] - a
+        w = points[:, None, :] - a
+        length_sq = np.maximum(np.einsum('ijk,ijk->ij', e, e), 1e-300)
+        t = np.clip(np.einsum('ijk,ijk->ij', w, e) / length_sq, 0.0, 1.0)
+        d = w - t[..., None] * e
+        return np.sqrt(np.einsum('ijk,ijk->ij', d, d)).min()
+    return float(min(to_edges(hull1, hull2), to_edges(hull2, hull1)))
+
+
+def degenerate_variants(hull):
+    # The hull itself, with a repeated vertex and with a collinear one
+    return [hull, with_repeated_vertex(hull), with_repeated_vertex(hull, hull.shape[0] - 1),
+            with_collinear_vertex(hull), with_collinear_vertex(hull, hull.shape[0] - 1)]
+
+
+# Hulls of one or two vertices, and a segment with a repeated end
+SMALL_HULLS = [np.array([[1.0, 2.0]]), np.array([[1.0, 2.0], [4.0, 6.0]]), np.array([[1.0, 2.0], [1.0, 2.0]]),
+               np.array([[1.0, 2.0], [4.0, 6.0], [4.0, 6.0]])]
+
+
+def encloses(corners, points, tol=1e-9):
+    # True when every point is inside the counter-clockwise polygon (or on it)
+    a = corners
+    e = np.roll(corners, -1, axis=0) - a
+    w = points[:, None, :] - a[None, :, :]
+    c = e[None, :, 0] * w[..., 1] - e[None, :, 1] * w[..., 0]
+    scale = np.abs(points).max() + 1.0
+    return bool(np.all(c >= -tol * scale * np.linalg.norm(e, axis=1)))
+
+
+def polygon_area(corners):
+    x, y = corners[:, 0], corners[:, 1]
+    return float(0.5 * (x @ np.roll(y, -1) - y @ np.roll(x, -1)))
+
+
+def edge_normals(hull):
+    e = np.roll(hull, -1, axis=0) - hull
+    return np.arctan2(-e[:, 0], e[:, 1])
+
+
+def support_triangle_areas(hull, angles):
+    # Area of the triangle cut out by the support lines of the hull with
+    # outward normals at the given angles (..., 3), inf where they do not
+    # close around it
+    normals = np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+    h = (normals @ hull.T).max(axis=-1)
+    corners = []
+    for a, b in ((0, 1), (1, 2), (2, 0)):
+        det = normals[..., a, 0] * normals[..., b, 1] - normals[..., a, 1] * normals[..., b, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = (h[..., a] * normals[..., b, 1] - h[..., b] * normals[..., a, 1]) / det
+            y = (normals[..., a, 0] * h[..., b] - normals[..., b, 0] * h[..., a]) / det
+        corners.append((x, y))
+    (x0, y0), (x1, y1), (x2, y2) = corners
+    area = 0.5 * np.abs((x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0))
+    # Bounded only when the normals leave no gap of half a turn or more
+    gaps = np.diff(np.sort(np.mod(angles, 2 * np.pi), axis=-1), axis=-1)
+    gaps = np.concatenate([gaps, 2 * np.pi - gaps.sum(axis=-1, keepdims=True)], axis=-1)
+    return np.where((gaps.max(axis=-1) < np.pi - 1e-9) & np.isfinite(area), area, np.inf)
+
+
+def min_area_triangle_search(hull, steps=60):
+    # Smallest enclosing triangle by search: one side flush with each hull edge
+    # in turn and the normals of the other two on a grid, then the best few
+    # polished over all three angles. Never below the optimum.
+    from scipy.optimize import minimize
+    grid = np.linspace(0, 2 * np.pi, steps, endpoint=False)
+    second, third = np.meshgrid(grid, grid, indexing='ij')
+    starts = []
+    for normal in edge_normals(hull):
+        angles = np.stack([np.full(second.shape, normal), second, third], axis=-1)
+        areas = support_triangle_areas(hull, angles)
+        k = np.unravel_index(np.argmin(areas), areas.shape)
+        starts.append((areas[k], angles[k]))
+    best = min(area for area, _ in starts)
+    for _, start in sorted(starts, key=lambda s: s[0])[:2]:
+        found = minimize(lambda a: support_triangle_areas(hull, a), start, method='Nelder-Mead',
+                         options={'xatol': 1e-12, 'fatol': 1e-14, 'maxiter': 2000})
+        best = min(best, float(found.fun))
+    return float(best)
+
+
+def min_area_parallelogram_pairs(hull):
+    # Smallest enclosing parallelogram over every pair of strips flush with a
+    # hull edge, O(n^2) pairs
+    e = np.roll(hull, -1, axis=0) - hull
+    # Twice the area between each edge and the vertex farthest from it
+    heights = (e[:, None, 0] * (hull[None, :, 1] - hull[:, None, 1]) -
+               e[:, None, 1] * (hull[None, :, 0] - hull[:, None, 0])).max(axis=1)
+    turn = np.abs(e[:, None, 0] * e[None, :, 1] - e[:, None, 1] * e[None, :, 0])
+    with np.errstate(divide='ignore'):
+        areas = np.where(turn > 1e-12 * np.einsum('ij,ij->i', e, e).max(), heights[:, None] * heights[None, :] / turn,
+                         np.inf)
+    return float(areas.min())
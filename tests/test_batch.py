@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from diameter.diameter import compute_diameters
+from maxdist.maxdist import compute_max_distances
+from minimum_area_rectangle.minimum_area_rectangle import compute_bounding_rectangles
+from reference import random_hulls
+from rotating_calipers.batch import run_batch
+
+POINTS, HULLS = zip(*random_hulls(80, count=30))
+
+
+def ragged(sets):
+    return np.concatenate(sets), np.cumsum([0] + [len(s) for s in sets])
+
+
+def check_same(results, expected):
+    for result, value in zip(results, expected):
+        assert np.allclose(result, value)
+
+
+@pytest.mark.parametrize('compute_hull', [False, True])
+def test_run_batch(compute_hull):
+    coords, offsets = ragged(POINTS if compute_hull else HULLS)
+    coords2, offsets2 = ragged((POINTS if compute_hull else HULLS)[::-1])
+    cases = [('diameter', compute_diameters, (coords, offsets)),
+             ('maxdist', compute_max_distances, (coords, offsets, coords2, offsets2)),
+             ('min_area_rectangle', compute_bounding_rectangles, (coords, offsets))]
+    for kernel, function, args in cases:
+        expected = function(*args, compute_hull=compute_hull)
+        single = run_batch(kernel, *args[:2], *args[2:], workers=1, compute_hull=compute_hull)
+        check_same(single, expected)
+        parallel = run_batch(kernel, *args[:2], *args[2:], workers=2, chunk_size=7, compute_hull=compute_hull)
+        check_same(parallel, expected)
+        # One hull at a time
+        for k in range(len(offsets) - 1):
+            part = [args[0][offsets[k]:offsets[k + 1]], [0, offsets[k + 1] - offsets[k]]]
+            if kernel == 'maxdist':
+                part += [coords2[offsets2[k]:offsets2[k + 1]], [0, offsets2[k + 1] - offsets2[k]]]
+            alone = function(*part, compute_hull=compute_hull)
+            assert np.isclose(parallel[1][k], alone[1][0])
+            if kernel != 'min_area_rectangle':
+                # Pairs index the whole batch
+                base = [offsets[k], offsets2[k] if kernel == 'maxdist' else offsets[k]]
+                assert np.array_equal(parallel[0][k] - base, alone[0][0])
+
+
+def test_run_batch_errors():
+    coords, offsets = ragged(HULLS)
+    with pytest.raises(ValueError):
+        run_batch('perimeter', coords, offsets)
+    with pytest.raises(ValueError):
+        run_batch('maxdist', coords, offsets, coords, offsets[:-1], workers=2)
+    with pytest.raises(ValueError):
+        run_batch('diameter', coords, np.concatenate([[0, 0], offsets[1:]]), workers=2)
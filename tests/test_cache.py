@@ -0,0 +1,133 @@
+import functools
+import numpy as np
+import pytest
+from diameter.diameter import compute_bounding_rectangle, compute_diameters
+from minimum_area_rectangle.minimum_area_rectangle import min_area_rectangle, record_bounding_rectangles
+from rotating_calipers.cache import ResultCache
+from rotating_calipers.instrument import SweepStats
+
+SQUARE = np.array([[0.0, 0.0], [4.0, 0.0], [4.0, 3.0], [0.0, 3.0]])
+
+
+def counted(function):
+    # function, counting the calls that get through to it
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        wrapper.calls += 1
+        return function(*args, **kwargs)
+    wrapper.calls = 0
+    return wrapper
+
+
+def test_hit_and_miss():
+    cache = ResultCache()
+    area = counted(min_area_rectangle)
+    first = cache.call(area, SQUARE)
+    # Same content in a new array, and the default passed by name
+    second = cache.call(area, SQUARE.copy(), compute_hull=False)
+    assert second is first
+    assert area.calls == 1
+    cache.call(area, SQUARE, True)
+    assert area.calls == 2
+    assert cache.as_dict() == {'hits': 1, 'misses': 2, 'evictions': 0, 'hit_rate': 1 / 3, 'entries': 2,
+                               'bytes': cache.nbytes}
+    assert np.isclose(first[1], 12.0)
+    with pytest.raises(ValueError):
+        first[0][0, 0] = 1.0
+
+
+def test_stats_not_in_key():
+    cache = ResultCache()
+    stats = SweepStats()
+    first = cache.call(compute_diameters, SQUARE, [0, 4], stats=stats)
+    assert cache.call(compute_diameters, SQUARE, [0, 4], stats=SweepStats()) is first
+    assert stats.hulls == 1
+
+
+def test_eviction_by_entries():
+    cache = ResultCache(max_entries=2)
+    for k in range(3):
+        cache.call(min_area_rectangle, SQUARE + k)
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    # The least recently used one went
+    cache.call(min_area_rectangle, SQUARE + 1)
+    cache.call(min_area_rectangle, SQUARE + 3)
+    cache.call(min_area_rectangle, SQUARE + 1)
+    assert cache.hits == 2
+    cache.call(min_area_rectangle, SQUARE + 2)
+    assert cache.hits == 2
+
+
+def test_eviction_by_bytes():
+    one = ResultCache(max_entries=None).call(compute_diameters, SQUARE, [0, 4])
+    size = one[0].nbytes + one[1].nbytes
+    cache = ResultCache(max_entries=None, max_bytes=2 * size)
+    for k in range(3):
+        cache.call(compute_diameters, SQUARE + k, [0, 4])
+    assert len(cache) == 2
+    assert cache.nbytes == 2 * size
+    assert cache.evictions == 1
+    # Too large to keep at all, still returned
+    small = ResultCache(max_bytes=size - 1)
+    assert small.call(compute_diameters, SQUARE, [0, 4])[1][0] == 5.0
+    assert len(small) == 0
+
+
+def test_bypass_and_refresh():
+    cache = ResultCache()
+    area = counted(min_area_rectangle)
+    first = cache.call(area, SQUARE)
+    bypassed = cache.call(area, SQUARE, bypass=True)
+    assert bypassed is not first
+    assert bypassed[0].flags.writeable
+    refreshed = cache.call(area, SQUARE, refresh=True)
+    assert refreshed is not first
+    assert cache.call(area, SQUARE) is refreshed
+    assert area.calls == 3
+    assert len(cache) == 1
+
+
+def test_output_buffers_bypass():
+    cache = ResultCache()
+    record = cache.call(record_bounding_rectangles, SQUARE)
+    assert len(cache) == 1
+    out = cache.call(record_bounding_rectangles, SQUARE, out=record_bounding_rectangles(SQUARE))
+    assert out.angles.flags.writeable
+    assert len(cache) == 1
+    assert record is not out
+
+
+def test_invalidate():
+    cache = ResultCache()
+    cache.call(min_area_rectangle, SQUARE)
+    cache.call(min_area_rectangle, SQUARE + 1)
+    assert cache.invalidate(min_area_rectangle, SQUARE, compute_hull=False) == 1
+    assert cache.invalidate(min_area_rectangle, SQUARE) == 0
+    assert len(cache) == 1
+    assert cache.invalidate() == 1
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_wrap():
+    cache = ResultCache()
+    cached = cache.wrap(compute_diameters)
+    assert cached.__wrapped__ is compute_diameters
+    assert cached(SQUARE, [0, 4]) is cached(SQUARE, [0, 4])
+    assert cached(SQUARE, [0, 4], bypass=True) is not cached(SQUARE, [0, 4])
+
+
+def test_results_do_not_alias_the_input():
+    # The sweep yields views into its hull, which is the caller's own array
+    # for a clean hull. Reusing that buffer must not change cached results.
+    cache = ResultCache()
+    points = SQUARE.copy()
+    states = cache.call(compute_bounding_rectangle, points)
+    assert isinstance(states, tuple)
+    pairs = [tuple(map(tuple, pair)) for _, pair, _ in states]
+    points[:] = 0.0
+    again = cache.call(compute_bounding_rectangle, SQUARE)
+    assert again is states
+    assert [tuple(map(tuple, pair)) for _, pair, _ in again] == pairs
+    assert ((0.0, 0.0), (4.0, 3.0)) in pairs
@@ -0,0 +1,146 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from diameter.diameter import compute_diameters
+from maxdist.maxdist import compute_max_distances
+from minimum_area_rectangle.minimum_area_rectangle import compute_bounding_rectangles
+from reference import random_hulls
+from rotating_calipers.cli import main
+from rotating_calipers.trace import read_trace
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+POINTS, HULLS = zip(*random_hulls(80, count=9))
+
+
+def stacked(polygons):
+    offsets = np.cumsum([0] + [len(polygon) for polygon in polygons])
+    return np.concatenate(polygons), offsets
+
+
+def write_csv(path, polygons, ids=None):
+    ids = range(len(polygons)) if ids is None else ids
+    rows = [(k, x, y) for k, polygon in zip(ids, polygons) for x, y in polygon.tolist()]
+    with open(path, 'w') as f:
+        f.write('x,polygon,y\n')
+        f.writelines('%r,%d,%r\n' % (x, k, y) for k, x, y in rows)
+
+
+def read_csv(text):
+    lines = text.strip().split('\n')
+    return lines[0].split(','), np.array([[float(v) for v in line.split(',')] for line in lines[1:]])
+
+
+def test_diameter_npz(tmp_path):
+    coords, offsets = stacked(HULLS)
+    np.savez(tmp_path / 'hulls.npz', coords=coords, offsets=offsets)
+    assert main(['diameter', str(tmp_path / 'hulls.npz'), '--out', str(tmp_path / 'out.csv'), '--chunk-size', '4']) == 0
+    header, table = read_csv((tmp_path / 'out.csv').read_text())
+    assert header == ['polygon', 'first', 'second', 'length']
+    pairs, lengths = compute_diameters(coords, offsets)
+    assert np.array_equal(table[:, 0], np.arange(len(HULLS)))
+    assert np.array_equal(table[:, 1:3], pairs - offsets[:-1, None])
+    assert np.array_equal(table[:, 3], lengths)
+
+
+def test_maxdist_csv(tmp_path, capsys):
+    others = [hull + [0.5, 0.0] for hull in HULLS[::-1]]
+    write_csv(tmp_path / 'first.csv', HULLS, ids=range(10, 10 + len(HULLS)))
+    write_csv(tmp_path / 'second.csv', others)
+    assert main(['maxdist', str(tmp_path / 'first.csv'), '--other', str(tmp_path / 'second.csv'),
+                 '--chunk-size', '2', '--workers', '2']) == 0
+    header, table = read_csv(capsys.readouterr().out)
+    assert header == ['polygon', 'first', 'second', 'distance']
+    coords, offsets = stacked(HULLS)
+    coords2, offsets2 = stacked(others)
+    pairs, lengths = compute_max_distances(coords, offsets, coords2, offsets2)
+    assert np.array_equal(table[:, 0], np.arange(10, 10 + len(HULLS)))
+    assert np.array_equal(table[:, 1], pairs[:, 0] - offsets[:-1])
+    assert np.array_equal(table[:, 2], pairs[:, 1] - offsets2[:-1])
+    assert np.array_equal(table[:, 3], lengths)
+
+
+def test_min_area_rectangle_npy(tmp_path, capsys):
+    coords, offsets = stacked(POINTS)
+    np.save(tmp_path / 'points.npy', coords)
+    np.save(tmp_path / 'offsets.npy', offsets)
+    assert main(['min_area_rectangle', str(tmp_path / 'points.npy'), '--offsets', str(tmp_path / 'offsets.npy'),
+                 '--compute-hull']) == 0
+    header, table = read_csv(capsys.readouterr().out)
+    assert header[:3] == ['polygon', 'area', 'angle']
+    rectangles, areas, angles = compute_bounding_rectangles(coords, offsets, compute_hull=True)
+    assert np.array_equal(table[:, 1], areas)
+    assert np.array_equal(table[:, 2], angles)
+    assert np.array_equal(table[:, 3:], rectangles.reshape(-1, 8))
+    # One polygon without --offsets
+    assert main(['min_area_rectangle', str(tmp_path / 'points.npy'), '--compute-hull']) == 0
+    _, table = read_csv(capsys.readouterr().out)
+    assert np.isclose(table[0, 1], compute_bounding_rectangles(coords, [0, len(coords)], compute_hull=True)[1][0])
+
+
+def test_parquet(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    coords, offsets = stacked(HULLS)
+    ids = np.repeat(np.arange(len(HULLS)), np.diff(offsets))
+    pq.write_table(pa.table({'polygon': ids, 'x': coords[:, 0], 'y': coords[:, 1]}), tmp_path / 'hulls.parquet')
+    assert main(['diameter', str(tmp_path / 'hulls.parquet'), '--out', str(tmp_path / 'out.parquet'),
+                 '--chunk-size', '4']) == 0
+    table = pq.read_table(tmp_path / 'out.parquet')
+    assert np.array_equal(table.column('length').to_numpy(), compute_diameters(coords, offsets)[1])
+
+
+def test_trace(tmp_path):
+    coords, offsets = stacked(HULLS)
+    np.savez(tmp_path / 'hulls.npz', coords=coords, offsets=offsets)
+    assert main(['diameter', str(tmp_path / 'hulls.npz'), '--trace', str(tmp_path / 'sweep.trace'),
+                 '--polygon', '3']) == 0
+    trace = read_trace(tmp_path / 'sweep.trace')
+    assert trace.kernel == 'diameter'
+    assert np.array_equal(trace.hulls[0], HULLS[3])
+
+
+@pytest.mark.parametrize('argv', [['maxdist', 'first.npz'], ['diameter', 'hulls.npz', '--chunk-size', '0'],
+                                  ['hull', 'hulls.npz']])
+def test_usage_errors(argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(argv)
+    assert exit_info.value.code == 2
+    assert 'usage' in capsys.readouterr().err
+
+
+def test_input_errors(tmp_path):
+    coords, offsets = stacked(HULLS)
+    np.savez(tmp_path / 'hulls.npz', coords=coords, offsets=offsets)
+    np.savez(tmp_path / 'fewer.npz', coords=coords, offsets=offsets[:-1])
+    np.savez(tmp_path / 'flat.npz', coords=coords.ravel(), offsets=offsets)
+    write_csv(tmp_path / 'split.csv', [HULLS[0], HULLS[1], HULLS[2]], ids=[0, 1, 0])
+    (tmp_path / 'no_y.csv').write_text('polygon,x\n0,1.0\n')
+    hulls = str(tmp_path / 'hulls.npz')
+    for argv in (['diameter', str(tmp_path / 'hulls.txt')], ['diameter', str(tmp_path / 'flat.npz')],
+                 ['diameter', str(tmp_path / 'fewer.npz')], ['diameter', str(tmp_path / 'split.csv')],
+                 ['diameter', str(tmp_path / 'no_y.csv')], ['diameter', hulls, '--out', str(tmp_path / 'out.txt')],
+                 ['maxdist', hulls, '--other', str(tmp_path / 'split.csv')],
+                 ['diameter', hulls, '--trace', str(tmp_path / 'sweep.trace'), '--polygon', str(len(HULLS))]):
+        with pytest.raises(ValueError):
+            main(argv)
+
+
+def test_module(tmp_path):
+    # python -m rotating_calipers, as a pipeline runs it
+    coords, offsets = stacked(HULLS)
+    np.savez(tmp_path / 'hulls.npz', coords=coords, offsets=offsets)
+    done = subprocess.run([sys.executable, '-m', 'rotating_calipers', 'diameter', str(tmp_path / 'hulls.npz')],
+                          cwd=ROOT, capture_output=True, text=True)
+    assert done.returncode == 0
+    _, table = read_csv(done.stdout)
+    assert np.array_equal(table[:, 3], compute_diameters(coords, offsets)[1])
+    failed = subprocess.run([sys.executable, '-m', 'rotating_calipers', 'maxdist', str(tmp_path / 'hulls.npz')],
+                            cwd=ROOT, capture_output=True, text=True)
+    assert failed.returncode == 2
+    assert 'maxdist needs --other' in failed.stderr
+    failed = subprocess.run([sys.executable, '-m', 'rotating_calipers', 'diameter', str(tmp_path / 'hulls.txt')],
+                            cwd=ROOT, capture_output=True, text=True)
+    assert failed.returncode == 1
+    assert 'Unknown polygon file type' in failed.stderr
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from diameter.diameter import antipodal_pairs, compute_bounding_rectangle, compute_diameters, diameter
+from reference import SMALL_HULLS, degenerate_variants, farthest_pair, random_hulls
+from rotating_calipers import dispatch
+
+HULLS = random_hulls(10)
+
+
+@pytest.fixture(params=['vectorized', 'scalar'])
+def path(request, monkeypatch):
+    # Run diameter() on one kernel whatever the hull size
+    monkeypatch.setitem(dispatch.SCALAR_MAX_VERTICES, 'diameter', 0 if request.param == 'vectorized' else 10 ** 6)
+    return request.param
+
+
+def check(points, result):
+    i, j, length = result
+    assert i <= j
+    assert np.isclose(length, farthest_pair(points))
+    assert np.isclose(np.linalg.norm(points[i] - points[j]), length)
+
+
+def test_random_hulls(path):
+    for points, hull in HULLS:
+        check(hull, diameter(hull))
+        check(points, diameter(points, compute_hull=True))
+
+
+def test_degenerate_hulls(path):
+    for _, hull in HULLS:
+        for variant in degenerate_variants(hull):
+            check(variant, diameter(variant))
+
+
+def test_small_hulls(path):
+    for hull in SMALL_HULLS:
+        check(hull, diameter(hull))
+        check(hull, diameter(hull, compute_hull=True))
+
+
+def test_batch():
+    hulls = [variant for _, hull in HULLS for variant in degenerate_variants(hull)] + SMALL_HULLS[:2]
+    offsets = np.cumsum([0] + [len(hull) for hull in hulls])
+    coords = np.concatenate(hulls)
+    pairs, lengths = compute_diameters(coords, offsets)
+    for k, hull in enumerate(hulls):
+        assert np.isclose(lengths[k], farthest_pair(hull))
+        assert np.isclose(np.linalg.norm(coords[pairs[k, 0]] - coords[pairs[k, 1]]), lengths[k])
+
+
+def test_antipodal_pairs():
+    for points, hull in HULLS:
+        i, j, dist_sq = antipodal_pairs(points, compute_hull=True)
+        assert np.all(i < j)
+        assert np.isclose(np.sqrt(dist_sq.max()), farthest_pair(points))
+        assert np.allclose(np.einsum('ij,ij->i', points[i] - points[j], points[i] - points[j]), dist_sq)
+
+
+def test_sweep_sees_the_farthest_pair():
+    for _, hull in HULLS[:12]:
+        for variant in degenerate_variants(hull) + SMALL_HULLS:
+            lengths = []
+            for _, (p2, p4), edge_pair in compute_bounding_rectangle(variant):
+                lengths.append(np.linalg.norm(p2 - p4))
+                if edge_pair is not None:
+                    lengths.append(np.linalg.norm(edge_pair[0] - edge_pair[1]))
+            assert np.isclose(max(lengths), farthest_pair(variant))
+
+
+def test_bad_offsets():
+    coords = np.concatenate([hull for _, hull in HULLS[:3]])
+    sizes = [len(hull) for _, hull in HULLS[:3]]
+    for offsets in ([0, sizes[0], sizes[0], len(coords)], [1, sizes[0], len(coords)],
+                    [0, sizes[0] + sizes[1], sizes[0], len(coords)], [0, len(coords) + 1]):
+        with pytest.raises(ValueError):
+            compute_diameters(coords, offsets)
+        with pytest.raises(ValueError):
+            compute_diameters(coords, offsets, compute_hull=True)
+
+
+def test_empty_input(path):
+    for compute_hull in (False, True):
+        with pytest.raises(ValueError, match='at least one point'):
+            diameter(np.zeros((0, 2)), compute_hull=compute_hull)
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from diameter import diameter
+from maxdist import maxdist
+from minimum_area_rectangle import minimum_area_rectangle
+from rotating_calipers import dispatch
+
+# Single hull entry points and the scalar and vectorized kernels behind them
+PATHS = {'diameter': (diameter, 'scalar_diameter', 'antipodal_pairs'),
+         'maxdist': (maxdist, 'scalar_max_distance', 'compute_max_distances'),
+         'min_area_rectangle': (minimum_area_rectangle, 'scalar_min_area', 'score_edges')}
+
+
+def circle(n, shift=0.0):
+    a = np.arange(n) * 2 * np.pi / n
+    return np.stack([np.cos(a) + shift, np.sin(a)], axis=1)
+
+
+def run(kernel, n, monkeypatch):
+    # The kernels that ran for hulls of n vertices, and the optimum
+    module, scalar, vectorized = PATHS[kernel]
+    ran = []
+    with monkeypatch.context() as patch:
+        for name in (scalar, vectorized):
+            def spy(*args, _name=name, _function=getattr(module, name), **kwargs):
+                ran.append(_name)
+                return _function(*args, **kwargs)
+            patch.setattr(module, name, spy)
+        if kernel == 'diameter':
+            return ran, diameter.diameter(circle(n))[2]
+        if kernel == 'maxdist':
+            return ran, maxdist.max_distance(circle(n), circle(n, 0.5))[2]
+        return ran, minimum_area_rectangle.min_area_rectangle(circle(n))[1]
+
+
+@pytest.mark.parametrize('kernel', sorted(PATHS))
+def test_crossover(kernel, monkeypatch):
+    monkeypatch.setitem(dispatch.SCALAR_MAX_VERTICES, kernel, 16)
+    _, scalar, vectorized = PATHS[kernel]
+    assert dispatch.use_scalar(kernel, 16) and not dispatch.use_scalar(kernel, 17)
+    below, _ = run(kernel, 16, monkeypatch)
+    above, value = run(kernel, 17, monkeypatch)
+    assert scalar in below and vectorized not in below
+    assert vectorized in above and scalar not in above
+    # Both kernels give the same answer on the same hull
+    monkeypatch.setitem(dispatch.SCALAR_MAX_VERTICES, kernel, 17)
+    ran, scalar_value = run(kernel, 17, monkeypatch)
+    assert scalar in ran
+    assert np.isclose(scalar_value, value)
+
+
+def test_calibrate(monkeypatch):
+    monkeypatch.setattr(dispatch, 'SCALAR_MAX_VERTICES', dict(dispatch.SCALAR_MAX_VERTICES))
+    saved = dict(dispatch.SCALAR_MAX_VERTICES)
+    sizes = (4, 8, 16)
+    thresholds, timings = dispatch.calibrate(sizes=sizes, min_time=1e-4, apply=False)
+    assert dispatch.SCALAR_MAX_VERTICES == saved
+    assert sorted(thresholds) == sorted(saved)
+    for kernel, rows in timings.items():
+        assert [row[0] for row in rows] == list(sizes[:len(rows)])
+        assert all(scalar > 0 and vectorized > 0 for _, scalar, vectorized in rows)
+        # The largest size before the first one where the vectorized path won
+        faster = [size for size, scalar, vectorized in rows if scalar > vectorized]
+        if faster:
+            assert faster == [rows[-1][0]]
+            assert thresholds[kernel] == (rows[-2][0] if len(rows) > 1 else 0)
+        else:
+            assert thresholds[kernel] == sizes[-1]
+    applied, _ = dispatch.calibrate(kernels=('diameter',), sizes=sizes, min_time=1e-4)
+    assert dispatch.SCALAR_MAX_VERTICES['diameter'] == applied['diameter']
+    assert dispatch.SCALAR_MAX_VERTICES['maxdist'] == saved['maxdist']
+
+
+def test_unknown_kernel():
+    with pytest.raises(ValueError):
+        dispatch.calibrate(kernels=('hull',))
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from reference import SMALL_HULLS, random_hulls, random_points, with_collinear_vertex, with_repeated_vertex
+from rotating_calipers import parallel_hull
+from rotating_calipers.hull import clean_hull, convex_hull, convex_hulls, merge_hulls
+from rotating_calipers.parallel_hull import parallel_convex_hull
+
+HULLS = random_hulls(40)
+
+
+def check_hull(points, vertices):
+    hull = points[vertices]
+    # Counter-clockwise from the leftmost (then lowest) point, turning left at every vertex
+    assert vertices[0] == np.lexsort((points[:, 1], points[:, 0]))[0]
+    edges = np.roll(hull, -1, axis=0) - hull
+    following = np.roll(edges, -1, axis=0)
+    assert np.all(edges[:, 0] * following[:, 1] - edges[:, 1] * following[:, 0] > 0)
+    # Every point on the inner side of every edge
+    for a, e in zip(hull, edges):
+        w = points - a
+        assert np.all(e[0] * w[:, 1] - e[1] * w[:, 0] >= -1e-12)
+
+
+def test_convex_hull():
+    for points, hull in HULLS:
+        vertices = convex_hull(points)
+        check_hull(points, vertices)
+        assert np.array_equal(convex_hull(points, prefilter=False), vertices)
+
+
+def test_convex_hull_matches_scipy():
+    spatial = pytest.importorskip('scipy.spatial')
+    rng = np.random.default_rng(41)
+    for n in (3, 10, 100, 1000):
+        points = random_points(rng, n, 'normal')
+        assert set(convex_hull(points)) == set(spatial.ConvexHull(points).vertices)
+
+
+def test_convex_hulls_batch():
+    offsets = np.cumsum([0] + [len(points) for points, _ in HULLS])
+    coords = np.concatenate([points for points, _ in HULLS])
+    vertices, hull_offsets = convex_hulls(coords, offsets)
+    for k, (points, hull) in enumerate(HULLS):
+        assert np.array_equal(coords[vertices[hull_offsets[k]:hull_offsets[k + 1]]], hull)
+
+
+def test_small_point_sets():
+    assert np.array_equal(convex_hull(SMALL_HULLS[0]), [0])
+    assert np.array_equal(convex_hull(SMALL_HULLS[1]), [0, 1])
+    assert len(convex_hull(SMALL_HULLS[2])) == 1
+    collinear = np.array([[2.0, 2.0], [0.0, 0.0], [1.0, 1.0], [3.0, 3.0]])
+    assert np.array_equal(convex_hull(collinear), [1, 3])
+
+
+def test_clean_hull():
+    for _, hull in HULLS:
+        assert np.array_equal(clean_hull(hull), np.arange(len(hull)))
+        for k in (0, 1, len(hull) - 1):
+            assert np.array_equal(with_repeated_vertex(hull, k)[clean_hull(with_repeated_vertex(hull, k))], hull)
+    # Exactly collinear midpoints only, e.g. on a lattice
+    square = np.array([[0.0, 0.0], [2.0, 0.0], [2.0, 2.0], [0.0, 2.0]])
+    assert np.array_equal(clean_hull(with_collinear_vertex(square, 1)), [0, 1, 3, 4])
+    assert np.array_equal(clean_hull(SMALL_HULLS[2]), [0])
+    assert np.array_equal(clean_hull(SMALL_HULLS[3]), [0, 1])
+    assert np.array_equal(clean_hull(np.array([[0.0, 0.0], [1.0, 1.0], [2.0, 2.0], [1.0, 1.0]])), [0, 2])
+
+
+def test_merge_hulls():
+    for k, (points, _) in enumerate(HULLS):
+        other = HULLS[(k + 1) % len(HULLS)][0] + 0.3 * (k % 4)
+        both = np.concatenate([points, other])
+        first = convex_hull(points)
+        second = convex_hull(other) + len(points)
+        assert np.array_equal(both[merge_hulls(both, first, second)], both[convex_hull(both)])
+
+
+def test_parallel_convex_hull(monkeypatch):
+    monkeypatch.setattr(parallel_hull, 'MIN_SHARD', 50)
+    rng = np.random.default_rng(42)
+    points = np.concatenate([random_points(rng, 300, kind) for kind in ('normal', 'circle', 'lattice')])
+    assert np.array_equal(parallel_convex_hull(points, workers=2, shards=4), convex_hull(points))
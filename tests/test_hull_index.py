@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from reference import SMALL_HULLS, degenerate_variants, random_hulls
+from rotating_calipers.hull_index import HullIndex
+
+HULLS = random_hulls(90, count=16)
+
+
+def angles_for(hull, rng):
+    # Random angles, the axes and every edge normal, where the support is a
+    # whole edge and either end is right
+    e = np.roll(hull, -1, axis=0) - hull
+    normals = np.arctan2(-e[:, 0], e[:, 1])
+    return np.concatenate([rng.uniform(-np.pi, 3 * np.pi, 200), np.arange(8) * np.pi / 4, normals])
+
+
+def projections(points, angles):
+    return points @ np.stack([np.cos(angles), np.sin(angles)])
+
+
+def check(points, index, angles):
+    along = projections(points, angles)
+    across = projections(points, angles + np.pi / 2)
+    scale = 1e-12 * (1 + np.abs(points).max())
+
+    vertices, support = index.support(angles)
+    assert np.array_equal(points[vertices], support)
+    assert np.allclose(np.einsum('ij,ij->i', support, np.stack([np.cos(angles), np.sin(angles)], axis=1)),
+                       along.max(axis=0), rtol=0, atol=scale)
+
+    low, high = index.extent(angles)
+    assert np.allclose(low, along.min(axis=0), rtol=0, atol=scale)
+    assert np.allclose(high, along.max(axis=0), rtol=0, atol=scale)
+    low, high = index.extent(angles, turns=1)
+    assert np.allclose(high - low, np.ptp(across, axis=0), rtol=0, atol=scale)
+    assert np.allclose(index.width(angles), np.ptp(along, axis=0), rtol=0, atol=scale)
+
+    corners, areas = index.oriented_box(angles)
+    assert np.allclose(areas, np.ptp(along, axis=0) * np.ptp(across, axis=0), rtol=1e-12, atol=scale)
+    # The corners span exactly the extents of the points
+    for k in (0, len(angles) // 2, len(angles) - 1):
+        box = corners[k]
+        assert np.allclose(projections(box, angles[k:k + 1]).ravel()[[0, 1]],
+                           [along[:, k].min(), along[:, k].max()], atol=scale)
+        assert np.allclose(projections(box, angles[k:k + 1] + np.pi / 2).ravel()[[1, 2]],
+                           [across[:, k].min(), across[:, k].max()], atol=scale)
+
+
+def test_against_projections():
+    rng = np.random.default_rng(91)
+    for points, hull in HULLS:
+        angles = angles_for(hull, rng)
+        check(hull, HullIndex(hull), angles)
+        check(points, HullIndex(points, compute_hull=True), angles)
+
+
+def test_degenerate_hulls():
+    rng = np.random.default_rng(92)
+    for _, hull in HULLS:
+        for variant in degenerate_variants(hull):
+            check(variant, HullIndex(variant), angles_for(hull, rng))
+    for hull in SMALL_HULLS:
+        check(hull, HullIndex(hull), rng.uniform(0, 2 * np.pi, 50))
+
+
+def test_shapes():
+    index = HullIndex(HULLS[0][1])
+    vertices, support = index.support(0.3)
+    assert vertices.shape == () and support.shape == (2,)
+    assert index.width(0.3).shape == ()
+    angles = np.linspace(0, 1, 12).reshape(3, 4)
+    assert index.support(angles)[1].shape == (3, 4, 2)
+    corners, areas = index.oriented_box(angles)
+    assert corners.shape == (3, 4, 4, 2) and areas.shape == (3, 4)
+    assert np.allclose(index.width(angles), index.width(angles.ravel()).reshape(3, 4))
+
+
+def test_empty_input():
+    with pytest.raises(ValueError):
+        HullIndex(np.zeros((0, 2)))
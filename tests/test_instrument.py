@@ -0,0 +1,94 @@
+import numpy as np
+from diameter.diameter import compute_bounding_rectangle as sweep_diameter
+from diameter.diameter import compute_diameters
+from maxdist.maxdist import compute_bounding_rectangle as sweep_maxdist
+from maxdist.maxdist import compute_max_distances
+from minimum_area_rectangle.minimum_area_rectangle import compute_bounding_rectangle as sweep_rectangle
+from minimum_area_rectangle.minimum_area_rectangle import compute_bounding_rectangles
+from rotating_calipers.hull import convex_hull
+from rotating_calipers.instrument import PHASES, SweepStats, timed
+
+SQUARE = np.array([[0.0, 0.0], [4.0, 0.0], [4.0, 3.0], [0.0, 3.0]])
+
+
+def hulls(count=6):
+    # Random hulls without parallel edges, so no step is a tie
+    rng = np.random.default_rng(110)
+    result = []
+    for n in rng.integers(3, 60, count):
+        points = rng.normal(size=(n, 2))
+        result.append((points, points[convex_hull(points)]))
+    return result
+
+
+def states(sweep, *args, **kwargs):
+    stats = SweepStats()
+    count = len(list(sweep(*args, stats=stats, **kwargs)))
+    return count, stats
+
+
+def test_sweep_counts():
+    # Every state but the first is one caliper step, and the calipers walk
+    # each hull edge once: n + 1 states, two hulls for maxdist
+    for points, hull in hulls():
+        n = len(hull)
+        for count, stats, vertices, hull_count in (
+                states(sweep_rectangle, hull) + (n, 1), states(sweep_diameter, hull) + (n, 1),
+                states(sweep_maxdist, hull, hull + [5.0, 0.0]) + (2 * n, 2),
+                states(sweep_rectangle, points, compute_hull=True) + (n, 1)):
+            assert count == vertices + 1
+            assert stats.steps == count
+            assert stats.ties == 0
+            assert stats.calls == 1
+            assert stats.hulls == hull_count
+            assert stats.hull_vertices == vertices
+
+
+def test_ties():
+    # On a rectangle the calipers reach parallel edges together
+    count, stats = states(sweep_rectangle, SQUARE)
+    assert (count, stats.steps, stats.ties) == (2, 2, 3)
+    count, stats = states(sweep_diameter, SQUARE)
+    assert (count, stats.steps, stats.ties) == (5, 5, 3)
+
+
+def test_batch_counts():
+    hull_list = [hull for _, hull in hulls()]
+    offsets = np.cumsum([0] + [len(hull) for hull in hull_list])
+    coords = np.concatenate(hull_list)
+    stats = SweepStats()
+    compute_bounding_rectangles(coords, offsets, stats=stats)
+    # One candidate per hull edge
+    assert (stats.steps, stats.hulls, stats.hull_vertices, stats.calls) == (len(coords), len(hull_list), len(coords), 1)
+    stats.reset()
+    pairs, _ = compute_diameters(coords, offsets, stats=stats)
+    assert stats.hulls == len(hull_list) and stats.calls == 1
+    assert stats.steps >= len(hull_list)
+    stats.reset()
+    compute_max_distances(coords, offsets, coords + [5.0, 0.0], offsets, stats=stats)
+    assert (stats.hulls, stats.hull_vertices) == (2 * len(hull_list), 2 * len(coords))
+
+
+def test_accumulate_and_reset():
+    seen = []
+    stats = SweepStats(callback=seen.append)
+    list(sweep_rectangle(SQUARE, stats=stats))
+    list(sweep_rectangle(SQUARE, stats=stats))
+    assert (stats.calls, stats.steps, stats.hulls) == (2, 4, 2)
+    assert [entry['calls'] for entry in seen] == [1, 2]
+    assert sorted(seen[-1]) == sorted(['calls', 'steps', 'ties', 'hulls', 'hull_vertices'] +
+                                      [phase + '_time' for phase in PHASES])
+    assert all(seen[-1][phase + '_time'] >= 0 for phase in PHASES)
+    assert stats.times['sweep'] > 0
+    stats.reset()
+    assert stats.as_dict() == dict(calls=0, steps=0, ties=0, hulls=0, hull_vertices=0,
+                                   **{phase + '_time': 0.0 for phase in PHASES})
+
+
+def test_timed():
+    stats = SweepStats()
+    with timed(stats, 'hull'):
+        sum(range(1000))
+    assert stats.times['hull'] > 0
+    with timed(None, 'hull'):
+        pass
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from reference import KINDS, random_points
+from rotating_calipers.hull import convex_hull
+from rotating_calipers.mapped import hull_from_file, metrics_from_file
+from rotating_calipers.metrics import compute_metrics
+
+
+def point_sets():
+    rng = np.random.default_rng(100)
+    return [random_points(rng, 1000, kind) for kind in KINDS]
+
+
+def check(points, path, **kwargs):
+    # The file read in chunks against the same points in memory
+    for chunk_size in (7, 100, 1 << 20):
+        rows, hull = hull_from_file(path, chunk_size=chunk_size, **kwargs)
+        assert np.array_equal(points[rows], hull)
+        expected = points[convex_hull(points)]
+        assert sorted(map(tuple, hull.tolist())) == sorted(map(tuple, expected.tolist()))
+
+        result = metrics_from_file(path, chunk_size=chunk_size, **kwargs)
+        in_memory = compute_metrics(points, compute_hull=True)
+        assert sorted(result) == sorted(in_memory)
+        assert np.isclose(result['diameter'][2], in_memory['diameter'][2])
+        assert np.isclose(result['area'][1], in_memory['area'][1])
+        assert np.isclose(result['perimeter'][1], in_memory['perimeter'][1])
+        width, edge, opposite = result['width']
+        assert np.isclose(width, in_memory['width'][0])
+        # Vertex numbers are rows in the file
+        e = points[rows[(list(rows).index(edge) + 1) % len(rows)]] - points[edge]
+        d = points[opposite] - points[edge]
+        assert np.isclose(abs(e[0] * d[1] - e[1] * d[0]) / np.hypot(*e), width)
+
+
+def test_npy(tmp_path):
+    for points in point_sets():
+        np.save(tmp_path / 'points.npy', points)
+        check(points, tmp_path / 'points.npy')
+
+
+def test_raw(tmp_path):
+    for points in point_sets():
+        points = points.astype(np.float32)
+        with open(tmp_path / 'points.bin', 'wb') as f:
+            f.write(b'header..')
+            f.write(points.tobytes())
+        check(points.astype(np.float64), tmp_path / 'points.bin', dtype=np.float32, offset=8)
+
+
+def test_metrics_subset(tmp_path):
+    points = point_sets()[0]
+    np.save(tmp_path / 'points.npy', points)
+    assert sorted(metrics_from_file(tmp_path / 'points.npy', metrics=('area',), chunk_size=64)) == ['area']
+
+
+def test_bad_files(tmp_path):
+    np.save(tmp_path / 'empty.npy', np.zeros((0, 2)))
+    np.save(tmp_path / 'flat.npy', np.zeros(6))
+    np.zeros(5).tofile(tmp_path / 'odd.bin')
+    for path in ('empty.npy', 'flat.npy', 'odd.bin'):
+        with pytest.raises(ValueError):
+            metrics_from_file(tmp_path / path)
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+from maxdist import maxdist
+from maxdist.maxdist import (compute_max_distances, compute_min_distance, compute_min_distances, farthest_partners,
+                             hull_pair_distances, max_distance, max_distance_matrix)
+from reference import SMALL_HULLS, degenerate_variants, farthest_pair, min_distance, random_hulls
+from rotating_calipers import dispatch
+
+HULLS = random_hulls(20)
+
+
+@pytest.fixture(params=['vectorized', 'scalar'])
+def path(request, monkeypatch):
+    # Run max_distance() on one kernel whatever the hull sizes
+    monkeypatch.setitem(dispatch.SCALAR_MAX_VERTICES, 'maxdist', 0 if request.param == 'vectorized' else 10 ** 6)
+    return request.param
+
+
+def pairs_of_hulls():
+    # Each hull against the next one, shifted so that some overlap and some don't
+    for k, (points, hull) in enumerate(HULLS):
+        other_points, other = HULLS[(k + 1) % len(HULLS)]
+        shift = np.array([0.5 * (k % 5), 0.0])
+        yield points, hull, other_points + shift, other + shift
+
+
+def check(points1, points2, result):
+    i, j, length = result
+    assert np.isclose(length, farthest_pair(points1, points2))
+    assert np.isclose(np.linalg.norm(points1[i] - points2[j]), length)
+
+
+def test_random_hulls(path):
+    for points1, hull1, points2, hull2 in pairs_of_hulls():
+        check(hull1, hull2, max_distance(hull1, hull2))
+        check(points1, points2, max_distance(points1, points2, compute_hull=True))
+
+
+def test_degenerate_hulls(path):
+    for _, hull1, _, hull2 in pairs_of_hulls():
+        for variant in degenerate_variants(hull1):
+            check(variant, hull2, max_distance(variant, hull2))
+            check(hull2, variant, max_distance(hull2, variant))
+
+
+def test_small_hulls(path):
+    for _, hull, _, _ in list(pairs_of_hulls())[:8]:
+        for small in SMALL_HULLS:
+            check(small, hull, max_distance(small, hull))
+            check(hull, small, max_distance(hull, small))
+            check(small, small[::-1] + 1.0, max_distance(small, small[::-1] + 1.0))
+
+
+def test_batch():
+    first, second = [], []
+    for _, hull1, _, hull2 in pairs_of_hulls():
+        for variant in degenerate_variants(hull1):
+            first.append(variant)
+            second.append(hull2)
+    first += SMALL_HULLS
+    second += SMALL_HULLS[::-1]
+    offsets1 = np.cumsum([0] + [len(hull) for hull in first])
+    offsets2 = np.cumsum([0] + [len(hull) for hull in second])
+    coords1, coords2 = np.concatenate(first), np.concatenate(second)
+    pairs, lengths = compute_max_distances(coords1, offsets1, coords2, offsets2)
+    for k in range(len(first)):
+        assert np.isclose(lengths[k], farthest_pair(first[k], second[k]))
+        assert np.isclose(np.linalg.norm(coords1[pairs[k, 0]] - coords2[pairs[k, 1]]), lengths[k])
+
+
+def test_min_distance():
+    for _, hull1, _, hull2 in pairs_of_hulls():
+        # Far enough apart to never overlap
+        hull2 = hull2 + [np.ptp(hull1[:, 0]) + np.ptp(hull2[:, 0]) + 1.0, 0.0]
+        expected = min_distance(hull1, hull2)
+        variants = degenerate_variants(hull1)
+        offsets1 = np.cumsum([0] + [len(hull) for hull in variants])
+        offsets2 = np.arange(len(variants) + 1) * len(hull2)
+        _, distances, _, overlap = compute_min_distances(np.concatenate(variants), offsets1,
+                                                         np.tile(hull2, (len(variants), 1)), offsets2)
+        assert np.allclose(distances, expected)
+        assert not overlap.any()
+        for variant in variants:
+            p, q, distance, _, overlap = compute_min_distance(variant, hull2)
+            assert np.isclose(distance, expected)
+            assert np.isclose(np.linalg.norm(p - q), distance)
+            assert not overlap
+
+
+def test_min_distance_overlap():
+    for _, hull in HULLS:
+        inner = hull * 0.5 + hull.mean(axis=0) * 0.5
+        for variant in degenerate_variants(hull):
+            assert compute_min_distance(variant, inner, overlap_only=True)
+            assert compute_min_distance(variant, inner)[2:] == (0.0, None, True)
+
+
+def test_distance_matrix(monkeypatch):
+    hulls = [hull for _, hull in HULLS[:12]] + SMALL_HULLS[:2]
+    offsets = np.cumsum([0] + [len(hull) for hull in hulls])
+    coords = np.concatenate(hulls)
+    expected = np.array([[farthest_pair(a, b) for b in hulls] for a in hulls])
+    measured = []
+
+    def counted(coords, offsets, first, second):
+        measured.append(first.shape[0])
+        return hull_pair_distances(coords, offsets, first, second)
+    monkeypatch.setattr(maxdist, 'hull_pair_distances', counted)
+    assert np.allclose(max_distance_matrix(coords, offsets), expected)
+    pairs = len(hulls) * (len(hulls) - 1) // 2
+    assert measured == [pairs]
+    approximate = max_distance_matrix(coords, offsets, rtol=0.05)
+    assert measured[1] < pairs
+    assert np.all(approximate <= expected * (1 + 1e-12))
+    assert np.all(approximate >= expected / 1.05 - 1e-12)
+
+    partners, lengths = farthest_partners(coords, offsets, k=3)
+    masked = np.where(np.eye(len(hulls), dtype=bool), -np.inf, expected)
+    assert np.allclose(lengths, -np.sort(-masked, axis=1)[:, :3])
+    assert np.allclose(expected[np.arange(len(hulls))[:, None], partners], lengths)
+
+
+def test_empty_input(path):
+    hull = HULLS[0][1]
+    for compute_hull in (False, True):
+        for points1, points2 in ((np.zeros((0, 2)), hull), (hull, np.zeros((0, 2)))):
+            with pytest.raises(ValueError, match='at least one point'):
+                max_distance(points1, points2, compute_hull=compute_hull)
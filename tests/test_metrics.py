@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from reference import (SMALL_HULLS, degenerate_variants, farthest_pair, min_area_box, random_hulls,
+                       with_collinear_vertex, with_repeated_vertex)
+from rotating_calipers import dispatch
+from rotating_calipers.hull import convex_hull
+from rotating_calipers.lattice import doubled_area, exact_diameter, exact_max_distance, exact_min_area_rectangle
+from rotating_calipers.metrics import compute_metrics
+
+HULLS = random_hulls(50)
+
+
+def flush_boxes(hull):
+    # Width and height of the box flush with every hull edge
+    edges = np.roll(hull, -1, axis=0) - hull
+    u = edges / np.linalg.norm(edges, axis=1)[:, None]
+    along = hull @ u.T
+    across = hull @ np.stack([-u[:, 1], u[:, 0]], axis=1).T
+    return np.ptp(along, axis=0), np.ptp(across, axis=0)
+
+
+def test_metrics():
+    for points, hull in HULLS:
+        width, height = flush_boxes(hull)
+        for variant in degenerate_variants(hull):
+            result = compute_metrics(variant)
+            p, q, length = result['diameter']
+            assert np.isclose(length, farthest_pair(hull))
+            assert np.isclose(np.linalg.norm(p - q), length)
+            assert np.isclose(result['width'][0], height.min())
+            assert np.isclose(result['area'][1], min_area_box(hull))
+            assert np.isclose(result['perimeter'][1], 2 * (width + height).min())
+        result = compute_metrics(points, compute_hull=True)
+        assert np.isclose(result['diameter'][2], farthest_pair(points))
+        assert np.isclose(result['area'][1], min_area_box(points))
+
+
+def test_metrics_small_hulls():
+    for hull in SMALL_HULLS:
+        result = compute_metrics(hull)
+        assert np.isclose(result['diameter'][2], farthest_pair(hull))
+        assert result['width'][0] == 0
+        assert result['area'][1] == 0
+
+
+def lattice_hulls(seed, count=40):
+    rng = np.random.default_rng(seed)
+    hulls = []
+    while len(hulls) < count:
+        points = rng.integers(-20, 21, size=(int(rng.integers(3, 40)), 2))
+        hull = points[convex_hull(points)]
+        if hull.shape[0] >= 3:
+            # Doubled so that edge midpoints stay on the lattice
+            hulls.append(2 * hull)
+    return hulls
+
+
+@pytest.mark.parametrize('threshold', [0, 10 ** 6])
+def test_lattice(monkeypatch, threshold):
+    for kernel in dispatch.SCALAR_MAX_VERTICES:
+        monkeypatch.setitem(dispatch.SCALAR_MAX_VERTICES, kernel, threshold)
+    for hull in lattice_hulls(51):
+        other = hull[::-1].copy()
+        other[:, 0] += 30
+        other = other[convex_hull(other)]
+        for variant in [hull, with_repeated_vertex(hull), with_repeated_vertex(hull, 1),
+                        with_collinear_vertex(hull).astype(np.int64)]:
+            values = variant.astype(np.float64)
+            i, j, dist_sq = exact_diameter(variant)
+            assert isinstance(dist_sq, int)
+            assert dist_sq == round(farthest_pair(values) ** 2)
+            assert ((variant[i] - variant[j]) ** 2).sum() == dist_sq
+            _, _, dist_sq = exact_max_distance(variant, other)
+            assert dist_sq == round(farthest_pair(values, other.astype(np.float64)) ** 2)
+            _, area, _, _ = exact_min_area_rectangle(variant)
+            assert np.isclose(float(area), min_area_box(values))
+            assert doubled_area(variant) == doubled_area(hull)
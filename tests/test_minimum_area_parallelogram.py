@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from minimum_area_rectangle.minimum_area_parallelogram import min_area_parallelogram
+from reference import (SMALL_HULLS, degenerate_variants, encloses, min_area_parallelogram_pairs, polygon_area,
+                       random_hulls)
+
+HULLS = random_hulls(51, count=30, low=3, high=60)
+
+
+def check(points, result):
+    corners, area, _ = result
+    assert corners.shape == (4, 2)
+    assert encloses(corners, points)
+    assert np.isclose(polygon_area(corners), area)
+    # Opposite sides are parallel
+    e = np.roll(corners, -1, axis=0) - corners
+    assert np.allclose(e[:2], -e[2:])
+    return area
+
+
+def test_against_brute_force():
+    for points, hull in HULLS:
+        area = check(hull, min_area_parallelogram(hull))
+        assert np.isclose(area, min_area_parallelogram_pairs(hull))
+        assert np.isclose(check(points, min_area_parallelogram(points, compute_hull=True)), area)
+
+
+def test_degenerate_hulls():
+    for _, hull in HULLS:
+        expected = min_area_parallelogram_pairs(hull)
+        for variant in degenerate_variants(hull):
+            assert np.isclose(check(variant, min_area_parallelogram(variant)), expected)
+
+
+def test_sides_are_flush_with_hull_edges():
+    square = np.array([[0.0, 0.0], [2.0, 0.0], [2.0, 2.0], [0.0, 2.0]])
+    corners, area, (i, j) = min_area_parallelogram(square)
+    assert np.isclose(area, 4.0)
+    assert {i % 2, j % 2} == {0, 1}
+
+
+def test_too_few_vertices():
+    collinear = np.array([[0.0, 0.0], [1.0, 1.0], [2.0, 2.0], [3.0, 3.0]])
+    for points in SMALL_HULLS + [collinear, np.zeros((0, 2))]:
+        for compute_hull in (False, True):
+            with pytest.raises(ValueError):
+                min_area_parallelogram(points, compute_hull=compute_hull)
@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+from minimum_area_rectangle.minimum_area_rectangle import (compute_bounding_rectangle, compute_bounding_rectangles,
+                                                           min_area_rectangle, scalar_min_area)
+from reference import SMALL_HULLS, degenerate_variants, min_area_box, random_hulls
+from rotating_calipers import dispatch
+from rotating_calipers.hull import convex_hull
+
+
+def circle(n):
+    a = np.arange(n) * 2 * np.pi / n
+    return np.stack([np.cos(a), np.sin(a)], axis=1)
+
+
+def test_repeated_vertex_batch():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        points = rng.normal(size=(10, 2))
+        hull = points[convex_hull(points)]
+        _, expected, _ = compute_bounding_rectangles(hull, [0, len(hull)])
+        k = rng.integers(0, len(hull))
+        repeated = np.insert(hull, k, hull[k], axis=0)
+        _, areas, _ = compute_bounding_rectangles(repeated, [0, len(repeated)])
+        assert np.isfinite(areas[0])
+        assert np.isclose(areas[0], expected[0])
+
+
+def test_repeated_vertex_single():
+    hull = circle(200)
+    repeated = np.insert(hull, 5, hull[5], axis=0)
+    _, expected, _, _ = min_area_rectangle(hull)
+    rect, area, _, edge = min_area_rectangle(repeated)
+    assert np.isclose(area, expected)
+    assert 0 <= edge < len(repeated)
+
+
+def test_single_point_hull():
+    rects, areas, _ = compute_bounding_rectangles(np.array([[2.0, 3.0], [2.0, 3.0], [0, 0], [1, 0], [0, 1]]),
+                                                  [0, 2, 5])
+    assert areas[0] == 0
+    assert np.allclose(rects[0], [2.0, 3.0])
+    assert np.isclose(areas[1], 1.0)
+
+
+@pytest.mark.parametrize('threshold', [0, 1000])
+def test_scalar_and_vectorized_agree_on_degenerate_hull(monkeypatch, threshold):
+    # threshold 0 always runs the vectorized kernel, 1000 the scalar one
+    monkeypatch.setitem(dispatch.SCALAR_MAX_VERTICES, 'min_area_rectangle', threshold)
+    square = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+    _, area, _, edge = min_area_rectangle(square)
+    assert area == 1.0
+    assert edge in (0, 1, 2, 3, 4)
+    hull = circle(40)
+    repeated = np.insert(hull, 0, hull[0], axis=0)
+    _, area, _, _ = min_area_rectangle(repeated)
+    assert np.isclose(area, min_area_rectangle(hull)[1])
+
+
+def test_scalar_kernel_skips_zero_edges():
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        points = rng.normal(size=(12, 2))
+        hull = points[convex_hull(points)]
+        k = rng.integers(0, len(hull))
+        repeated = np.insert(hull, k, hull[k], axis=0)
+        _, areas, _ = compute_bounding_rectangles(repeated, [0, len(repeated)])
+        _, numerator, length_sq, _, _, _ = scalar_min_area(repeated.tolist())
+        assert np.isclose(numerator / length_sq, areas[0])
+    assert scalar_min_area([[1.0, 2.0], [1.0, 2.0], [1.0, 2.0]]) is None
+
+
+HULLS = random_hulls(30)
+
+
+@pytest.fixture(params=['vectorized', 'scalar'])
+def path(request, monkeypatch):
+    # Run min_area_rectangle() on one kernel whatever the hull size
+    monkeypatch.setitem(dispatch.SCALAR_MAX_VERTICES, 'min_area_rectangle',
+                        0 if request.param == 'vectorized' else 10 ** 6)
+    return request.param
+
+
+def check(points, result):
+    rect, area, _, _ = result
+    assert np.isclose(area, min_area_box(points), atol=1e-12)
+    # The rectangle has that area and holds every point
+    sides = np.roll(rect, -1, axis=0) - rect
+    assert np.isclose(np.linalg.norm(sides[0]) * np.linalg.norm(sides[1]), area, atol=1e-12)
+    for k in range(4):
+        w = points - rect[k]
+        across = sides[k][0] * w[:, 1] - sides[k][1] * w[:, 0]
+        assert np.all(across >= -1e-9 * max(1.0, np.abs(rect).max()))
+
+
+def test_random_hulls(path):
+    for points, hull in HULLS:
+        check(hull, min_area_rectangle(hull))
+        check(points, min_area_rectangle(points, compute_hull=True))
+
+
+def test_degenerate_hulls(path):
+    for _, hull in HULLS:
+        for variant in degenerate_variants(hull):
+            check(variant, min_area_rectangle(variant))
+
+
+def test_small_hulls(path):
+    for hull in SMALL_HULLS:
+        _, area, _, _ = min_area_rectangle(hull)
+        assert area == 0
+        _, area, _, _ = min_area_rectangle(hull, compute_hull=True)
+        assert area == 0
+
+
+def test_batch_against_brute_force():
+    hulls = [variant for _, hull in HULLS for variant in degenerate_variants(hull)] + SMALL_HULLS
+    offsets = np.cumsum([0] + [len(hull) for hull in hulls])
+    _, areas, _ = compute_bounding_rectangles(np.concatenate(hulls), offsets)
+    assert np.allclose(areas, [min_area_box(hull) for hull in hulls], atol=1e-12)
+
+
+def test_sweep_against_brute_force():
+    for _, hull in HULLS[:12]:
+        for variant in degenerate_variants(hull):
+            areas = [np.linalg.norm(r[1] - r[0]) * np.linalg.norm(r[2] - r[1])
+                     for r in compute_bounding_rectangle(variant)]
+            assert np.isclose(min(areas), min_area_box(variant))
+
+
+def test_bad_offsets():
+    coords = np.concatenate([hull for _, hull in HULLS[:3]])
+    sizes = [len(hull) for _, hull in HULLS[:3]]
+    for offsets in ([0, sizes[0], sizes[0], len(coords)], [1, sizes[0], len(coords)],
+                    [0, sizes[0] + sizes[1], sizes[0], len(coords)], [0, len(coords) + 1]):
+        with pytest.raises(ValueError):
+            compute_bounding_rectangles(coords, offsets)
+        with pytest.raises(ValueError):
+            compute_bounding_rectangles(coords, offsets, compute_hull=True)
+
+
+def test_empty_input():
+    for compute_hull in (False, True):
+        with pytest.raises(ValueError, match='at least one point'):
+            min_area_rectangle(np.zeros((0, 2)), compute_hull=compute_hull)
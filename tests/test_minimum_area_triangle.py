@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from minimum_area_rectangle.minimum_area_triangle import min_area_triangle
+from reference import (SMALL_HULLS, degenerate_variants, encloses, min_area_triangle_search, polygon_area,
+                       random_hulls)
+
+HULLS = random_hulls(50, count=8, low=3, high=25)
+
+
+def check(points, result):
+    corners, area, sides = result
+    assert corners.shape == (3, 2)
+    assert encloses(corners, points)
+    assert np.isclose(polygon_area(corners), area)
+    # At least one side is flush with a hull edge
+    assert any(k >= 0 for k in sides)
+    return area
+
+
+def test_against_search():
+    for points, hull in HULLS:
+        area = check(hull, min_area_triangle(hull))
+        # The search never goes below the optimum
+        assert area <= min_area_triangle_search(hull) * (1 + 1e-9)
+        assert np.isclose(check(points, min_area_triangle(points, compute_hull=True)), area)
+
+
+def test_degenerate_hulls():
+    for _, hull in HULLS:
+        expected = min_area_triangle(hull)[1]
+        for variant in degenerate_variants(hull):
+            assert np.isclose(check(variant, min_area_triangle(variant)), expected)
+
+
+def test_triangle_is_its_own_optimum():
+    triangle = np.array([[0.0, 0.0], [4.0, 0.0], [1.0, 3.0]])
+    corners, area, sides = min_area_triangle(triangle)
+    assert np.isclose(area, 6.0)
+    assert sorted(sides) == [0, 1, 2]
+
+
+def test_too_few_vertices():
+    collinear = np.array([[0.0, 0.0], [1.0, 1.0], [2.0, 2.0], [3.0, 3.0]])
+    for points in SMALL_HULLS + [collinear, np.zeros((0, 2))]:
+        for compute_hull in (False, True):
+            with pytest.raises(ValueError):
+                min_area_triangle(points, compute_hull=compute_hull)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from diameter import diameter
+from maxdist import maxdist
+from minimum_area_rectangle import minimum_area_rectangle
+from reference import degenerate_variants, random_hulls
+from rotating_calipers.engine import SweepRecord
+from rotating_calipers.hull import clean_hull
+
+HULLS = random_hulls(120, count=12)
+
+
+def test_rectangle_states():
+    for points, hull in HULLS:
+        for variant in degenerate_variants(hull):
+            states = list(minimum_area_rectangle.compute_bounding_rectangle(variant))
+            record = minimum_area_rectangle.record_bounding_rectangles(variant)
+            rectangles, calipers, angles, edge_pairs = record.result()
+            assert record.count == len(states)
+            assert np.allclose(rectangles[:, 0], states)
+            assert calipers.shape == (len(states), 4) and edge_pairs is None
+        states = list(minimum_area_rectangle.compute_bounding_rectangle(points, compute_hull=True))
+        record = minimum_area_rectangle.record_bounding_rectangles(points, compute_hull=True)
+        assert np.allclose(record.result()[0][:, 0], states)
+
+
+def test_diameter_states():
+    for points, hull in HULLS:
+        for variant in degenerate_variants(hull):
+            states = list(diameter.compute_bounding_rectangle(variant))
+            record = diameter.record_bounding_rectangle(variant)
+            rectangles, calipers, angles, edge_pairs = record.result()
+            assert record.count == len(states)
+            # Indices refer to the hull the sweep ran on, the variant cleaned
+            cleaned = variant[clean_hull(variant)]
+            for k, (rectangle, (p2, p4), edge_pair) in enumerate(states):
+                assert np.allclose(rectangles[k, 0], rectangle)
+                assert np.array_equal(cleaned[calipers[k, 1]], p2)
+                assert np.array_equal(cleaned[calipers[k, 3]], p4)
+                if edge_pair is None:
+                    assert tuple(edge_pairs[k]) == (-1, -1)
+                else:
+                    assert np.array_equal(cleaned[edge_pairs[k]], edge_pair)
+
+
+def test_maxdist_states():
+    for (_, hull1), (_, hull2) in zip(HULLS, HULLS[1:]):
+        hull2 = hull2 + [0.5, 0.0]
+        states = list(maxdist.compute_bounding_rectangle(hull1, hull2))
+        record = maxdist.record_bounding_rectangle(hull1, hull2)
+        rectangles, calipers, angles, _ = record.result()
+        assert record.count == len(states)
+        for k, ((p21, p42), rec1, rec2) in enumerate(states):
+            assert np.allclose(rectangles[k], [rec1, rec2])
+            assert np.array_equal(hull1[calipers[k, 1]], p21)
+            assert np.array_equal(hull2[calipers[k, 7]], p42)
+
+
+def test_reuse():
+    # One record sized for the largest hull serves every sweep
+    largest = max(len(variant) for _, hull in HULLS for variant in degenerate_variants(hull))
+    record = diameter.new_record(largest)
+    for _, hull in HULLS:
+        for variant in degenerate_variants(hull):
+            out = diameter.record_bounding_rectangle(variant, record)
+            assert out is record
+            assert record.count == len(list(diameter.compute_bounding_rectangle(variant)))
+
+
+def test_buffers_too_small():
+    hull = HULLS[0][1]
+    n = len(hull)
+    # Too few states, or room for two rectangles per state instead of one
+    for record in (minimum_area_rectangle.new_record(n - 1), SweepRecord(n + 1, 4, 2)):
+        with pytest.raises(ValueError, match='too small'):
+            minimum_area_rectangle.record_bounding_rectangles(hull, record)
+    # Too few states, or no room for the edge pairs
+    for record in (diameter.new_record(n - 1), minimum_area_rectangle.new_record(n + 1)):
+        with pytest.raises(ValueError, match='too small'):
+            diameter.record_bounding_rectangle(hull, record)
+    for record in (maxdist.new_record(n, n - 1), diameter.new_record(2 * n)):
+        with pytest.raises(ValueError, match='too small'):
+            maxdist.record_bounding_rectangle(hull, hull + [5.0, 0.0], record)
+
+
+def test_full_record():
+    record = SweepRecord(1, 4, 1)
+    states = minimum_area_rectangle.sweep_states(HULLS[0][1])
+    record.append(next(states))
+    with pytest.raises(ValueError, match='full'):
+        record.append(next(states))
@@ -0,0 +1,83 @@
+import numpy as np
+from reference import KINDS, farthest_pair, min_area_box, random_points
+from rotating_calipers.hull import convex_hull
+from rotating_calipers.streaming import StreamingHull
+
+
+def check(stream, points):
+    # The stream against the hull, diameter and rectangle of every point so far
+    hull = stream.hull()
+    expected = points[convex_hull(points)]
+    assert sorted(map(tuple, hull.tolist())) == sorted(map(tuple, expected.tolist()))
+    p, q, length = stream.diameter()
+    assert np.isclose(length, farthest_pair(expected))
+    assert np.isclose(np.linalg.norm(p - q), length)
+    rect, area = stream.min_area_rectangle()
+    assert np.isclose(area, min_area_box(expected), atol=1e-12)
+    assert rect.shape == (4, 2)
+
+
+def test_one_point_at_a_time():
+    rng = np.random.default_rng(60)
+    for kind in KINDS:
+        points = random_points(rng, 60, kind)
+        stream = StreamingHull()
+        for k, point in enumerate(points):
+            stream.add_point(point)
+            check(stream, points[:k + 1])
+
+
+def test_batches():
+    rng = np.random.default_rng(61)
+    for kind in KINDS:
+        points = random_points(rng, 400, kind)
+        stream = StreamingHull(points[:5])
+        # Small batches go point by point, large ones rebuild the hull
+        for start, stop in ((5, 8), (8, 40), (40, 400)):
+            stream.add_points(points[start:stop])
+            check(stream, points[:stop])
+
+
+def test_inside_points_do_not_change_the_hull():
+    square = np.array([[0.0, 0.0], [2.0, 0.0], [2.0, 2.0], [0.0, 2.0]])
+    stream = StreamingHull(square)
+    assert not stream.add_point((1.0, 1.0))
+    assert not stream.add_point((2.0, 1.0))  # on an edge
+    assert not stream.add_point((0.0, 0.0))  # a vertex again
+    assert stream.add_points([[1.0, 1.5], [3.0, 1.0], [0.5, 0.5]]) == 1
+    assert stream.add_point((1.0, -1.0))
+    check(stream, np.concatenate([square, [[3.0, 1.0], [1.0, -1.0]]]))
+
+
+def test_few_points():
+    stream = StreamingHull()
+    assert stream.diameter() is None
+    assert stream.min_area_rectangle() is None
+    stream.add_point((1.0, 1.0))
+    assert stream.diameter()[2] == 0.0
+    stream.add_point((1.0, 1.0))
+    assert len(stream.hull()) == 1
+    stream.add_point((4.0, 5.0))
+    assert stream.diameter()[2] == 5.0
+    assert stream.min_area_rectangle()[1] == 0.0
+    # Collinear points stay a segment
+    stream.add_points([[7.0, 9.0], [2.5, 3.0]])
+    assert stream.diameter()[2] == 10.0
+    assert stream.min_area_rectangle()[1] == 0.0
+
+
+def test_stale_heap_entries_are_dropped():
+    # A growing circle replaces hull vertices all the time
+    stream = StreamingHull()
+    a = np.arange(2000) * 2.4
+    r = 1 + np.arange(2000) / 1000
+    points = np.stack([r * np.cos(a), r * np.sin(a)], axis=1)
+    trimmed = 0
+    for point in points:
+        size = len(stream.area_heap)
+        stream.add_point(point)
+        trimmed += len(stream.area_heap) < size
+        assert len(stream.area_heap) <= 4 * len(stream.records) + 64
+        assert len(stream.diameter_heap) == len(stream.area_heap)
+    assert trimmed
+    check(stream, points)
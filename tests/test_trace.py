@@ -0,0 +1,78 @@
+import os
+import numpy as np
+import pytest
+from diameter.diameter import record_bounding_rectangle as record_diameter
+from maxdist.maxdist import record_bounding_rectangle as record_maxdist
+from minimum_area_rectangle.minimum_area_rectangle import record_bounding_rectangles
+from reference import random_hulls
+from rotating_calipers.trace import HEADER, read_trace, record_trace, write_trace
+
+HULLS = random_hulls(40, count=4, low=10, high=60)
+# Bytes of one state on disk with 2 byte caliper indices
+STATE_BYTES = {'diameter': 24, 'maxdist': 24, 'min_area_rectangle': 16}
+
+
+def record(kernel, hull1, hull2):
+    if kernel == 'diameter':
+        return record_diameter(hull1)
+    if kernel == 'maxdist':
+        return record_maxdist(hull1, hull2)
+    return record_bounding_rectangles(hull1)
+
+
+@pytest.mark.parametrize('kernel', sorted(STATE_BYTES))
+def test_round_trip(kernel, tmp_path):
+    (points1, hull1), (points2, hull2) = HULLS[0], HULLS[1]
+    hull2 = hull2 + [0.5, 0.0]
+    trace = record_trace(kernel, points1, points2 + [0.5, 0.0], compute_hull=True)
+    path = tmp_path / 'sweep.trace'
+    write_trace(path, trace)
+    again = read_trace(path)
+
+    assert again.kernel == kernel
+    assert len(again) == len(trace)
+    for hull, expected in zip(again.hulls, trace.hulls):
+        assert np.array_equal(hull, expected)
+    assert np.array_equal(again.calipers, trace.calipers)
+    assert np.array_equal(again.angles, trace.angles)
+    assert (again.edge_pairs is None) == (kernel != 'diameter')
+    if again.edge_pairs is not None:
+        assert np.array_equal(again.edge_pairs, trace.edge_pairs)
+    hull_bytes = sum(4 + 16 * len(hull) for hull in trace.hulls)
+    assert path.stat().st_size == HEADER.size + hull_bytes + STATE_BYTES[kernel] * len(trace)
+
+    # The rectangles and pairs rebuilt from the anchors are the recorded ones
+    rectangles, calipers, angles, _ = record(kernel, hull1, hull2).result()
+    assert np.array_equal(again.calipers, calipers)
+    assert np.allclose(again.rectangles(), rectangles)
+    if kernel == 'diameter':
+        assert np.array_equal(again.pairs(), hull1[calipers[:, [1, 3]]])
+    elif kernel == 'maxdist':
+        assert np.array_equal(again.pairs()[:, 0], hull1[calipers[:, 1]])
+        assert np.array_equal(again.pairs()[:, 1], hull2[calipers[:, 7]])
+    else:
+        assert again.pairs() is None
+
+
+def test_not_a_trace(tmp_path):
+    path = tmp_path / 'other.trace'
+    for data in (b'RCTRACE', b'RCTRACE0' + bytes(HEADER.size)):
+        path.write_bytes(data)
+        with pytest.raises(ValueError):
+            read_trace(path)
+    with pytest.raises(ValueError):
+        record_trace('hull', HULLS[0][1])
+
+
+def test_export_frames(tmp_path):
+    pytest.importorskip('matplotlib')
+    from matplotlib.image import imread
+    from rotating_calipers.replay import export_frames
+    trace = record_trace('min_area_rectangle', HULLS[2][1])
+    names = export_frames(trace, tmp_path / 'frames', every=3, size=(2, 2), dpi=50)
+    assert len(names) == len(range(0, len(trace), 3)) > 1
+    assert sorted(p.name for p in (tmp_path / 'frames').iterdir()) == sorted(os.path.basename(name) for name in names)
+    first, last = imread(names[0]), imread(names[-1])
+    assert first.shape[:2] == (100, 100)
+    # The calipers moved between the first and the last frame
+    assert not np.array_equal(first, last)
@@ -0,0 +1,94 @@
+import numpy as np
+from diameter.diameter import record_bounding_rectangle as record_diameter
+from maxdist.maxdist import record_bounding_rectangle as record_maxdist
+from minimum_area_rectangle.minimum_area_rectangle import record_bounding_rectangles
+from reference import farthest_pair, min_area_box, random_hulls
+
+# A hinted sweep searches near the hint first, it has to come out with the same
+# optimum as a cold one wherever the hint is
+HULLS = [hull for _, hull in random_hulls(30, count=12, low=10, high=60)]
+SPANS = (None, 0.01, 0.5)
+
+
+def turned(hull, a):
+    # The hull a little later: rotated by a radians and shifted
+    c, s = np.cos(a), np.sin(a)
+    return hull @ np.array([[c, s], [-s, c]]) + [0.3, -0.2]
+
+
+def areas(record):
+    rectangles = record.result()[0][:, 0]
+    sides = np.linalg.norm(rectangles[:, 1] - rectangles[:, 0], axis=1)
+    return sides * np.linalg.norm(rectangles[:, 2] - rectangles[:, 1], axis=1)
+
+
+def best_area(record):
+    return areas(record).min()
+
+
+def best_length(hull, record):
+    _, calipers, _, edge_pairs = record.result()
+    pairs = np.concatenate([calipers[:, [1, 3]], edge_pairs[edge_pairs[:, 0] >= 0]])
+    return np.linalg.norm(hull[pairs[:, 0]] - hull[pairs[:, 1]], axis=1).max()
+
+
+def best_distance(hull1, hull2, record):
+    calipers = record.result()[1]
+    return np.linalg.norm(hull1[calipers[:, 1]] - hull2[calipers[:, 7]], axis=1).max()
+
+
+def hints(record):
+    # Every state of a sweep, near the optimum or far from it
+    _, calipers, angles, _ = record.result()
+    return [(calipers[k], angles[k]) for k in range(record.count)]
+
+
+def test_min_area_rectangle():
+    for hull in HULLS:
+        cold = best_area(record_bounding_rectangles(hull))
+        assert np.isclose(cold, min_area_box(hull))
+        for hint in hints(record_bounding_rectangles(turned(hull, -0.05))):
+            for span in SPANS:
+                assert np.isclose(best_area(record_bounding_rectangles(hull, hint=hint, span=span)), cold)
+
+
+def test_diameter():
+    for hull in HULLS:
+        cold = best_length(hull, record_diameter(hull))
+        assert np.isclose(cold, farthest_pair(hull))
+        for hint in hints(record_diameter(turned(hull, -0.05))):
+            for span in SPANS:
+                assert np.isclose(best_length(hull, record_diameter(hull, hint=hint, span=span)), cold)
+
+
+def test_maxdist():
+    for hull1, hull2 in zip(HULLS, HULLS[1:]):
+        hull2 = hull2 + [0.7, 0.0]
+        cold = best_distance(hull1, hull2, record_maxdist(hull1, hull2))
+        assert np.isclose(cold, farthest_pair(hull1, hull2))
+        for hint in hints(record_maxdist(turned(hull1, -0.05), turned(hull2, -0.05))):
+            for span in SPANS:
+                record = record_maxdist(hull1, hull2, hint=hint, span=span)
+                assert np.isclose(best_distance(hull1, hull2, record), cold)
+
+
+def test_hint_saves_states():
+    # A hull with many vertices and its optimum near the hint: the local search
+    # settles it without sweeping the whole range
+    a = np.linspace(0, 2 * np.pi, 400, endpoint=False)
+    hull = np.stack([3 * np.cos(a), np.sin(a)], axis=1)
+    cold = record_bounding_rectangles(hull)
+    k = int(np.argmin(areas(cold)))
+    _, calipers, angles, _ = cold.result()
+    warm = record_bounding_rectangles(hull, hint=(calipers[k], angles[k]))
+    assert np.isclose(best_area(warm), best_area(cold))
+    assert warm.count < cold.count / 4
+
+
+def test_bad_hint_sweeps_everything():
+    hull = HULLS[0]
+    cold = record_bounding_rectangles(hull)
+    for hint in (([0, 1, 2], 0.0), ([0, 1, 2, len(hull)], 0.0), ([0, 1, 2, 3], np.nan)):
+        warm = record_bounding_rectangles(hull, hint=hint)
+        assert warm.count == cold.count
+        assert np.array_equal(warm.result()[0], cold.result()[0])
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from diameter import diameter
+from maxdist import maxdist
+from minimum_area_rectangle import minimum_area_rectangle
+from rotating_calipers import engine
+from rotating_calipers.engine import SweepError
+from rotating_calipers.metrics import compute_metrics
+
+
+def regular(n, step=1, shift=0.0):
+    # n-gon through every step-th corner: counter-clockwise and convex for step
+    # 1, a star that winds round step times otherwise
+    a = np.arange(n) * 2 * np.pi * step / n
+    return np.stack([np.cos(a) + shift, np.sin(a)], axis=1)
+
+
+HULL = regular(9)
+OTHER = regular(7, shift=3.0)
+# Clockwise, not convex (a dent every other vertex) and self intersecting
+BAD = [HULL[::-1], HULL * np.where(np.arange(9) % 2, 0.5, 1.0)[:, None], regular(7, 3), regular(11, 5)]
+
+
+def sweeps(points, watchdog):
+    # (states, bound on the states) of every sweep over points
+    n, m = len(points), len(OTHER)
+    return [(lambda: list(minimum_area_rectangle.compute_bounding_rectangle(points, watchdog=watchdog)), n + 1),
+            (lambda: list(minimum_area_rectangle.record_bounding_rectangles(points, watchdog=watchdog).result()[1]),
+             n + 1),
+            (lambda: list(diameter.compute_bounding_rectangle(points, watchdog=watchdog)), n + 2),
+            (lambda: list(diameter.record_bounding_rectangle(points, watchdog=watchdog).result()[1]), n + 2),
+            (lambda: list(maxdist.compute_bounding_rectangle(points, OTHER, watchdog=watchdog)), n + m + 2),
+            (lambda: list(maxdist.compute_bounding_rectangle(OTHER, points, watchdog=watchdog)), n + m + 2),
+            (lambda: list(maxdist.record_bounding_rectangle(points, OTHER, watchdog=watchdog).result()[1]),
+             n + m + 2)]
+
+
+def test_bad_input_raises():
+    for points in BAD:
+        for sweep, _ in sweeps(points, True):
+            with pytest.raises(SweepError):
+                sweep()
+        with pytest.raises(SweepError):
+            compute_metrics(points, watchdog=True)
+
+
+def test_bad_input_stops_without_watchdog():
+    for points in BAD:
+        for sweep, bound in sweeps(points, False):
+            assert len(sweep()) <= bound
+        compute_metrics(points)
+
+
+def test_good_input_passes():
+    for sweep, bound in sweeps(HULL, True):
+        assert 0 < len(sweep()) <= bound
+    compute_metrics(HULL, watchdog=True)
+
+
+def test_step_bound(monkeypatch):
+    # A sweep that never sees itself turn far enough runs into its bound
+    monkeypatch.setattr(engine.CaliperSweep, 'covered', lambda self, quarters, span=None: False)
+    monkeypatch.setattr(engine.CaliperSweep, 'turned_past', lambda self, quarters: False)
+    n = len(HULL)
+    assert len(list(minimum_area_rectangle.compute_bounding_rectangle(HULL))) == n + 1
+    with pytest.raises(SweepError, match='did not close within %d states' % (n + 1)):
+        list(minimum_area_rectangle.compute_bounding_rectangle(HULL, watchdog=True))
+    compute_metrics(HULL)
+    with pytest.raises(SweepError, match='did not close within %d states' % (n + 4)):
+        compute_metrics(HULL, watchdog=True)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from reference import farthest_pair
+from rotating_calipers import window
+from rotating_calipers.window import SlidingDiameter, sliding_diameters
+
+
+def walk(seed, n):
+    # A random walk, so the farthest pair of a window keeps changing
+    return np.cumsum(np.random.default_rng(seed).normal(size=(n, 2)), axis=0)
+
+
+def check(points, lengths, pairs, starts):
+    for k, start in enumerate(starts):
+        assert np.isclose(lengths[k], farthest_pair(points[start:k + 1]))
+        assert np.isclose(np.linalg.norm(pairs[k, 0] - pairs[k, 1]), lengths[k])
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 50])
+def test_size_window(size):
+    # 300 points flip the two stacks over many times
+    points = walk(70, 300)
+    lengths, pairs = sliding_diameters(points, size=size)
+    check(points, lengths, pairs, [max(0, k + 1 - size) for k in range(len(points))])
+
+
+def test_duration_window():
+    points = walk(71, 300)
+    times = np.cumsum(np.random.default_rng(72).exponential(size=300))
+    lengths, pairs = sliding_diameters(points, times=times, duration=6.0)
+    check(points, lengths, pairs, [int(np.searchsorted(times, t - 6.0)) for t in times])
+
+
+def test_large_hulls(monkeypatch):
+    # Front and back hulls compared with the calipers instead of all pairs
+    monkeypatch.setattr(window, 'BRUTE_FORCE_PAIRS', 0)
+    a = np.arange(400) * 0.7
+    points = np.stack([np.cos(a), np.sin(a)], axis=1) * (1 + np.arange(400) % 13 / 100)[:, None]
+    lengths, pairs = sliding_diameters(points, size=60)
+    check(points, lengths, pairs, [max(0, k - 59) for k in range(len(points))])
+
+
+def test_window_length():
+    sliding = SlidingDiameter(size=3)
+    assert sliding.diameter() is None
+    for k in range(10):
+        sliding.update((float(k), 0.0))
+        assert len(sliding) == min(k + 1, 3)
+    assert sliding.diameter()[2] == 2.0
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        SlidingDiameter()
+    with pytest.raises(ValueError):
+        SlidingDiameter(size=3, duration=1.0)
+    with pytest.raises(ValueError):
+        SlidingDiameter(size=0)
+    with pytest.raises(ValueError):
+        SlidingDiameter(duration=1.0).update((0.0, 0.0))